@@ -1,10 +1,23 @@
 # Created automatically by Cursor AI (2024-12-19)
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import json
+import redis
+import structlog
 import uuid
 
+from app.core.auth import current_user
+from app.core.bulk_intake import body_format, incident_id_for, parse_records
+from app.core.config import settings
+from app.core.memberships import MembershipUnavailable, incident_access
+from app.core.scheduling import RateLimited, get_scheduler, retry_after_header
+
+logger = structlog.get_logger()
+
 router = APIRouter()
 
 class IncidentCreate(BaseModel):
@@ -39,3 +52,224 @@ async def get_incident(incident_id: str):
     """Get incident details."""
     # TODO: Implement actual database lookup
     raise HTTPException(status_code=404, detail="Incident not found")
+
+class IncidentIntake(BaseModel):
+    title: str
+    description: str
+    severity: str = "high"
+    detected_at: Optional[str] = None
+    affected_users: int = 0
+    data_types: List[str] = []
+    jurisdictions: List[str] = []
+
+class DispatchResponse(BaseModel):
+    job_id: str
+    incident_id: str
+    priority: str
+    status: str
+
+@router.post("/{incident_id}/intake", response_model=DispatchResponse, status_code=202)
+async def intake_incident(incident_id: str, intake: IncidentIntake, org_id: str = Header("default", alias="X-Org-Id")):
+    """Queue intake normalization, subject to the org's rate limit and fair share."""
+    incident = {"id": incident_id, **intake.dict()}
+    incident["detected_at"] = intake.detected_at or datetime.utcnow().isoformat()
+    try:
+        job = await get_scheduler().submit_async(
+            org_id,
+            "app.tasks.intake_normalizer.normalize_incident",
+            args=[incident],
+            queue="interactive",
+            severity=intake.severity,
+        )
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e))
+    except redis.RedisError:
+        raise HTTPException(status_code=503, detail="Scheduler unavailable")
+    return DispatchResponse(job_id=job.id, incident_id=incident_id, priority=job.priority, status="queued")
+
+class ApprovalStep(BaseModel):
+    order_idx: int
+    role_required: str
+
+class ApprovalRouteRequest(BaseModel):
+    artifact_kind: str
+    artifact_id: Optional[str] = Field(default=None, description="Defaults to artifact_kind (one artifact per kind)")
+    severity: str = "high"
+    jurisdictions: List[str] = []
+    approval_required: bool = True
+    chain: Optional[List[ApprovalStep]] = Field(default=None, description="Explicit chain; routed by the approval policy when unset")
+
+class ApprovalDecision(BaseModel):
+    artifact_kind: str
+    artifact_id: Optional[str] = None
+    order_idx: int
+    decision: str = Field(..., pattern="^(approved|rejected)$")
+    comment: Optional[str] = None
+
+async def _submit_approval(org_id: str, task: str, kwargs: Dict[str, Any], severity: Optional[str] = None):
+    try:
+        return await get_scheduler().submit_async(org_id, f"app.tasks.approvals.{task}", kwargs=kwargs, queue="approvals", severity=severity)
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e))
+    except redis.RedisError:
+        raise HTTPException(status_code=503, detail="Scheduler unavailable")
+
+@router.post("/{incident_id}/approvals", response_model=DispatchResponse, status_code=202)
+async def route_approvals(incident_id: str, request: ApprovalRouteRequest, org_id: str = Header("default", alias="X-Org-Id")):
+    """Queue routing of an artifact's approval chain; routing it again restarts the chain.
+
+    Transitions (routed, advanced, approved, rejected) arrive on
+    ``incident:{id}:approvals``.
+    """
+    chain = None
+    if request.chain is not None:
+        steps = sorted(request.chain, key=lambda step: step.order_idx)
+        if [step.order_idx for step in steps] != list(range(1, len(steps) + 1)):
+            raise HTTPException(status_code=422, detail="Approval chain must have contiguous order_idx starting at 1")
+        chain = [step.role_required for step in steps]
+    job = await _submit_approval(org_id, "route_artifact_approval", {
+        "incident_id": incident_id,
+        "artifact_id": request.artifact_id or request.artifact_kind,
+        "artifact_kind": request.artifact_kind,
+        "severity": request.severity,
+        "jurisdictions": request.jurisdictions,
+        "approval_required": request.approval_required,
+        "chain": chain,
+        "org_id": org_id,
+    }, severity=request.severity)
+    return DispatchResponse(job_id=job.id, incident_id=incident_id, priority=job.priority, status="queued")
+
+@router.post("/{incident_id}/approve", response_model=DispatchResponse, status_code=202)
+async def approve_artifact(
+    incident_id: str,
+    decision: ApprovalDecision,
+    org_id: str = Header("default", alias="X-Org-Id"),
+    user_id: str = Depends(current_user),
+):
+    """Queue an approve/reject of the step ``order_idx``, which must be awaiting the caller's role.
+
+    The caller is the user of the bearer token and acts with their stored
+    membership role in ``X-Org-Id``: 403 without a membership, 404 when the
+    incident is not that org's. The outcome arrives on
+    ``incident:{id}:approvals``, as the transition or as ``approval.refused``
+    with the reason (wrong step or role, chain closed).
+    """
+    try:
+        role, owned = await incident_access(user_id, org_id, incident_id)
+    except MembershipUnavailable:
+        raise HTTPException(status_code=503, detail="Membership store unavailable")
+    if role is None:
+        raise HTTPException(status_code=403, detail="Approvals require a member of the org")
+    if not owned:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    job = await _submit_approval(org_id, "record_approval_decision", {
+        "incident_id": incident_id,
+        "artifact_id": decision.artifact_id or decision.artifact_kind,
+        "order_idx": decision.order_idx,
+        "role": role,
+        "decision": decision.decision,
+        "user_id": user_id,
+        "comment": decision.comment,
+        "org_id": org_id,
+    })
+    return DispatchResponse(job_id=job.id, incident_id=incident_id, priority=job.priority, status="queued")
+
+class BulkIntakeRecord(IncidentIntake):
+    type: str = "other"
+    external_id: Optional[str] = Field(default=None, description="Client's own id; makes re-imports update the same incident")
+
+@router.post("/bulk-intake")
+async def bulk_intake(request: Request, org_id: str = Header("default", alias="X-Org-Id")):
+    """Import many incidents from an NDJSON body, or CSV with ``Content-Type: text/csv``.
+
+    Records are validated as the body streams in and queued for
+    normalization in chunks of ``BULK_INTAKE_CHUNK_SIZE`` on the ``bulk``
+    queue, where the workers normalize them in parallel and persist each
+    chunk in one transaction. The response is NDJSON streamed back as the
+    import proceeds: the batch id, one line per rejected record (``line``,
+    ``error``), one per queued chunk (its job id and ``[line, incident_id]``
+    pairs) and a summary. Errors found by the workers arrive on the realtime
+    channel ``intake:{batch_id}:records``.
+    """
+    batch_id = str(uuid.uuid4())
+    stream = _bulk_stream(request, org_id, body_format(request.headers.get("content-type")), batch_id)
+    return _DuplexStreamingResponse(stream, media_type="application/x-ndjson")
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """A streaming response whose generator is still reading the request body.
+
+    ``StreamingResponse`` also reads ``receive`` to notice disconnects, which
+    would swallow body messages; here the body reads themselves raise
+    ``ClientDisconnect`` when the client goes away.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _line(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+async def _submit_chunk(org_id: str, batch_id: str, records: List[Dict[str, Any]]) -> str:
+    """Queue one chunk; a rate-limited org waits for its bucket, which also slows reading the body."""
+    while True:
+        try:
+            job = await get_scheduler().submit_async(
+                org_id,
+                "app.tasks.bulk_intake.normalize_incident_batch",
+                args=[batch_id, org_id, records],
+                queue="bulk",
+            )
+            return job.id
+        except RateLimited as e:
+            await asyncio.sleep(e.retry_after)
+
+async def _bulk_stream(request: Request, org_id: str, fmt: str, batch_id: str) -> AsyncIterator[bytes]:
+    yield _line({"batch_id": batch_id, "format": fmt})
+    accepted = rejected = chunks = 0
+    index = 0  # every chunk's position, failed ones included; ``chunks`` counts the queued ones
+    chunk: List[Dict[str, Any]] = []
+
+    async def flush() -> bytes:
+        nonlocal accepted, rejected, chunks, index
+        records = list(chunk)
+        chunk.clear()
+        pairs = [[r["line"], r["incident"]["id"]] for r in records]
+        position, index = index, index + 1
+        try:
+            job_id = await _submit_chunk(org_id, batch_id, records)
+        except redis.RedisError:
+            rejected += len(records)
+            return _line({"chunk": position, "error": "Scheduler unavailable", "records": pairs})
+        accepted += len(records)
+        chunks += 1
+        return _line({"chunk": position, "job_id": job_id, "records": pairs})
+
+    async for line, record, error in parse_records(request.stream(), fmt):
+        if error is None:
+            try:
+                parsed = BulkIntakeRecord(**record)
+            except ValidationError as e:
+                error = _validation_error(e)
+        if error is not None:
+            rejected += 1
+            yield _line({"line": line, "error": error})
+            continue
+        if accepted + len(chunk) >= settings.BULK_INTAKE_MAX_RECORDS:
+            yield _line({"line": line, "error": f"import exceeds {settings.BULK_INTAKE_MAX_RECORDS} records; rest ignored"})
+            break
+        incident = parsed.dict(exclude={"external_id"})
+        incident["id"] = incident_id_for(org_id, parsed.external_id)
+        incident["detected_at"] = parsed.detected_at or datetime.utcnow().isoformat()
+        chunk.append({"line": line, "incident": incident})
+        if len(chunk) >= settings.BULK_INTAKE_CHUNK_SIZE:
+            yield await flush()
+    if chunk:
+        yield await flush()
+
+    logger.info("Bulk intake queued", batch_id=batch_id, org_id=org_id, accepted=accepted, rejected=rejected, chunks=chunks)
+    yield _line({"batch_id": batch_id, "done": True, "accepted": accepted, "rejected": rejected, "chunks": chunks})
@@ -0,0 +1,69 @@
+# Created automatically by Cursor AI (2024-12-19)
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.realtime import Subscriber, get_hub, parse_channels
+
+router = APIRouter()
+
+@router.websocket("/ws")
+async def realtime_ws(websocket: WebSocket, channels: str = Query(...)):
+    """Stream events for ``channels`` (comma-separated, e.g. ``incident:42:plan,incident:42:monitor``)."""
+    try:
+        requested = parse_channels(channels)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await websocket.accept()
+    hub = get_hub()
+    subscriber = await hub.connect(requested, "ws")
+    # Inbound messages are ignored; reading them is how a disconnect is noticed
+    reader = asyncio.ensure_future(_drain(websocket, subscriber))
+    try:
+        while True:
+            frame = await subscriber.next()
+            if frame is None:
+                break
+            await websocket.send_text(frame.text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        await hub.disconnect(subscriber)
+
+async def _drain(websocket: WebSocket, subscriber: Subscriber) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscriber.close()
+
+@router.get("/sse")
+async def realtime_sse(channels: str = Query(...)):
+    """Server-sent events fallback for the same channels."""
+    try:
+        requested = parse_channels(channels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    hub = get_hub()
+    subscriber = await hub.connect(requested, "sse")
+    return StreamingResponse(
+        _sse_stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _sse_stream(subscriber: Subscriber):
+    try:
+        yield b": connected\n\n"
+        while True:
+            frame = await subscriber.next(timeout=settings.REALTIME_HEARTBEAT_SECONDS)
+            # Comment lines keep proxies from closing idle streams
+            yield frame.sse if frame is not None else b": heartbeat\n\n"
+    finally:
+        await get_hub().disconnect(subscriber)
@@ -0,0 +1,37 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""The authenticated caller, from the gateway's bearer token.
+
+The gateway signs access tokens with ``JWT_SECRET`` (``sub`` is the user id).
+Endpoints that act as a user depend on ``current_user`` instead of reading a
+user id from a header the client could set to anyone's.
+"""
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def verify_token(token: str) -> str:
+    """User id of a valid, unexpired access token; raises 401 otherwise."""
+    from jose import JWTError, jwt
+
+    if not settings.JWT_SECRET:
+        raise HTTPException(status_code=503, detail="Authentication is not configured (JWT_SECRET)")
+    try:
+        claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
+    if not claims.get("sub"):
+        raise HTTPException(status_code=401, detail="Token has no subject", headers={"WWW-Authenticate": "Bearer"})
+    return str(claims["sub"])
+
+
+async def current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> str:
+    """FastAPI dependency: the id of the user the request's bearer token was issued to."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Bearer token required", headers={"WWW-Authenticate": "Bearer"})
+    return verify_token(credentials.credentials)
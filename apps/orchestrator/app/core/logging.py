@@ -0,0 +1 @@
+../../../workers/app/core/logging.py
\ No newline at end of file
@@ -0,0 +1,66 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Workspace roles of users, read from ``memberships``.
+
+Requests that act as a role (approval decisions) are authorized by the role
+stored for the authenticated user's membership in the org, never by a role
+the client asserts, and only on incidents that belong to that org.
+"""
+import asyncio
+import uuid
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+class MembershipUnavailable(Exception):
+    """The membership store could not be queried."""
+
+
+class MembershipStore:
+    """Role lookups against Postgres over a small thread-safe connection pool."""
+
+    def __init__(self, dsn: str, max_connections: int = 8):
+        import psycopg2
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self._psycopg2 = psycopg2
+        self._pool = ThreadedConnectionPool(0, max_connections, dsn)
+
+    def access(self, user_id: str, org_id: str, incident_id: str) -> Tuple[Optional[str], bool]:
+        """The user's workspace role in the org (None when not a member) and whether the incident is the org's."""
+        try:
+            conn = self._pool.getconn()
+        except self._psycopg2.Error as e:
+            raise MembershipUnavailable(str(e)) from e
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(
+                    "SELECT (SELECT workspace_role FROM memberships WHERE user_id = %s AND org_id = %s),"
+                    " EXISTS (SELECT 1 FROM incidents WHERE id = %s AND org_id = %s)",
+                    (user_id, org_id, incident_id, org_id),
+                )
+                role, owned = cur.fetchone()
+        except self._psycopg2.Error as e:
+            raise MembershipUnavailable(str(e)) from e
+        finally:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        return role, owned
+
+
+@lru_cache(maxsize=1)
+def get_memberships() -> MembershipStore:
+    return MembershipStore(settings.DATABASE_URL)
+
+
+async def incident_access(user_id: str, org_id: str, incident_id: str) -> Tuple[Optional[str], bool]:
+    """``MembershipStore.access`` off the event loop; ids that are not UUIDs match nothing."""
+    try:
+        user_id, org_id, incident_id = (str(uuid.UUID(value)) for value in (user_id, org_id, incident_id))
+    except ValueError:
+        return None, False
+    return await asyncio.to_thread(get_memberships().access, user_id, org_id, incident_id)
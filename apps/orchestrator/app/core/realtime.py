@@ -0,0 +1,252 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Realtime fan-out of incident channels to WebSocket and SSE clients.
+
+The hub subscribes to each backend (Redis pub/sub) channel once, however
+many clients follow it, and unsubscribes when the last one leaves. Workers
+publish JSON, so every broadcast is wrapped into a ``Frame`` exactly once:
+the WebSocket text and the SSE bytes are built from the raw payload without
+parsing it, and the same objects are handed to every client.
+
+Each client has a bounded outbox drained by its own connection, so a slow
+consumer never delays the others. Status channels (``export:{id}:status``)
+coalesce to the latest event; on every other channel a full outbox drops its
+oldest events and the client is sent a ``hub.dropped`` notice so it can
+refetch state.
+"""
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import redis
+import redis.asyncio as aioredis
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+CHANNEL_PATTERN = re.compile(r"^(?:incident:[\w-]+:(?:plan|drafts|legal|approvals|monitor)|export:[\w-]+:status|intake:[\w-]+:records)$")
+COALESCE_SUFFIXES = (":status",)
+
+REALTIME_CLIENTS = Gauge("orchestrator_realtime_clients", "Connected realtime clients", ["transport"])
+REALTIME_CHANNELS = Gauge("orchestrator_realtime_channels", "Backend channels currently subscribed")
+REALTIME_BROADCASTS = Counter("orchestrator_realtime_broadcasts_total", "Events fanned out from the backend")
+REALTIME_DROPPED = Counter("orchestrator_realtime_dropped_total", "Events discarded for slow clients", ["policy"])
+REALTIME_FANOUT = Histogram(
+    "orchestrator_realtime_fanout_seconds",
+    "Time to enqueue one event for every subscriber",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+
+def valid_channel(channel: str) -> bool:
+    return bool(CHANNEL_PATTERN.match(channel))
+
+
+class Frame:
+    """One broadcast, encoded once for every transport."""
+
+    __slots__ = ("channel", "text", "sse", "created")
+
+    def __init__(self, channel: str, payload: str):
+        self.channel = channel
+        self.text = '{"channel":' + json.dumps(channel) + ',"data":' + payload + "}"
+        data = "".join(f"data: {line}\n" for line in self.text.splitlines())
+        self.sse = f"event: {channel}\n{data}\n".encode("utf-8")
+        self.created = time.perf_counter()
+
+    @classmethod
+    def notice(cls, channel: str, event: Dict[str, object]) -> "Frame":
+        return cls(channel, json.dumps(event))
+
+
+class Subscriber:
+    """Bounded per-client outbox with drop-oldest or coalesce-to-latest overflow."""
+
+    def __init__(self, channels: Iterable[str], maxsize: int, transport: str = "ws"):
+        self.channels: Set[str] = set(channels)
+        self.maxsize = maxsize
+        self.transport = transport
+        self.dropped: Dict[str, int] = {}
+        self._queue: Deque[Tuple[str, Optional[Frame]]] = deque()
+        self._latest: Dict[str, Frame] = {}  # coalesced channel -> newest frame
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def offer(self, frame: Frame) -> None:
+        if frame.channel.endswith(COALESCE_SUFFIXES):
+            if frame.channel in self._latest:
+                self._latest[frame.channel] = frame
+                REALTIME_DROPPED.labels("coalesce").inc()
+                return
+            self._latest[frame.channel] = frame
+            self._queue.append((frame.channel, None))
+        else:
+            self._queue.append((frame.channel, frame))
+        while len(self._queue) > self.maxsize:
+            channel, oldest = self._queue.popleft()
+            if oldest is None:
+                self._latest.pop(channel, None)
+            self.dropped[channel] = self.dropped.get(channel, 0) + 1
+            REALTIME_DROPPED.labels("drop").inc()
+        self._ready.set()
+
+    def close(self) -> None:
+        """Wake a pending ``next`` so the connection loop can exit."""
+        self.closed = True
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Next frame to send, a drop notice first if events were lost; None on timeout or close."""
+        while not self._queue and not self.dropped:
+            if self.closed:
+                return None
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.dropped:
+            channel, count = self.dropped.popitem()
+            return Frame.notice(channel, {"type": "hub.dropped", "count": count})
+        channel, frame = self._queue.popleft()
+        return frame if frame is not None else self._latest.pop(channel)
+
+
+class MemoryChannelBackend:
+    """In-process pub/sub for development, tests and the load benchmark."""
+
+    def __init__(self):
+        self.subscribed: Set[str] = set()
+        self._messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel: str) -> None:
+        self.subscribed.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.subscribed.discard(channel)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        if channel in self.subscribed:
+            await self._messages.put((channel, payload))
+
+    async def listen(self) -> AsyncIterator[Tuple[str, str]]:
+        while True:
+            yield await self._messages.get()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisChannelBackend:
+    """Redis pub/sub on one connection, shared by all channels of the process."""
+
+    def __init__(self, url: str):
+        self.client = aioredis.Redis.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+
+    async def subscribe(self, channel: str) -> None:
+        await self.pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self.pubsub.unsubscribe(channel)
+
+    async def listen(self) -> AsyncIterator[Tuple[str, str]]:
+        while True:
+            if not self.pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            message = await self.pubsub.get_message(timeout=1.0)
+            if message and message["type"] == "message":
+                yield message["channel"].decode("utf-8"), message["data"].decode("utf-8")
+
+    async def close(self) -> None:
+        await self.pubsub.close()
+        await self.client.close()
+
+
+class RealtimeHub:
+    """Channel registry and broadcast loop."""
+
+    def __init__(self, backend, queue_size: int = 256):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self._lock = asyncio.Lock()
+
+    async def connect(self, channels: Iterable[str], transport: str = "ws") -> Subscriber:
+        subscriber = Subscriber(channels, self.queue_size, transport)
+        async with self._lock:
+            for channel in subscriber.channels:
+                if channel not in self.subscribers:
+                    await self.backend.subscribe(channel)
+                    self.subscribers[channel] = set()
+                self.subscribers[channel].add(subscriber)
+        REALTIME_CHANNELS.set(len(self.subscribers))
+        REALTIME_CLIENTS.labels(transport).inc()
+        return subscriber
+
+    async def disconnect(self, subscriber: Subscriber) -> None:
+        subscriber.close()
+        async with self._lock:
+            for channel in subscriber.channels:
+                followers = self.subscribers.get(channel)
+                if followers is None:
+                    continue
+                followers.discard(subscriber)
+                if not followers:
+                    del self.subscribers[channel]
+                    await self.backend.unsubscribe(channel)
+        REALTIME_CHANNELS.set(len(self.subscribers))
+        REALTIME_CLIENTS.labels(subscriber.transport).dec()
+
+    def broadcast(self, channel: str, payload: str) -> int:
+        followers = self.subscribers.get(channel)
+        if not followers:
+            return 0
+        started = time.perf_counter()
+        frame = Frame(channel, payload)
+        for subscriber in followers:
+            subscriber.offer(frame)
+        REALTIME_BROADCASTS.inc()
+        REALTIME_FANOUT.observe(time.perf_counter() - started)
+        return len(followers)
+
+    async def run(self) -> None:
+        """Broadcast loop for the app lifespan; reconnects after backend errors."""
+        while True:
+            try:
+                async for channel, payload in self.backend.listen():
+                    self.broadcast(channel, payload)
+            except (redis.RedisError, OSError) as e:
+                logger.warning("Realtime backend failed", error=str(e))
+                await asyncio.sleep(1.0)
+
+
+_hub: Optional[RealtimeHub] = None
+
+
+def get_hub() -> RealtimeHub:
+    global _hub
+    if _hub is None:
+        backend = MemoryChannelBackend() if settings.REALTIME_BACKEND == "memory" else RedisChannelBackend(settings.REDIS_URL)
+        _hub = RealtimeHub(backend, settings.REALTIME_CLIENT_QUEUE_SIZE)
+    return _hub
+
+
+def parse_channels(raw: str) -> List[str]:
+    """Comma-separated channel list from a query string; raises ValueError on unknown channels."""
+    channels = [c.strip() for c in raw.split(",") if c.strip()]
+    if not channels or len(channels) > settings.REALTIME_MAX_CHANNELS_PER_CLIENT:
+        raise ValueError(f"Subscribe to between 1 and {settings.REALTIME_MAX_CHANNELS_PER_CLIENT} channels")
+    invalid = [c for c in channels if not valid_channel(c)]
+    if invalid:
+        raise ValueError(f"Unknown channels: {', '.join(invalid)}")
+    return channels
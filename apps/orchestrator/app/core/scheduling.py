@@ -0,0 +1,398 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Per-org admission control and weighted fair dispatch to the Celery queues.
+
+Work submitted by an org first passes that org's token bucket (one bucket
+for critical incidents and one for everything else, so a flood of routine
+work never spends the critical allowance). Admitted jobs wait in a lane per
+Celery queue and priority, ordered by self-clocked weighted fair queuing:
+each org's jobs get finish tags ``max(V, last finish) + cost / weight`` and
+the lowest tag is dispatched next, so a noisy org only delays its own
+backlog. The dispatch pump serves the critical lane first and only keeps
+``DISPATCH_BROKER_DEPTH`` messages waiting in the broker, so ordering is
+decided here rather than in a FIFO the workers drain blindly.
+
+``RedisSchedulerBackend`` keeps buckets and lanes in Redis, updated by Lua
+scripts so several orchestrator replicas share one schedule;
+``MemorySchedulerBackend`` is the single-process stand-in used in
+development and benchmarks.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+import structlog
+from kombu.exceptions import OperationalError
+from prometheus_client import Counter, Gauge, Histogram
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.core.sharding import MONITOR_QUEUE, route_monitor_task
+from app.core.telemetry import trace_headers
+
+logger = structlog.get_logger()
+
+CRITICAL = "critical"
+NORMAL = "normal"
+PRIORITIES = (CRITICAL, NORMAL)
+
+# Broker or Redis outages: the job is kept and retried; any other send failure is final
+TRANSIENT_ERRORS = (redis.RedisError, OperationalError)
+
+# Relative cost of a dispatch, in bucket tokens and fair-queue service
+TASK_COSTS: Dict[str, float] = {
+    "app.tasks.exporter.export_generate": 5.0,
+    "app.tasks.plan_builder.build_plan": 2.0,
+    "monitor_ingest_mentions": 2.0,
+}
+
+TENANT_QUEUE_DEPTH = Gauge("orchestrator_tenant_queue_depth", "Jobs admitted but not yet dispatched", ["org", "priority"])
+TENANT_QUEUE_WAIT = Histogram(
+    "orchestrator_tenant_queue_wait_seconds",
+    "Time from admission to dispatch",
+    ["org", "priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+DISPATCH_DEAD_LETTERS = Counter("orchestrator_dispatch_dead_letters_total", "Jobs the broker refused for good (dropped)", ["queue"])
+TENANT_REJECTED = Counter("orchestrator_tenant_rate_limited_total", "Submissions refused by the org's token bucket", ["org", "priority"])
+
+
+class RateLimited(Exception):
+    def __init__(self, org_id: str, priority: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for org {org_id} ({priority})")
+        self.org_id = org_id
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class DispatchJob(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    org_id: str
+    task: str
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+    queue: str
+    priority: str = NORMAL
+    cost: float = 1.0
+    enqueued_at: float = 0.0
+    headers: Dict[str, str] = {}
+
+
+def priority_for(severity: Optional[str]) -> str:
+    return CRITICAL if (severity or "").lower() == CRITICAL else NORMAL
+
+
+def _lane(queue: str, priority: str) -> str:
+    return f"{queue}:{priority}"
+
+
+class MemorySchedulerBackend:
+    """In-process buckets and fair-queue lanes with the same semantics as the Redis scripts.
+
+    Submissions and the dispatch loop both run in worker threads, so every
+    update holds a lock, as each Redis script call is atomic.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lanes: Dict[str, List[Tuple[float, int, str, str]]] = {}
+        self._vtime: Dict[str, float] = {}
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._depth: Dict[Tuple[str, str], int] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float, now: float) -> float:
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+    def push(self, lane: str, org_id: str, job_id: str, payload: str, service: float) -> None:
+        with self._lock:
+            start = max(self._vtime.get(lane, 0.0), self._finish.get((lane, org_id), 0.0))
+            finish = self._finish[(lane, org_id)] = start + service
+            heapq.heappush(self._lanes.setdefault(lane, []), (finish, next(self._seq), org_id, payload))
+            self._depth[(lane, org_id)] = self._depth.get((lane, org_id), 0) + 1
+
+    def requeue(self, lane: str, org_id: str, job_id: str, payload: str) -> None:
+        with self._lock:
+            # At the lane's virtual time, ahead of every queued job; finish tags unchanged
+            heapq.heappush(self._lanes.setdefault(lane, []), (self._vtime.get(lane, 0.0), -next(self._seq), org_id, payload))
+            self._depth[(lane, org_id)] = self._depth.get((lane, org_id), 0) + 1
+
+    def pop(self, lane: str) -> Optional[str]:
+        with self._lock:
+            heap = self._lanes.get(lane)
+            if not heap:
+                return None
+            finish, _, org_id, payload = heapq.heappop(heap)
+            self._vtime[lane] = finish
+            self._depth[(lane, org_id)] -= 1
+            return payload
+
+    def depths(self, lane: str) -> Dict[str, int]:
+        with self._lock:
+            return {org: n for (l, org), n in self._depth.items() if l == lane}
+
+
+# KEYS: bucket hash. ARGV: rate, burst, cost, now. Returns retry-after seconds ("0" if admitted).
+_TAKE = """
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens, ts = tonumber(state[1]) or burst, tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens >= cost then tokens = tokens - cost else retry = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry)
+"""
+
+# KEYS: ready zset, jobs hash, finish-tag hash, virtual-time key, depth hash.
+# ARGV: org, job id, payload, service (cost / weight).
+_PUSH = """
+local vtime = tonumber(redis.call('GET', KEYS[4]) or '0')
+local last = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+local finish = math.max(vtime, last) + tonumber(ARGV[4])
+local member = ARGV[1] .. ':' .. ARGV[2]
+redis.call('HSET', KEYS[3], ARGV[1], tostring(finish))
+redis.call('ZADD', KEYS[1], finish, member)
+redis.call('HSET', KEYS[2], member, ARGV[3])
+redis.call('HINCRBY', KEYS[5], ARGV[1], 1)
+return tostring(finish)
+"""
+
+# KEYS: as for _PUSH. ARGV: org, job id, payload. Puts a popped job back at the
+# lane's virtual time, ahead of everything queued, without moving the org's finish tag.
+_REQUEUE = """
+local vtime = redis.call('GET', KEYS[4]) or '0'
+local member = ARGV[1] .. ':' .. ARGV[2]
+redis.call('ZADD', KEYS[1], vtime, member)
+redis.call('HSET', KEYS[2], member, ARGV[3])
+redis.call('HINCRBY', KEYS[5], ARGV[1], 1)
+return vtime
+"""
+
+# KEYS: as for _PUSH. Pops the lowest finish tag and advances the lane's virtual time to it.
+_POP = """
+local head = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if #head == 0 then return false end
+local member = head[1]
+local payload = redis.call('HGET', KEYS[2], member)
+redis.call('ZREM', KEYS[1], member)
+redis.call('HDEL', KEYS[2], member)
+redis.call('SET', KEYS[4], head[2])
+local org = string.match(member, '^(.*):[^:]+$')
+if redis.call('HINCRBY', KEYS[5], org, -1) <= 0 then redis.call('HDEL', KEYS[5], org) end
+return payload
+"""
+
+
+class RedisSchedulerBackend:
+    """Buckets and lanes in Redis; every update is a single atomic script call."""
+
+    def __init__(self, client: redis.Redis, prefix: str = "sched"):
+        self.redis = client
+        self.prefix = prefix
+        self._take = client.register_script(_TAKE)
+        self._push = client.register_script(_PUSH)
+        self._pop = client.register_script(_POP)
+        self._requeue = client.register_script(_REQUEUE)
+
+    def _keys(self, lane: str) -> List[str]:
+        base = f"{self.prefix}:lane:{lane}"
+        return [f"{base}:ready", f"{base}:jobs", f"{base}:finish", f"{base}:vtime", f"{base}:depth"]
+
+    def take(self, key: str, rate: float, burst: float, cost: float, now: float) -> float:
+        return float(self._take(keys=[f"{self.prefix}:bucket:{key}"], args=[rate, burst, cost, now]))
+
+    def push(self, lane: str, org_id: str, job_id: str, payload: str, service: float) -> None:
+        self._push(keys=self._keys(lane), args=[org_id, job_id, payload, service])
+
+    def requeue(self, lane: str, org_id: str, job_id: str, payload: str) -> None:
+        self._requeue(keys=self._keys(lane), args=[org_id, job_id, payload])
+
+    def pop(self, lane: str) -> Optional[str]:
+        payload = self._pop(keys=self._keys(lane))
+        return payload.decode("utf-8") if payload else None
+
+    def depths(self, lane: str) -> Dict[str, int]:
+        return {org.decode("utf-8"): int(n) for org, n in self.redis.hgetall(self._keys(lane)[4]).items()}
+
+
+class FairScheduler:
+    """Admits work per org and dispatches it to Celery in weighted fair order."""
+
+    def __init__(
+        self,
+        backend,
+        send: Callable[[DispatchJob], Any],
+        broker_depth: Callable[[str], int] = lambda queue: 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.send = send
+        self.broker_depth = broker_depth
+        self.clock = clock
+        self.queues: List[str] = list(settings.DISPATCH_QUEUES)
+        self._gauged: set = set()
+
+    def limits(self, priority: str) -> Tuple[float, float]:
+        if priority == CRITICAL:
+            return settings.TENANT_CRITICAL_RATE_PER_SECOND, settings.TENANT_CRITICAL_BURST
+        return settings.TENANT_RATE_PER_SECOND, settings.TENANT_BURST
+
+    def submit(
+        self,
+        org_id: str,
+        task: str,
+        args: Optional[List[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        queue: str = "interactive",
+        severity: Optional[str] = None,
+        cost: Optional[float] = None,
+    ) -> DispatchJob:
+        """Admit a job or raise ``RateLimited`` with the seconds until the org's bucket refills."""
+        priority = priority_for(severity)
+        cost = cost if cost is not None else TASK_COSTS.get(task, 1.0)
+        now = self.clock()
+        rate, burst = self.limits(priority)
+        retry_after = self.backend.take(f"{org_id}:{priority}", rate, burst, cost, now)
+        if retry_after > 0:
+            TENANT_REJECTED.labels(org_id, priority).inc()
+            raise RateLimited(org_id, priority, retry_after)
+
+        job = DispatchJob(
+            org_id=org_id, task=task, args=args or [], kwargs=kwargs or {}, queue=queue,
+            priority=priority, cost=cost, enqueued_at=now, headers=trace_headers(),
+        )
+        weight = settings.TENANT_WEIGHTS.get(org_id, 1.0)
+        self.backend.push(_lane(queue, priority), org_id, job.id, json.dumps(job.dict()), cost / weight)
+        if queue not in self.queues:
+            self.queues.append(queue)  # ad hoc queue: pumped by this replica only
+        TENANT_QUEUE_DEPTH.labels(org_id, priority).inc()
+        return job
+
+    async def submit_async(self, org_id: str, task: str, **options: Any) -> DispatchJob:
+        """``submit`` from a request handler: its Redis round trips run in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self.submit, org_id, task, **options)
+
+    def dispatch(self, queue: str, limit: int) -> List[DispatchJob]:
+        """Send up to ``limit`` jobs for one Celery queue, critical lane first."""
+        sent: List[DispatchJob] = []
+        now = self.clock()
+        for priority in PRIORITIES:
+            while len(sent) < limit:
+                payload = self.backend.pop(_lane(queue, priority))
+                if payload is None:
+                    break
+                job = DispatchJob(**json.loads(payload))
+                try:
+                    self.send(job)
+                except TRANSIENT_ERRORS:
+                    # Back at the head of the lane, so it is the next job sent once the broker recovers
+                    self.backend.requeue(_lane(queue, priority), job.org_id, job.id, payload)
+                    raise
+                except Exception as e:
+                    # Never sendable (unknown task, arguments that do not serialize): drop it, not the lane
+                    logger.error("Dispatch job dead-lettered", error=str(e), job=job.dict())
+                    DISPATCH_DEAD_LETTERS.labels(queue).inc()
+                    TENANT_QUEUE_DEPTH.labels(job.org_id, priority).dec()
+                    continue
+                TENANT_QUEUE_WAIT.labels(job.org_id, priority).observe(max(0.0, now - job.enqueued_at))
+                TENANT_QUEUE_DEPTH.labels(job.org_id, priority).dec()
+                sent.append(job)
+        return sent
+
+    def pump_once(self) -> int:
+        """Top every known queue up to ``DISPATCH_BROKER_DEPTH`` waiting messages."""
+        sent = 0
+        for queue in self.queues:
+            free = settings.DISPATCH_BROKER_DEPTH - self.broker_depth(queue)
+            if free > 0:
+                sent += len(self.dispatch(queue, free))
+        return sent
+
+    def refresh_depths(self) -> None:
+        """Reset the depth gauges from the shared lanes (other replicas admit work too)."""
+        totals: Dict[Tuple[str, str], int] = {key: 0 for key in self._gauged}
+        for queue in self.queues:
+            for priority in PRIORITIES:
+                for org_id, depth in self.backend.depths(_lane(queue, priority)).items():
+                    totals[(org_id, priority)] = totals.get((org_id, priority), 0) + depth
+        for (org_id, priority), depth in totals.items():
+            TENANT_QUEUE_DEPTH.labels(org_id, priority).set(depth)
+        self._gauged = set(totals)
+
+    async def run(self) -> None:
+        """Dispatch loop for the app lifespan; failures are logged and the loop carries on."""
+        interval = settings.DISPATCH_INTERVAL_MS / 1000
+        refreshed = 0.0
+        while True:
+            try:
+                await asyncio.to_thread(self.pump_once)
+                if time.monotonic() - refreshed > 5:
+                    await asyncio.to_thread(self.refresh_depths)
+                    refreshed = time.monotonic()
+            except TRANSIENT_ERRORS as e:
+                logger.warning("Dispatch pump failed", error=str(e))
+            except Exception as e:
+                logger.error("Dispatch pump failed unexpectedly", error=str(e), exc_info=True)
+            await asyncio.sleep(interval)
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+@lru_cache(maxsize=1)
+def _celery_client():
+    """Celery client for publishing, created on the first dispatch rather than at start-up."""
+    from celery import Celery
+
+    return Celery("crisis_crew_workers", broker=settings.REDIS_URL)
+
+
+def celery_queue(job: DispatchJob) -> str:
+    """Broker queue of a job: per-incident monitor tasks go to their shard's queue, as the workers' router would."""
+    route = route_monitor_task(job.task, tuple(job.args), job.kwargs, {})
+    return route["queue"] if route else job.queue
+
+
+def broker_queues(queue: str) -> List[str]:
+    """Broker queues behind a dispatch queue (the monitor shards when sharded)."""
+    if queue == MONITOR_QUEUE and settings.MONITOR_SHARDS > 1:
+        return [f"{MONITOR_QUEUE}.{shard}" for shard in range(settings.MONITOR_SHARDS)]
+    return [queue]
+
+
+def get_scheduler() -> FairScheduler:
+    """Process-wide scheduler sending to the workers' Celery broker."""
+    global _scheduler
+    if _scheduler is None:
+        def send(job: DispatchJob) -> None:
+            _celery_client().send_task(job.task, args=job.args, kwargs=job.kwargs, queue=celery_queue(job), headers=job.headers)
+
+        if settings.SCHEDULER_BACKEND == "memory":
+            _scheduler = FairScheduler(MemorySchedulerBackend(), send)
+        else:
+            client = redis.Redis.from_url(settings.REDIS_URL)
+            # Celery's Redis transport keeps each queue as a list named after it
+            _scheduler = FairScheduler(RedisSchedulerBackend(client), send,
+                                       broker_depth=lambda queue: sum(client.llen(q) for q in broker_queues(queue)))
+    return _scheduler
+
+
+def retry_after_header(error: RateLimited) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
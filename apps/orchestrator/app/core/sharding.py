@@ -0,0 +1 @@
+../../../workers/app/core/sharding.py
\ No newline at end of file
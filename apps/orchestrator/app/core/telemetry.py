@@ -0,0 +1,82 @@
+# Created automatically by Cursor AI (2024-12-19)
+import time
+from typing import Dict, Optional
+
+from fastapi import Response
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, SpanExporter
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+HTTP_LATENCY = Histogram(
+    "orchestrator_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+tracer = trace.get_tracer("crisis_crew.orchestrator")
+
+
+def configure_tracing(exporter: Optional[SpanExporter] = None) -> TracerProvider:
+    """Install the tracer provider; pass an in-memory exporter in tests."""
+    provider = TracerProvider(resource=Resource.create({"service.name": "crisis-crew-orchestrator"}))
+    if exporter is not None:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    elif settings.OTEL_ENDPOINT:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_ENDPOINT, insecure=True)))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def trace_headers() -> Dict[str, str]:
+    """W3C trace context of the current request, for Celery ``apply_async(headers=...)``."""
+    headers: Dict[str, str] = {}
+    propagate.inject(headers)
+    return headers
+
+
+class TelemetryMiddleware:
+    """Per-route latency histogram and a server span around each HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        span = tracer.start_span(f"{scope['method']} {scope['path']}", context=propagate.extract(carrier), kind=trace.SpanKind.SERVER)
+        token = context.attach(trace.set_span_in_context(span))
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.labels(scope["method"], route_path, str(status["code"])).observe(time.perf_counter() - started)
+            span.update_name(f"{scope['method']} {route_path}")
+            span.set_attribute("http.status_code", status["code"])
+            span.end()
+            context.detach(token)
+
+
+async def metrics_endpoint() -> Response:
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
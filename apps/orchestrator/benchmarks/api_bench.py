@@ -0,0 +1,136 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Offline benchmark for the orchestrator HTTP API.
+
+    python -m benchmarks.api_bench                  # run and compare to baseline
+    python -m benchmarks.api_bench --save-baseline  # refresh benchmarks/baseline.json
+
+Requests go through the full middleware stack in-process via TestClient, so
+no server, broker or Redis is needed. Output and baseline format match the
+worker suite (apps/workers/benchmarks/suite.py).
+"""
+import argparse
+import gc
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def build_cases(client: TestClient) -> List[Case]:
+    incident = {"title": "Customer data exposure", "type": "data_breach", "severity": "critical"}
+
+    def call(method: str, path: str, **kwargs) -> Callable[[], Any]:
+        def run():
+            response = client.request(method, path, **kwargs)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{method} {path} -> {response.status_code}")
+            return response
+        return run
+
+    return [
+        ("GET /health", call("GET", "/health")),
+        ("GET /api/v1/health/", call("GET", "/api/v1/health/")),
+        ("POST /api/v1/incidents/", call("POST", "/api/v1/incidents/", json=incident)),
+        ("GET /api/v1/incidents/{id} (404)", call("GET", "/api/v1/incidents/missing")),
+        ("GET /metrics", call("GET", "/metrics")),
+    ]
+
+
+def measure(fn: Callable[[], Any], min_time: float, min_iterations: int, max_iterations: int) -> Dict[str, float]:
+    """Latency percentiles/throughput from timed runs, then peak memory from one traced run."""
+    fn()  # warm-up
+    samples = []
+    gc.collect()
+    started = time.perf_counter()
+    while len(samples) < max_iterations and (len(samples) < min_iterations or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.asarray(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "throughput_per_s": len(samples) / elapsed,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference["p50_ms"] * (1 + tolerance)
+        if stats["p50_ms"] > limit:
+            regressions.append(f"{name}: p50 {stats['p50_ms']:.3f}ms > {limit:.3f}ms (baseline {reference['p50_ms']:.3f}ms)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run cases containing this substring")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown vs baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    from app.core.logging import setup_logging
+    from main import app
+
+    setup_logging(level="WARNING")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results: Dict[str, Dict[str, float]] = {}
+    with TestClient(app) as client:
+        for name, fn in build_cases(client):
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, args.min_time, args.min_iterations, args.max_iterations)
+            print(f"{name:45s} p50={results[name]['p50_ms']:9.3f}ms p99={results[name]['p99_ms']:9.3f}ms "
+                  f"{results[name]['throughput_per_s']:9.1f}/s peak={results[name]['peak_memory_kb']:9.1f}KB", file=sys.stderr)
+
+    report = {"results": results, "regressions": []}
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update({name: {"p50_ms": s["p50_ms"], "p99_ms": s["p99_ms"]} for name, s in results.items()})
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    elif args.baseline.exists():
+        report["regressions"] = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+    for line in report["regressions"]:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
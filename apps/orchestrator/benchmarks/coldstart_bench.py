@@ -0,0 +1,92 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Cold-start budget: fresh-interpreter start-up time of the orchestrator.
+
+    python -m benchmarks.coldstart_bench                    # check every case against its budget
+    python -m benchmarks.coldstart_bench --budget-ms 800    # override the budgets
+
+Each case starts a new interpreter that runs its start-up code: importing
+``main`` (settings, routes, middleware: what an ASGI server does before it
+accepts connections), then that plus the lifespan start-up. The median wall
+time of ``--runs`` starts is checked against the case's budget, and one more
+start under ``-X importtime`` attributes the import time to top-level
+packages. Exits non-zero when a case is over budget; same format as the
+workers' cold-start check (apps/workers/benchmarks/coldstart_bench.py).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+LIFESPAN = """
+import asyncio, main
+
+async def startup():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(startup())
+"""
+
+# Start-up code -> budget for the median cold start, in ms
+BUDGETS_MS: Dict[str, Tuple[str, float]] = {
+    "app": ("import main", 1500),
+    "lifespan": (LIFESPAN, 1600),
+}
+
+
+def start(code: str, importtime: bool = False) -> Tuple[float, str]:
+    """Wall time of one fresh start-up, and its stderr."""
+    # In-memory scheduler and hub so the lifespan case runs without Redis
+    env = {**os.environ, "PYTHONPATH": str(APP_DIR), "SCHEDULER_BACKEND": "memory", "REALTIME_BACKEND": "memory"}
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"start-up failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def by_package(importtime: str) -> Dict[str, float]:
+    """Self import time in ms per top-level package, from ``-X importtime`` output."""
+    totals: Dict[str, float] = defaultdict(float)
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return dict(totals)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case", action="append", choices=sorted(BUDGETS_MS), help="repeatable; default all")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="packages listed per case")
+    parser.add_argument("--budget-ms", type=float, default=None, help="one budget for every case")
+    args = parser.parse_args()
+
+    over: List[str] = []
+    for case in args.case or list(BUDGETS_MS):
+        code, budget = BUDGETS_MS[case]
+        budget = args.budget_ms or budget
+        start(code)  # writes bytecode caches, as a built image has them
+        median = sorted(start(code)[0] for _ in range(args.runs))[args.runs // 2] * 1000
+        packages = by_package(start(code, importtime=True)[1])
+        status = "ok" if median <= budget else "OVER BUDGET"
+        print(f"{case:12s} cold start p50={median:6.0f}ms budget={budget:.0f}ms {status}")
+        top = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        print("    " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in top))
+        if median > budget:
+            over.append(case)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
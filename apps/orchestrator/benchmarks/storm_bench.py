@@ -0,0 +1,432 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Incident-storm load generator: a multi-incident surge through API, scheduler and workers.
+
+    python -m benchmarks.storm_bench                         # 2, 5, 10 and 20 incidents/s, 15s each
+    python -m benchmarks.storm_bench --rates 5,40 --workers interactive=2,monitor=1,exports=1
+    python -m benchmarks.storm_bench --output storm.json
+
+Incidents arrive as a Poisson process at each rate, with a severity mix,
+spread over ``--orgs`` tenants, and go through the orchestrator in process
+(TestClient: full middleware, lifespan and dispatch loop): ``POST
+/incidents`` then ``POST /incidents/{id}/intake``. Once intake is normalized
+the generator submits the follow-up stages through the same
+``FairScheduler``: plan and holding statement, legal lint of the statement,
+then an export; it also feeds ``--mention-batches`` synthetic mention
+batches per incident into ``monitor_ingest_mentions``.
+
+Local stand-ins replace the services: the scheduler runs on
+``MemorySchedulerBackend``, the Celery broker is a FIFO per queue drained by
+worker processes (apps/workers/benchmarks/storm_worker.py, ``--workers`` per
+queue) running the real tasks offline, and exports are written to a temp
+directory instead of S3. Rate-limited submissions are retried after the
+bucket's Retry-After, as a client would.
+
+Per rate it reports SLA attainment for the holding statement (incident
+created -> statement linted within T+1h, compressed by ``--time-scale``),
+per-stage latency split into scheduler wait (admission, including rate-limit
+retries, to dispatch), broker wait and run time, and per queue the peak
+depth in the scheduler lanes and the broker and the pool's utilization. A
+queue saturates where its utilization reaches 1 and its waits keep growing
+with the rate.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+WORKERS_DIR = Path(__file__).resolve().parents[2] / "workers"
+
+HOUR = 3600.0
+
+DESCRIPTIONS = (
+    "On {date} we detected that approximately {n} customer records, including email addresses and hashed "
+    "passwords, were exposed from a misconfigured S3 bucket. Customers in the UK and US are affected.",
+    "Our payment service has been down since {date}; about {n} merchants cannot take card payments. "
+    "We are investigating a possible ransomware attack on a vendor.",
+    "A phishing campaign compromised {n} employee accounts on {date}; access to the CRM was revoked.",
+)
+MENTION_WORDS = ("is", "the", "site", "down", "again", "my", "account", "support", "update", "status",
+                 "customers", "waiting", "refund", "payment", "app", "login", "slow", "today", "anyone")
+RUMOR_WORDS = ("leak", "hacked", "breach", "stolen", "lawsuit")
+SOURCES = ("twitter", "x.com", "reddit", "news", "facebook")
+
+
+class Stage:
+    """One task an incident needs, with its timestamps (wall clock, seconds)."""
+
+    __slots__ = ("incident", "name", "queue", "requested", "dispatched", "started", "finished", "ok", "retries")
+
+    def __init__(self, incident: "Incident", name: str, queue_name: str):
+        self.incident = incident
+        self.name = name
+        self.queue = queue_name
+        self.requested = time.time()
+        self.dispatched = self.started = self.finished = 0.0
+        self.ok = False
+        self.retries = 0
+
+
+class Incident:
+    __slots__ = ("id", "org", "severity", "created", "statement_ready", "remaining", "data")
+
+    def __init__(self, incident_id: str, org: str, severity: str, data: Dict[str, Any], stages: int):
+        self.id = incident_id
+        self.org = org
+        self.severity = severity
+        self.created = time.time()
+        self.statement_ready = 0.0
+        self.remaining = stages
+        self.data = data
+
+
+class WorkerPool:
+    """Broker queue stand-in: a FIFO drained by ``size`` worker processes."""
+
+    def __init__(self, name: str, size: int, storage: Path, on_reply):
+        self.name = name
+        self.fifo: "queue.Queue[Optional[Tuple[Any, float]]]" = queue.Queue()
+        self.busy = 0.0
+        self.on_reply = on_reply
+        self.procs: List[subprocess.Popen] = []
+        self.threads: List[threading.Thread] = []
+        for _ in range(size):
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.storm_worker", "--queue", name, "--storage-dir", str(storage)],
+                cwd=WORKERS_DIR, env={**os.environ, "PYTHONPATH": str(WORKERS_DIR)},
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+            )
+            if not json.loads(proc.stdout.readline() or "{}").get("ready"):
+                raise RuntimeError(f"worker for {name} did not start (run it directly to see why)")
+            self.procs.append(proc)
+            thread = threading.Thread(target=self._drain, args=(proc,), daemon=True, name=f"storm-{name}")
+            thread.start()
+            self.threads.append(thread)
+
+    def put(self, job) -> None:
+        self.fifo.put((job, time.time()))
+
+    def depth(self) -> int:
+        return self.fifo.qsize()
+
+    def _drain(self, proc: subprocess.Popen) -> None:
+        while True:
+            item = self.fifo.get()
+            if item is None:
+                return
+            job, dispatched = item
+            proc.stdin.write(json.dumps({"id": job.id, "task": job.task, "args": job.args, "kwargs": job.kwargs}) + "\n")
+            reply = json.loads(proc.stdout.readline())
+            self.busy += reply["finished"] - reply["started"]
+            self.on_reply(job, dispatched, reply)
+
+    def close(self) -> None:
+        for _ in self.procs:
+            self.fifo.put(None)
+        for thread in self.threads:
+            thread.join(timeout=30)
+        for proc in self.procs:
+            proc.stdin.close()
+            proc.wait(timeout=30)
+
+
+class Storm:
+    """Drives incidents through the API and the scheduler, and keeps the books."""
+
+    def __init__(self, client: TestClient, scheduler, pools: Dict[str, WorkerPool], args: argparse.Namespace):
+        self.client = client
+        self.scheduler = scheduler
+        self.pools = pools
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.RLock()
+        self.jobs: Dict[str, Stage] = {}
+        self.stages: List[Stage] = []
+        self.incidents: List[Incident] = []
+        self.rejected = 0
+        self.stage_count = 5 + args.mention_batches  # intake, plan, statement, lint, export, mentions
+
+    # -- submission --------------------------------------------------------
+
+    def create(self) -> None:
+        severity = self.rng.choices(list(self.args.severity_mix), weights=list(self.args.severity_mix.values()))[0]
+        org = f"org-{self.rng.randrange(self.args.orgs)}"
+        response = self.client.post("/api/v1/incidents/", json={"title": "Storm incident", "type": "data_breach", "severity": severity})
+        incident_id = response.json()["id"]
+        description = self.rng.choice(DESCRIPTIONS).format(date="March 3rd, 2024", n=f"{self.rng.randrange(1, 500) * 100:,}")
+        intake = {"title": f"Incident {len(self.incidents)}", "description": description, "severity": severity,
+                  "affected_users": 0, "data_types": [], "jurisdictions": self.rng.sample(["gb", "us", "de", "fr"], 2)}
+        incident = Incident(incident_id, org, severity, {"id": incident_id, **intake}, self.stage_count)
+        with self.lock:
+            self.incidents.append(incident)
+        self._intake(Stage(incident, "intake", "interactive"), intake)
+
+    def _intake(self, stage: Stage, intake: Dict[str, Any]) -> None:
+        incident = stage.incident
+        with self.lock:
+            response = self.client.post(f"/api/v1/incidents/{incident.id}/intake", json=intake, headers={"X-Org-Id": incident.org})
+            if response.status_code == 429:
+                self._retry(stage, float(response.headers.get("Retry-After", 1)), self._intake, stage, intake)
+                return
+            response.raise_for_status()
+            self._track(stage, response.json()["job_id"])
+
+    def _submit(self, stage: Stage, task: str, args: List[Any]) -> None:
+        from app.core.scheduling import RateLimited
+
+        incident = stage.incident
+        with self.lock:
+            try:
+                job = self.scheduler.submit(incident.org, task, args=args, queue=stage.queue, severity=incident.severity)
+            except RateLimited as e:
+                self._retry(stage, e.retry_after, self._submit, stage, task, args)
+                return
+            self._track(stage, job.id)
+
+    def _track(self, stage: Stage, job_id: str) -> None:
+        self.jobs[job_id] = stage
+        self.stages.append(stage)
+
+    def _retry(self, stage: Stage, delay: float, fn, *fn_args) -> None:
+        self.rejected += 1
+        stage.retries += 1
+        timer = threading.Timer(max(delay, 0.01), fn, fn_args)
+        timer.daemon = True
+        timer.start()
+
+    def _mentions(self, incident: Incident, batch: int) -> None:
+        feed = []
+        for i in range(self.args.batch_size):
+            words = self.rng.choices(MENTION_WORDS, k=12)
+            if self.rng.random() < 0.15:
+                words.insert(self.rng.randrange(12), self.rng.choice(RUMOR_WORDS))
+            text = " ".join(words)
+            if feed and self.rng.random() < 0.2:
+                text = "RT " + feed[-1]["text"]  # reposts, for dedup
+            feed.append({"text": text, "source": self.rng.choice(SOURCES)})
+        self._submit(Stage(incident, "mentions", "monitor"), "monitor_ingest_mentions", [incident.id, feed])
+        if batch + 1 < self.args.mention_batches:
+            timer = threading.Timer(self.args.mention_every, self._mentions, (incident, batch + 1))
+            timer.daemon = True
+            timer.start()
+
+    # -- replies -----------------------------------------------------------
+
+    def on_reply(self, job, dispatched: float, reply: Dict[str, Any]) -> None:
+        with self.lock:
+            stage = self.jobs.pop(job.id, None)
+            if stage is None:
+                return
+            stage.dispatched, stage.started, stage.finished = dispatched, reply["started"], reply["finished"]
+            stage.ok = reply["ok"]
+            incident = stage.incident
+            incident.remaining -= 1
+            result = reply.get("result") or {}
+            if stage.name == "intake":
+                data = {**incident.data, **result, "severity": incident.severity}
+                self._submit(Stage(incident, "plan", "interactive"), "app.tasks.plan_builder.build_plan", [data])
+                content_request = {
+                    "incident_id": incident.id,
+                    "content_type": "holding_statement",
+                    "incident_facts": {"incident_type": "data breach", "facts": result.get("facts", [])},
+                    "severity": incident.severity,
+                    "target_audience": ["customers"],
+                }
+                self._submit(Stage(incident, "holding_statement", "interactive"), "generate_holding_statement", [content_request])
+                self._mentions(incident, 0)
+            elif stage.name == "holding_statement":
+                lint = {"incident_id": incident.id, "artifact_id": f"{incident.id}-hs", "content": result.get("content", ""),
+                        "jurisdiction": "UK"}
+                self._submit(Stage(incident, "legal_lint", "interactive"), "legal_lint_content", [lint])
+                incident.data["statement"] = result.get("content", "")
+            elif stage.name == "legal_lint":
+                incident.statement_ready = stage.finished
+                export = {"incident_id": incident.id, "export_type": "zip", "filename": f"{incident.id}-packet",
+                          "content": incident.data.get("statement", "")}
+                self._submit(Stage(incident, "export", "exports"), "export_generate", [export])
+            if not stage.ok:
+                # Later stages never come; count them as done (and failed) so the run can drain
+                incident.remaining -= {"intake": self.stage_count - 1, "holding_statement": 2, "legal_lint": 1}.get(stage.name, 0)
+
+    # -- one rate ------------------------------------------------------------
+
+    def run(self, rate: float) -> Dict[str, Any]:
+        with self.lock:
+            self.jobs.clear()
+            self.stages, self.incidents, self.rejected = [], [], 0
+        for pool in self.pools.values():
+            pool.busy = 0.0
+        peaks: Dict[str, List[int]] = defaultdict(lambda: [0, 0])  # queue -> [scheduler lanes, broker]
+        sampling = threading.Event()
+
+        def sample() -> None:
+            from app.core.scheduling import PRIORITIES, _lane
+
+            while not sampling.wait(0.05):
+                for name, pool in self.pools.items():
+                    lanes = sum(sum(self.scheduler.backend.depths(_lane(name, p)).values()) for p in PRIORITIES)
+                    peaks[name][0] = max(peaks[name][0], lanes)
+                    peaks[name][1] = max(peaks[name][1], pool.depth())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.time()
+        next_at = started
+        while next_at < started + self.args.duration:
+            time.sleep(max(0.0, next_at - time.time()))
+            self.create()
+            next_at += self.rng.expovariate(rate)
+        arrivals_done = time.time()
+        arrived = len(self.incidents) / (arrivals_done - started)
+        while time.time() < arrivals_done + self.args.drain:
+            with self.lock:
+                if all(i.remaining <= 0 for i in self.incidents):
+                    break
+            time.sleep(0.05)
+        elapsed = time.time() - started
+        sampling.set()
+        sampler.join()
+        return self.report(rate, arrived, elapsed, peaks)
+
+    def report(self, rate: float, arrived: float, elapsed: float, peaks: Dict[str, List[int]]) -> Dict[str, Any]:
+        deadline = HOUR / self.args.time_scale
+        with self.lock:
+            incidents, stages = list(self.incidents), [s for s in self.stages if s.finished]
+            unfinished = sum(1 for s in self.stages if not s.finished)
+        met = [i for i in incidents if i.statement_ready and i.statement_ready - i.created <= deadline]
+        statement = [i.statement_ready - i.created for i in incidents if i.statement_ready]
+        by_stage: Dict[str, Dict[str, Any]] = {}
+        for name in ("intake", "plan", "holding_statement", "legal_lint", "export", "mentions"):
+            done = [s for s in stages if s.name == name]
+            if not done:
+                continue
+            waits = np.array([[s.dispatched - s.requested, s.started - s.dispatched, s.finished - s.started] for s in done]) * 1000
+            by_stage[name] = {
+                "done": len(done),
+                "failed": sum(1 for s in done if not s.ok),
+                "scheduler_wait_ms": _percentiles(waits[:, 0]),
+                "broker_wait_ms": _percentiles(waits[:, 1]),
+                "run_ms": _percentiles(waits[:, 2]),
+            }
+        queues = {
+            name: {
+                "workers": len(pool.procs),
+                "peak_scheduler_depth": peaks[name][0],
+                "peak_broker_depth": peaks[name][1],
+                "utilization": round(pool.busy / (len(pool.procs) * elapsed), 3),
+            }
+            for name, pool in self.pools.items()
+        }
+        return {
+            "rate_per_s": rate,
+            "arrivals_per_s": round(arrived, 2),
+            "incidents": len(incidents),
+            "completed": sum(1 for i in incidents if i.remaining <= 0),
+            "unfinished_stages": unfinished,
+            "rate_limited_retries": self.rejected,
+            "sla_deadline_s": round(deadline, 2),
+            "sla_attainment": round(len(met) / len(incidents), 4) if incidents else None,
+            "statement_ready_s": _percentiles(np.array(statement), digits=3) if statement else None,
+            "stages": by_stage,
+            "queues": queues,
+        }
+
+
+def _percentiles(values: np.ndarray, digits: int = 1) -> Dict[str, float]:
+    return {"p50": round(float(np.percentile(values, 50)), digits), "p95": round(float(np.percentile(values, 95)), digits),
+            "max": round(float(values.max()), digits)}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    statement = report["statement_ready_s"] or {}
+    print(f"\n== {report['rate_per_s']:g} incidents/s ({report['arrivals_per_s']:g} achieved): {report['incidents']} incidents, {report['completed']} completed, "
+          f"{report['rate_limited_retries']} rate-limited retries")
+    print(f"   holding statement SLA (T+1h = {report['sla_deadline_s']}s): {(report['sla_attainment'] or 0) * 100:.1f}% met, "
+          f"ready p50={statement.get('p50', 0):.2f}s p95={statement.get('p95', 0):.2f}s")
+    print(f"   {'stage':18s} {'done':>6s} {'fail':>5s} {'sched wait p50/p95':>20s} {'broker wait p50/p95':>21s} {'run p50/p95':>15s}  (ms)")
+    for name, s in report["stages"].items():
+        print(f"   {name:18s} {s['done']:6d} {s['failed']:5d} "
+              f"{s['scheduler_wait_ms']['p50']:9.1f}/{s['scheduler_wait_ms']['p95']:<10.1f} "
+              f"{s['broker_wait_ms']['p50']:9.1f}/{s['broker_wait_ms']['p95']:<11.1f} "
+              f"{s['run_ms']['p50']:6.1f}/{s['run_ms']['p95']:<8.1f}")
+    for name, q in report["queues"].items():
+        print(f"   queue {name:12s} workers={q['workers']} utilization={q['utilization']:.2f} "
+              f"peak depth: scheduler={q['peak_scheduler_depth']} broker={q['peak_broker_depth']}")
+
+
+def _mapping(value: str, cast) -> Dict[str, Any]:
+    return {key: cast(val) for key, val in (item.split("=") for item in value.split(","))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", default="2,5,10,20", help="incidents per second, one run each")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of arrivals per rate")
+    parser.add_argument("--drain", type=float, default=30.0, help="max seconds to let work finish after arrivals stop")
+    parser.add_argument("--severity-mix", default="critical=0.2,high=0.5,medium=0.3")
+    parser.add_argument("--orgs", type=int, default=50)
+    parser.add_argument("--workers", default="interactive=2,monitor=1,exports=1", help="worker processes per queue")
+    parser.add_argument("--mention-batches", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--mention-every", type=float, default=1.0, help="seconds between an incident's mention batches")
+    parser.add_argument("--time-scale", type=float, default=600.0, help="simulated seconds per wall second (T+1h = 6s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+    args.severity_mix = _mapping(args.severity_mix, float)
+
+    # Local stand-ins for Redis: in-process scheduler lanes and realtime hub
+    os.environ.setdefault("SCHEDULER_BACKEND", "memory")
+    os.environ.setdefault("REALTIME_BACKEND", "memory")
+    from app.core import scheduling
+    from app.core.logging import setup_logging
+    from main import app
+
+    setup_logging(level="WARNING")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    storage = Path(tempfile.mkdtemp(prefix="storm-exports-"))
+    pools: Dict[str, WorkerPool] = {}
+    storm: Optional[Storm] = None
+
+    def on_reply(job, dispatched: float, reply: Dict[str, Any]) -> None:
+        storm.on_reply(job, dispatched, reply)
+
+    def send(job) -> None:
+        pools[job.queue].put(job)
+
+    print(f"starting workers {args.workers}", file=sys.stderr)
+    for name, size in _mapping(args.workers, int).items():
+        pools[name] = WorkerPool(name, size, storage, on_reply)
+    scheduling._scheduler = scheduling.FairScheduler(scheduling.MemorySchedulerBackend(), send, broker_depth=lambda q: pools[q].depth() if q in pools else 0)
+
+    reports = []
+    try:
+        with TestClient(app) as client:
+            storm = Storm(client, scheduling._scheduler, pools, args)
+            for rate in (float(r) for r in args.rates.split(",")):
+                reports.append(storm.run(rate))
+                print_report(reports[-1])
+    finally:
+        for pool in pools.values():
+            pool.close()
+        shutil.rmtree(storage, ignore_errors=True)
+    if args.output:
+        args.output.write_text(json.dumps(reports, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,16 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import uvicorn
+import asyncio
 from contextlib import asynccontextmanager
 import structlog
 
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.logging import setup_logging
+from app.core.realtime import get_hub
+from app.core.scheduling import get_scheduler
+from app.core.telemetry import TelemetryMiddleware, configure_tracing, metrics_endpoint
 
 logger = structlog.get_logger()
 
@@ -16,12 +19,18 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Crisis Crew Orchestrator")
+    dispatcher = asyncio.create_task(get_scheduler().run())
+    broadcaster = asyncio.create_task(get_hub().run())
     yield
     # Shutdown
+    dispatcher.cancel()
+    broadcaster.cancel()
+    await get_hub().backend.close()
     logger.info("Shutting down Crisis Crew Orchestrator")
 
 def create_application() -> FastAPI:
     setup_logging()
+    configure_tracing()
     
     app = FastAPI(
         title="Crisis Management Crew Orchestrator",
@@ -45,9 +54,14 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Route latency histograms and request spans
+    app.add_middleware(TelemetryMiddleware)
+
     # Include API router
     app.include_router(api_router, prefix="/api/v1")
 
+    app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
     @app.get("/health")
     async def health_check():
         return {"status": "healthy", "service": "orchestrator"}
@@ -57,8 +71,13 @@ def create_application() -> FastAPI:
 app = create_application()
 
 if __name__ == "__main__":
+    # Only needed to serve from here; an ASGI server importing main:app has its own
+    import uvicorn
+
+    # The app built above is served as is; an import string would build it a second
+    # time in a fresh "main" module, which reload needs
     uvicorn.run(
-        "main:app",
+        "main:app" if settings.DEBUG else app,
         host="0.0.0.0",
         port=int(settings.ORCHESTRATOR_PORT),
         reload=settings.DEBUG,
@@ -0,0 +1,582 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Append-only, hash-chained audit log with group commit.
+
+Approvals, redlines and exports call ``audit()``, which queues the event and
+returns. A writer thread commits everything queued since its last commit as
+one batch: one transaction against ``audit_log`` (Postgres) or one append and
+fsync to a segment file. The hot paths pay neither the round trip nor the
+fsync. A caller that must not continue before its event is durable passes
+``wait=True`` and shares the commit of the batch it lands in.
+
+Every record stores ``hash = sha256(canonical record including prev_hash)``,
+so ``verify_chain`` checks a whole log in one streaming pass and reports the
+first record that was altered, removed or reordered. Sequence numbers and
+hashes are assigned inside the backend's commit lock, so several processes
+can share one chain.
+"""
+import atexit
+import bisect
+import fcntl
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+import structlog
+from prometheus_client import Counter, Histogram
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+GENESIS = "0" * 64
+TS_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+PG_LOCK_KEY = 0x617564  # pg_advisory_xact_lock key serializing chain appends
+ID_FIELDS = ("incident_id", "org_id", "user_id")  # UUID columns of ``audit_log``
+
+AUDIT_RECORDS = Counter("audit_records_total", "Audit records committed")
+AUDIT_BATCH = Histogram(
+    "audit_batch_size",
+    "Records per group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+AUDIT_DEAD_LETTERS = Counter("audit_dead_letters_total", "Audit records the backend rejected as invalid")
+AUDIT_COMMIT = Histogram(
+    "audit_commit_seconds",
+    "Time to durably commit one batch",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+
+class AuditError(Exception):
+    """An audit event could not be accepted or committed."""
+
+
+def _ts(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime(TS_FORMAT)
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.strptime(value, TS_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class AuditRecord:
+    """One audit event; ``seq``, ``prev_hash`` and ``hash`` are set at commit."""
+
+    __slots__ = ("seq", "org_id", "user_id", "incident_id", "action", "target", "meta", "created_at", "prev_hash", "hash")
+
+    def __init__(
+        self,
+        action: str,
+        target: str,
+        incident_id: Optional[str] = None,
+        org_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        created_at: Optional[datetime] = None,
+        seq: int = 0,
+        prev_hash: str = "",
+        hash: str = "",
+    ):
+        self.action = action
+        self.target = target
+        self.incident_id = incident_id
+        self.org_id = org_id
+        self.user_id = user_id
+        self.meta = meta
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.seq = seq
+        self.prev_hash = prev_hash
+        self.hash = hash
+
+    def body(self) -> Dict[str, Any]:
+        """The hashed fields, in a form every backend round-trips exactly."""
+        return {
+            "seq": self.seq,
+            "org_id": self.org_id,
+            "user_id": self.user_id,
+            "incident_id": self.incident_id,
+            "action": self.action,
+            "target": self.target,
+            "meta": self.meta,
+            "created_at": _ts(self.created_at),
+            "prev_hash": self.prev_hash,
+        }
+
+    def digest(self) -> str:
+        return hashlib.sha256(orjson.dumps(self.body(), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def seal(self, seq: int, prev_hash: str) -> str:
+        """Link the record after ``prev_hash``; returns its own hash."""
+        if self.meta is not None:
+            # Stored as JSON: hash what reads will return (e.g. datetimes as strings)
+            self.meta = orjson.loads(orjson.dumps(self.meta, default=str, option=orjson.OPT_NON_STR_KEYS))
+        self.seq = seq
+        self.prev_hash = prev_hash
+        self.hash = self.digest()
+        return self.hash
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.body()
+        data["hash"] = self.hash
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AuditRecord":
+        return cls(
+            action=data["action"],
+            target=data["target"],
+            incident_id=data.get("incident_id"),
+            org_id=data.get("org_id"),
+            user_id=data.get("user_id"),
+            meta=data.get("meta"),
+            created_at=_parse_ts(data["created_at"]),
+            seq=data["seq"],
+            prev_hash=data["prev_hash"],
+            hash=data["hash"],
+        )
+
+
+class VerifyResult(BaseModel):
+    ok: bool
+    checked: int
+    head_seq: int
+    head_hash: str
+    first_bad_seq: Optional[int] = None
+    reason: Optional[str] = None
+
+
+def verify_chain(records: Iterator[AuditRecord], after_seq: int = 0, after_hash: str = GENESIS) -> VerifyResult:
+    """Check links and hashes in one pass over records in ``seq`` order.
+
+    Start from a previously verified ``(after_seq, after_hash)`` checkpoint to
+    verify only what was appended since.
+    """
+    seq, head, checked = after_seq, after_hash, 0
+    for record in records:
+        reason = None
+        if record.seq != seq + 1:
+            reason = f"expected seq {seq + 1}, found {record.seq}"
+        elif record.prev_hash != head:
+            reason = "prev_hash does not match the preceding record"
+        elif record.digest() != record.hash:
+            reason = "hash does not match record contents"
+        if reason:
+            return VerifyResult(ok=False, checked=checked, head_seq=seq, head_hash=head, first_bad_seq=seq + 1, reason=reason)
+        seq, head, checked = record.seq, record.hash, checked + 1
+    return VerifyResult(ok=True, checked=checked, head_seq=seq, head_hash=head)
+
+
+class SegmentAuditBackend:
+    """JSON-lines segment files, one append and fsync per batch.
+
+    Segments are named by their first sequence number and rolled at
+    ``segment_bytes``. An ``flock`` on ``.lock`` serializes appends across
+    processes; a torn tail left by a crash is never acknowledged, so it is
+    truncated by the next writer. The incident/time index is derived from the
+    log itself, built lazily on the first lookup and extended incrementally.
+    """
+
+    transient: Tuple[type, ...] = (OSError,)
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock_fd = os.open(self.directory / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._head: Tuple[Optional[str], int, int, str] = (None, -1, 0, GENESIS)  # segment, size, seq, hash
+        self._index: Dict[str, List[Tuple[datetime, int, str, int, int]]] = {}  # incident -> (ts, seq, segment, offset, length)
+        self._indexed: Dict[str, int] = {}  # segment -> bytes indexed
+        self._index_lock = threading.Lock()
+
+    def _segments(self) -> List[str]:
+        return sorted(p.name for p in self.directory.glob("*.log"))
+
+    def _read_head(self, segment: str) -> Tuple[int, int, str]:
+        """Size, seq and hash of the last complete record; truncates a torn tail."""
+        with open(self.directory / segment, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            window = 4096
+            while True:
+                base = max(0, size - window)
+                f.seek(base)
+                tail = f.read()
+                end = tail.rfind(b"\n")
+                start = tail.rfind(b"\n", 0, max(end, 0)) + 1
+                if base and (end == -1 or start == 0):
+                    window *= 4  # last record is longer than the window
+                    continue
+                complete = base + end + 1
+                if complete != size:
+                    logger.warning("Truncating torn audit segment tail", segment=segment, bytes=size - complete)
+                    f.truncate(complete)
+                if end == -1:
+                    return 0, 0, GENESIS
+                last = orjson.loads(tail[start:end])
+                return complete, last["seq"], last["hash"]
+
+    def commit(self, records: List[AuditRecord]) -> None:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            segments = self._segments()
+            segment, size, seq, digest = self._head
+            if not segments or segments[-1] != segment or (self.directory / segment).stat().st_size != size:
+                # Another process appended (or first commit here): reload the head
+                segment = segments[-1] if segments else None
+                if segment is None:
+                    size, seq, digest = 0, 0, GENESIS
+                else:
+                    size, seq, digest = self._read_head(segment)
+                    if seq == 0 and len(segments) > 1:
+                        _, seq, digest = self._read_head(segments[-2])
+            lines = []
+            for record in records:
+                seq += 1
+                digest = record.seal(seq, digest)
+                lines.append(orjson.dumps(record.to_dict()) + b"\n")
+            data = b"".join(lines)
+            if segment is None or (size and size + len(data) > self.segment_bytes):
+                segment, size = f"{records[0].seq:012d}.log", 0
+            fd = os.open(self.directory / segment, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            if size == 0 and self.fsync:
+                dir_fd = os.open(self.directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            self._head = (segment, size + len(data), seq, digest)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def scan(self, after_seq: int = 0) -> Iterator[AuditRecord]:
+        segments = self._segments()
+        for i, segment in enumerate(segments):
+            if i + 1 < len(segments) and int(segments[i + 1][:-4]) <= after_seq + 1:
+                continue
+            with open(self.directory / segment, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        return  # torn tail, not yet truncated by a writer
+                    record = AuditRecord.from_dict(orjson.loads(line))
+                    if record.seq > after_seq:
+                        yield record
+
+    def _refresh_index(self) -> None:
+        for segment in self._segments():
+            start = self._indexed.get(segment, 0)
+            with open(self.directory / segment, "rb") as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    data = orjson.loads(line)
+                    if data.get("incident_id"):
+                        entries = self._index.setdefault(data["incident_id"], [])
+                        entry = (_parse_ts(data["created_at"]), data["seq"], segment, offset, len(line))
+                        if entries and entry < entries[-1]:
+                            bisect.insort(entries, entry)  # other writers' clocks interleave
+                        else:
+                            entries.append(entry)
+                    offset += len(line)
+            self._indexed[segment] = offset
+
+    def query(self, incident_id: str, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 1000) -> List[AuditRecord]:
+        with self._index_lock:
+            self._refresh_index()
+            entries = self._index.get(incident_id, [])
+            lo = bisect.bisect_left(entries, (since,)) if since else 0
+            hi = bisect.bisect_left(entries, (until,)) if until else len(entries)
+            selected = entries[lo:min(hi, lo + limit)]
+        records = []
+        handles: Dict[str, Any] = {}
+        try:
+            for _, _, segment, offset, length in selected:
+                if segment not in handles:
+                    handles[segment] = open(self.directory / segment, "rb")
+                f = handles[segment]
+                f.seek(offset)
+                records.append(AuditRecord.from_dict(orjson.loads(f.read(length))))
+        finally:
+            for f in handles.values():
+                f.close()
+        return records
+
+    def close(self) -> None:
+        os.close(self._lock_fd)
+
+
+class PostgresAuditBackend:
+    """Batched inserts into ``audit_log``, one transaction per batch.
+
+    A transaction-scoped advisory lock serializes appends, so the chain head
+    read at the start of the batch is still the head when it commits.
+    """
+
+    def __init__(self, dsn: str):
+        import psycopg2
+        import psycopg2.extras
+
+        self._psycopg2 = psycopg2
+        self._extras = psycopg2.extras
+        self.transient = (psycopg2.OperationalError, psycopg2.InterfaceError, OSError)
+        self.dsn = dsn
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = self._psycopg2.connect(self.dsn)
+        return self.conn
+
+    def _json(self, meta: Optional[Dict[str, Any]]):
+        return None if meta is None else self._extras.Json(meta, dumps=lambda o: orjson.dumps(o).decode("utf-8"))
+
+    def commit(self, records: List[AuditRecord]) -> None:
+        conn = self._connect()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (PG_LOCK_KEY,))
+                cur.execute("SELECT id, hash FROM audit_log ORDER BY id DESC LIMIT 1")
+                row = cur.fetchone()
+                seq, digest = (row[0], row[1]) if row else (0, GENESIS)
+                rows = []
+                for record in records:
+                    seq += 1
+                    digest = record.seal(seq, digest)
+                    rows.append((record.seq, record.org_id, record.user_id, record.incident_id, record.action,
+                                 record.target, self._json(record.meta), record.created_at, record.prev_hash, record.hash))
+                self._extras.execute_values(
+                    cur,
+                    "INSERT INTO audit_log (id, org_id, user_id, incident_id, action, target, meta, created_at, prev_hash, hash) VALUES %s",
+                    rows,
+                    page_size=len(rows),
+                )
+        except self._psycopg2.OperationalError:
+            self.conn.close()
+            raise
+
+    def _records(self, cur) -> Iterator[AuditRecord]:
+        for row in cur:
+            yield AuditRecord(
+                seq=row[0], org_id=row[1] and str(row[1]), user_id=row[2] and str(row[2]),
+                incident_id=row[3] and str(row[3]), action=row[4], target=row[5], meta=row[6],
+                created_at=row[7], prev_hash=row[8], hash=row[9],
+            )
+
+    _COLUMNS = "id, org_id, user_id, incident_id, action, target, meta, created_at, prev_hash, hash"
+
+    def scan(self, after_seq: int = 0) -> Iterator[AuditRecord]:
+        conn = self._psycopg2.connect(self.dsn)
+        try:
+            with conn, conn.cursor(name="audit_scan") as cur:
+                cur.itersize = 5000
+                cur.execute(f"SELECT {self._COLUMNS} FROM audit_log WHERE id > %s ORDER BY id", (after_seq,))
+                yield from self._records(cur)
+        finally:
+            conn.close()
+
+    def query(self, incident_id: str, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 1000) -> List[AuditRecord]:
+        where, params = ["incident_id = %s"], [incident_id]
+        if since:
+            where.append("created_at >= %s")
+            params.append(since)
+        if until:
+            where.append("created_at < %s")
+            params.append(until)
+        conn = self._connect()
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {self._COLUMNS} FROM audit_log WHERE {' AND '.join(where)} ORDER BY created_at, id LIMIT %s",
+                (*params, limit),
+            )
+            return list(self._records(cur))
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+
+
+class AuditLog:
+    """Queue in front of a backend, drained by one group-committing writer thread.
+
+    Events are never dropped: when the queue is full ``record`` blocks up to
+    ``AUDIT_ENQUEUE_TIMEOUT_SECONDS`` and then raises, and a commit that fails
+    on the backend's transient errors (connection, I/O) is retried with
+    backoff until the backend comes back. Any other failure is a bad record:
+    the batch is split until the record is isolated, the rest is committed and
+    the record is dead-lettered (logged in full, ``audit_dead_letters_total``)
+    rather than blocking the writer. The writer restarts in forked children
+    (Celery prefork).
+    """
+
+    def __init__(self, backend, batch_size: int = 512, linger_ms: float = 0.0, maxsize: int = 100000):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        self.maxsize = maxsize
+        self._start()
+        os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.flush, 5.0)
+
+    def _start(self) -> None:
+        self._queue: "queue.Queue[Tuple[Optional[AuditRecord], Optional[Future]]]" = queue.Queue(maxsize=self.maxsize)
+        self._thread = threading.Thread(target=self._drain, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        action: str,
+        target: str,
+        incident_id: Optional[str] = None,
+        org_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        wait: bool = False,
+    ) -> AuditRecord:
+        """Queue an event; with ``wait`` return only once it is durable."""
+        record = AuditRecord(action, target, incident_id=incident_id, org_id=org_id, user_id=user_id, meta=meta)
+        future: Optional[Future] = Future() if wait else None
+        try:
+            self._queue.put((record, future), timeout=settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS)
+        except queue.Full:
+            raise AuditError("Audit queue is full; the backend is not keeping up")
+        if future is not None:
+            try:
+                future.result(timeout=settings.AUDIT_COMMIT_TIMEOUT_SECONDS)
+            except TimeoutError:
+                raise AuditError("Audit event queued but not committed in time")
+        return record
+
+    def _batch(self) -> List[Tuple[Optional[AuditRecord], Optional[Future]]]:
+        """Whatever is queued, lingering for more unless someone is waiting on it."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        waiting = batch[0][1] is not None
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                waiting = waiting or batch[-1][1] is not None
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if waiting or remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                    waiting = batch[-1][1] is not None
+                except queue.Empty:
+                    break
+        return batch
+
+    def _commit(self, records: List[AuditRecord]) -> List[AuditRecord]:
+        """Commit ``records``, retrying transient failures; returns the records dead-lettered."""
+        backoff = 0.1
+        while True:
+            try:
+                self.backend.commit(records)
+                return []
+            except self.backend.transient as e:
+                logger.warning("Audit commit failed, retrying", records=len(records), error=str(e))
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            except Exception as e:
+                if len(records) > 1:
+                    mid = len(records) // 2
+                    return self._commit(records[:mid]) + self._commit(records[mid:])
+                logger.error("Audit record rejected, dead-lettered", error=str(e), record=records[0].to_dict())
+                AUDIT_DEAD_LETTERS.inc()
+                return records
+
+    def _drain(self) -> None:
+        while True:
+            batch = self._batch()
+            records = [record for record, _ in batch if record is not None]
+            if records:
+                started = time.perf_counter()
+                rejected = self._commit(records)
+                AUDIT_COMMIT.observe(time.perf_counter() - started)
+                AUDIT_BATCH.observe(len(records))
+                AUDIT_RECORDS.inc(len(records) - len(rejected))
+            else:
+                rejected = []
+            for record, future in batch:
+                if future is None:
+                    continue
+                if any(record is bad for bad in rejected):
+                    future.set_exception(AuditError("Audit event rejected by the backend"))
+                else:
+                    future.set_result(None)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is committed; False on timeout."""
+        if not self._thread.is_alive():
+            return False
+        marker: Future = Future()
+        try:
+            self._queue.put((None, marker), timeout=timeout)
+            marker.result(timeout=timeout)
+            return True
+        except (queue.Full, TimeoutError):
+            return False
+
+    def verify(self, after_seq: int = 0, after_hash: str = GENESIS) -> VerifyResult:
+        return verify_chain(self.backend.scan(after_seq), after_seq, after_hash)
+
+    def query(self, incident_id: str, since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 1000) -> List[AuditRecord]:
+        return self.backend.query(incident_id, since, until, limit)
+
+
+_log: Optional[AuditLog] = None
+
+
+def make_backend():
+    if settings.AUDIT_BACKEND == "segment":
+        return SegmentAuditBackend(settings.AUDIT_DIR, settings.AUDIT_SEGMENT_BYTES, settings.AUDIT_FSYNC)
+    return PostgresAuditBackend(settings.DATABASE_URL)
+
+
+def get_audit_log() -> AuditLog:
+    global _log
+    if _log is None:
+        _log = AuditLog(make_backend(), settings.AUDIT_BATCH_SIZE, settings.AUDIT_LINGER_MS, settings.AUDIT_QUEUE_SIZE)
+    return _log
+
+
+def _normalize_ids(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Move ids that are not UUIDs (the ``audit_log`` column type) into ``meta``."""
+    invalid = {}
+    for name in ID_FIELDS:
+        value = fields.get(name)
+        if value is None:
+            continue
+        try:
+            fields[name] = str(uuid.UUID(str(value)))
+        except ValueError:
+            invalid[name] = fields.pop(name)
+    if invalid:
+        fields["meta"] = {**(fields.get("meta") or {}), "refs": invalid}
+    return fields
+
+
+def audit(action: str, target: str, **fields: Any) -> Optional[AuditRecord]:
+    """Record an audit event (``incident_id``, ``org_id``, ``user_id``, ``meta``, ``wait``).
+
+    Ids that are not UUIDs are recorded under ``meta["refs"]`` instead.
+    """
+    if not settings.AUDIT_ENABLED:
+        return None
+    return get_audit_log().record(action, target, **_normalize_ids(fields))
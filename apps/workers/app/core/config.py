@@ -1,6 +1,6 @@
 # Created automatically by Cursor AI (2024-12-19)
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # Application
@@ -31,8 +31,128 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = None
     CREWAI_API_KEY: Optional[str] = None
     
+    # LLM client (app/services/llm.py); point the base URLs at benchmarks/llm_stub.py offline
+    LLM_PROVIDER: str = "openai"  # openai | anthropic
+    LLM_MODEL: Optional[str] = None  # provider default when unset
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    ANTHROPIC_BASE_URL: str = "https://api.anthropic.com/v1"
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight requests per provider and process
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_HEDGE_AFTER_MS: float = 0  # 0 = provider's rolling p95, negative disables hedging
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_SIZE: int = 1024
+    LLM_CACHE_REDIS: bool = False
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    
+    # Bulk intake (app/tasks/bulk_intake.py): chunks of an import, persisted in one transaction each
+    BULK_INTAKE_PERSIST: bool = True
+    
+    # SLA timers
+    SLA_BACKEND: str = "redis"  # redis | memory (single process only)
+    SLA_TICK_SECONDS: float = 5.0
+    SLA_WARNING_LEAD_MINUTES: int = 15
+    
+    # Approval routing (app/services/approvals.py)
+    APPROVAL_POLICY_PATH: Optional[str] = None  # policy JSON, bundled default when unset
+    APPROVAL_PERSIST: bool = True  # routes in Redis, shared by every worker; off = in-process only (single process)
+    
+    # Social pack (app/services/social.py)
+    SOCIAL_REPLY_LIBRARY_PATH: Optional[str] = None  # approved reply library JSON, bundled default when unset
+    SOCIAL_REPLIES_PER_RUMOR: int = 3
+    SOCIAL_REPLY_MIN_SCORE: float = 1.0
+    SOCIAL_CADENCE_UPDATES: int = 6
+    
+    # Artifact revisions (app/services/revisions.py)
+    REVISION_SNAPSHOT_INTERVAL: int = 16  # full text every N revisions, deltas in between
+    REVISION_CACHE_SIZE: int = 256  # latest piece tables kept per process
+    
+    # Rule data
+    JURISDICTIONS_PATH: Optional[str] = None
+    
+    # Approved statement reuse
+    APPROVED_INDEX_MODE: str = "flat"  # flat | ivf
+    CONTENT_REUSE_THRESHOLD: float = 0.6
+    LEGAL_LINT_SKIP_CLEARED: bool = True
+    
+    # Warm-up before consuming (see app/core/warmup.py)
+    WARMUP_ENABLED: bool = True
+    WARMUP_STRICT: bool = False  # refuse to start if a step fails
+    WARMUP_SNAPSHOT_PATH: Optional[str] = None  # prebuilt approved-statement snapshot directory
+    WORKER_READY_FILE: Optional[str] = None  # readiness probe file, written once warm
+    WORKER_QUEUES: Optional[str] = None  # same list as -Q: only those queues' task modules are imported and warmed
+    
+    # Audit log (app/core/audit.py): group-committed, hash-chained
+    AUDIT_ENABLED: bool = True
+    AUDIT_BACKEND: str = "postgres"  # postgres | segment
+    AUDIT_DIR: str = "/var/lib/crisis-crew/audit"  # segment backend
+    AUDIT_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    AUDIT_FSYNC: bool = True
+    AUDIT_BATCH_SIZE: int = 512
+    AUDIT_LINGER_MS: float = 5.0  # wait for a batch to fill, skipped when a caller waits on it
+    AUDIT_QUEUE_SIZE: int = 100000
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 5.0
+    AUDIT_COMMIT_TIMEOUT_SECONDS: float = 30.0
+    
+    # Result memoization
+    MEMO_ENABLED: bool = True
+    MEMO_CACHE_SIZE: int = 1024
+    MEMO_REDIS_ENABLED: bool = False
+    MEMO_REDIS_TTL_SECONDS: int = 3600
+    
+    # Observability (set PROMETHEUS_MULTIPROC_DIR in the environment for prefork /metrics)
+    OTEL_ENDPOINT: Optional[str] = None
+    
+    # Mention anomaly detection
+    ANOMALY_BUCKET_SECONDS: float = 5.0
+    ANOMALY_WINDOW_BUCKETS: int = 60
+    ANOMALY_Z_THRESHOLD: float = 5.0
+    ANOMALY_MIN_COUNT: int = 10
+    ANOMALY_CUSUM_H: float = 12.0
+    ANOMALY_COOLDOWN_SECONDS: float = 60.0
+    ANOMALY_IDLE_SECONDS: float = 6 * 3600
+    
+    # Mention series for charts: fixed bins, downsampled to a point budget per query
+    SERIES_BIN_SECONDS: int = 60
+    SERIES_TTL_SECONDS: int = 30 * 24 * 3600
+    SERIES_MAX_POINTS: int = 500
+    SERIES_MAX_POINTS_LIMIT: int = 5000
+    
+    # Monitor shards: incidents are consistent-hashed onto queues monitor.0..N-1
+    MONITOR_SHARDS: int = 1
+    MONITOR_SHARD_VNODES: int = 128
+    MONITOR_HANDOFF_TTL_SECONDS: int = 3600
+    
+    # Mention dedup (per-incident rotating Bloom filters)
+    DEDUP_ENABLED: bool = True
+    DEDUP_WINDOW_SECONDS: float = 3600.0
+    DEDUP_PARTITIONS: int = 4
+    DEDUP_PARTITION_CAPACITY: int = 10000
+    DEDUP_ERROR_RATE: float = 0.001
+    
+    # Feed ingestion service (ingest_service.py)
+    INGEST_SOURCE: str = "nats"  # nats | file | memory
+    INGEST_SUBJECT: str = "feeds.mentions"
+    INGEST_QUEUE_GROUP: str = ""
+    INGEST_FILE_PATH: Optional[str] = None
+    INGEST_BATCH_SIZE: int = 500
+    INGEST_BATCH_WAIT_MS: float = 200.0
+    INGEST_QUEUE_SIZE: int = 20000
+    INGEST_METRICS_PORT: int = 8002
+    
+    # Task profiling (off until started with app.tasks.profiling.profiling_control)
+    PROFILING_REFRESH_SECONDS: float = 5.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_MEMORY_FRAMES: int = 1
+    PROFILING_MEMORY_TOP: int = 10
+    PROFILING_MAX_TASK_RECORDS: int = 200
+    PROFILING_OUTPUT_DIR: str = "/tmp/crisis-crew-profiles"
+    
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # event name -> fraction kept
     
     class Config:
         env_file = ".env"
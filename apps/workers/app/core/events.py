@@ -0,0 +1,48 @@
+# Created automatically by Cursor AI (2024-12-19)
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client used for realtime channels."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def publish_event(channel: str, event: Dict[str, Any]) -> bool:
+    """Publish an event on a realtime channel (e.g. ``incident:{id}:plan``).
+
+    Delivery is best effort: a Redis failure is logged and never fails the task.
+    """
+    try:
+        get_redis().publish(channel, json.dumps(event, default=str))
+        return True
+    except redis.RedisError as e:
+        logger.warning("Event publish failed", channel=channel, error=str(e))
+        return False
+
+
+def publish_events(events: List[Tuple[str, Dict[str, Any]]]) -> bool:
+    """Publish many ``(channel, event)`` pairs in one pipelined round trip."""
+    if not events:
+        return True
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for channel, event in events:
+            pipe.publish(channel, json.dumps(event, default=str))
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        logger.warning("Event publish failed", events=len(events), error=str(e))
+        return False
@@ -0,0 +1,195 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Structured logging shared by both apps.
+
+apps/orchestrator/app/core/logging.py is a symlink to this file; each app's
+settings provide ``LOG_LEVEL``, ``LOG_QUEUE_SIZE`` and ``LOG_SAMPLE_RATES``.
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import weakref
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+import orjson
+import structlog
+
+from app.core.config import settings
+
+
+class Lazy:
+    """Log field computed only if the event survives level filtering and sampling.
+
+    ``logger.debug("scored", detail=Lazy(expensive_summary, batch))``
+    """
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Callable[..., Any], *args: Any):
+        self.fn = fn
+        self.args = args
+
+
+def resolve_lazy(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in event_dict.items():
+        if isinstance(value, Lazy):
+            event_dict[key] = value.fn(*value.args)
+    return event_dict
+
+
+class EventSampler:
+    """Keeps a fixed fraction of events per event name (deterministic 1-in-N)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        _samplers.add(self)
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        event = event_dict.get("event")
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1.0:
+            return event_dict
+        with self._lock:
+            count = self._counts.get(event, 0) + 1
+            self._counts[event] = count
+        if rate <= 0.0 or int(count * rate) == int((count - 1) * rate):
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+class QueueSink:
+    """Bounded queue drained by a background thread that writes in batches.
+
+    Callers never block on I/O: when the queue is full the line is dropped and
+    counted. The writer restarts in forked children (Celery prefork).
+    """
+
+    def __init__(self, stream: Optional[BinaryIO] = None, maxsize: int = 10000, batch_size: int = 512):
+        self.stream = stream or sys.stdout.buffer
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._start()
+        _sinks.add(self)
+
+    def _start(self) -> None:
+        self._queue: "queue.Queue[bytes]" = queue.Queue(maxsize=self.maxsize)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line: bytes) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> None:
+        while True:
+            batch: List[bytes] = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.stream.write(b"\n".join(batch) + b"\n")
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until everything queued so far is written."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+
+class QueueLogger:
+    """structlog logger that hands rendered bytes to a QueueSink."""
+
+    def __init__(self, sink: QueueSink):
+        self._sink = sink
+
+    def msg(self, message: bytes) -> None:
+        self._sink.write(message)
+
+    log = debug = info = warning = warn = error = critical = exception = fatal = msg
+
+
+_sink: Optional[QueueSink] = None
+_sinks: "weakref.WeakSet[QueueSink]" = weakref.WeakSet()
+_samplers: "weakref.WeakSet[EventSampler]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    """Restart the writers (threads do not survive fork) and drop locks a parent thread may have held."""
+    for sink in list(_sinks):
+        sink._start()
+    for sampler in list(_samplers):
+        sampler._lock = threading.Lock()
+
+
+def _flush_sinks() -> None:
+    for sink in list(_sinks):
+        sink.flush()
+
+
+# Registered once per process, not per sink or sampler
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(_flush_sinks)
+
+
+def get_sink() -> Optional[QueueSink]:
+    return _sink
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    stream: Optional[BinaryIO] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
+) -> None:
+    """Configure structured logging for the application.
+
+    Events below ``level`` are rejected by the bound logger before any
+    processor runs; surviving events are sampled, rendered with orjson and
+    written by a background thread.
+    """
+    global _sink
+    level_name = (level or settings.LOG_LEVEL).upper()
+    numeric_level = logging.getLevelName(level_name)
+    if not isinstance(numeric_level, int):
+        numeric_level = logging.INFO
+
+    # Standard library logging (uvicorn, celery, libraries)
+    logging.basicConfig(
+        format="%(message)s",
+        stream=sys.stdout,
+        level=numeric_level,
+    )
+
+    if _sink is None or stream is not None:
+        _sink = QueueSink(stream=stream, maxsize=settings.LOG_QUEUE_SIZE)
+    sink = _sink
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            EventSampler(settings.LOG_SAMPLE_RATES if sample_rates is None else sample_rates),
+            resolve_lazy,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(serializer=orjson.dumps, default=str),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(numeric_level),
+        context_class=dict,
+        logger_factory=lambda *args: QueueLogger(sink),
+        cache_logger_on_first_use=True,
+    )
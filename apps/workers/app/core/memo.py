@@ -0,0 +1,151 @@
+# Created automatically by Cursor AI (2024-12-19)
+import functools
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Type
+
+import redis
+import structlog
+from prometheus_client import Counter
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.core.events import get_redis
+
+logger = structlog.get_logger()
+
+MEMO_REQUESTS = Counter(
+    "worker_memo_requests_total",
+    "Memoized task lookups by cache and outcome",
+    ["cache", "result"],
+)
+
+
+class ResultCache:
+    """Bounded per-process LRU of serialized task results with an optional Redis tier."""
+
+    def __init__(self, name: str, maxsize: int, redis_client: Optional[redis.Redis] = None, ttl: int = 3600):
+        self.name = name
+        self.maxsize = maxsize
+        self.redis = redis_client
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _redis_key(self, key: str) -> str:
+        return f"memo:{self.name}:{key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            MEMO_REQUESTS.labels(self.name, "hit_local").inc()
+            return json.loads(payload)
+
+        if self.redis is not None:
+            try:
+                payload = self.redis.get(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning("Memo cache read failed", cache=self.name, error=str(e))
+                payload = None
+            if payload is not None:
+                self._store_local(key, payload.decode("utf-8"))
+                MEMO_REQUESTS.labels(self.name, "hit_redis").inc()
+                return json.loads(payload)
+
+        MEMO_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value, default=str)
+        self._store_local(key, payload)
+        if self.redis is not None:
+            try:
+                self.redis.setex(self._redis_key(key), self.ttl, payload)
+            except redis.RedisError as e:
+                logger.warning("Memo cache write failed", cache=self.name, error=str(e))
+
+    def _store_local(self, key: str, payload: str) -> None:
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def request_key(name: str, request: BaseModel, generation: Any = None) -> str:
+    """Canonical hash of a validated request (sorted keys, defaults applied)."""
+    canonical = json.dumps(
+        {"task": name, "request": request.dict(), "generation": generation},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def restamp(result: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Refresh the per-call fields of a cached result to ``now``."""
+    if "generated_at" in result:
+        result["generated_at"] = now
+    if "content_id" in result:
+        # content ids are "<prefix>_<incident>_<YYYYmmdd>_<HHMMSS>"
+        prefix = result["content_id"].rsplit("_", 2)[0]
+        result["content_id"] = f"{prefix}_{now.strftime('%Y%m%d_%H%M%S')}"
+    return result
+
+
+_caches: Dict[str, ResultCache] = {}
+
+
+def get_cache(name: str) -> ResultCache:
+    if name not in _caches:
+        _caches[name] = ResultCache(
+            name,
+            maxsize=settings.MEMO_CACHE_SIZE,
+            redis_client=get_redis() if settings.MEMO_REDIS_ENABLED else None,
+            ttl=settings.MEMO_REDIS_TTL_SECONDS,
+        )
+    return _caches[name]
+
+
+def memoize_task(
+    name: str,
+    model: Type[BaseModel],
+    generation: Optional[Callable[[], Any]] = None,
+    clock: Callable[[], datetime] = datetime.now,
+):
+    """Memoize a bound task ``f(self, request_data)`` that is deterministic in its request.
+
+    ``generation`` returns a value that changes whenever outside state the
+    result depends on changes (e.g. the approved statement count). ``clock``
+    is the one the task stamps ``generated_at`` with, so cache hits are
+    restamped in the same time zone. Side effects that must happen on every
+    call (auditing) belong outside the memoized function.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, request_data: Dict[str, Any], *args, **kwargs):
+            if not settings.MEMO_ENABLED:
+                return func(self, request_data, *args, **kwargs)
+            try:
+                request = model(**request_data)
+            except ValidationError:
+                # Let the task report its own validation failure
+                return func(self, request_data, *args, **kwargs)
+            cache = get_cache(name)
+            key = request_key(name, request, generation() if generation else None)
+            cached = cache.get(key)
+            if cached is not None:
+                return restamp(cached, clock())
+            result = func(self, request_data, *args, **kwargs)
+            cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,237 @@
+# Created automatically by Cursor AI (2024-12-19)
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+import structlog
+from celery import signals
+
+from app.core.config import settings
+from app.core.events import get_redis
+
+logger = structlog.get_logger()
+
+CONFIG_KEY = "profiling:config"
+ALL_QUEUES = "*"
+
+
+def stacks_key(queue: str) -> str:
+    return f"profiling:{queue}:stacks"
+
+
+def tasks_key(queue: str) -> str:
+    return f"profiling:{queue}:tasks"
+
+
+class StackSampler:
+    """Statistical profiler: samples one thread's Python stack at a fixed interval.
+
+    Stacks are kept in collapsed form (root first, ``;``-separated), ready for
+    flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[collapse(frame)] += 1
+            self.samples += 1
+
+
+def collapse(frame) -> str:
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+class ProfilingConfig:
+    """Per-queue profiling settings, refreshed from Redis at most every ``refresh`` seconds."""
+
+    def __init__(self, refresh: float):
+        self.refresh = refresh
+        self.queues: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = float("-inf")
+
+    def active(self) -> bool:
+        now = time.monotonic()
+        if now - self._loaded_at >= self.refresh:
+            self._loaded_at = now
+            self.load()
+        return bool(self.queues)
+
+    def for_queue(self, queue: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """The selector profiling ``queue`` and its options.
+
+        The queue itself, else its base queue (``monitor`` for the shard
+        queues ``monitor.N``), else ``*``.
+        """
+        base = queue.split(".")[0]
+        for selector in (queue, base):
+            if selector in self.queues:
+                return selector, self.queues[selector]
+        return ALL_QUEUES, self.queues.get(ALL_QUEUES)
+
+    def load(self) -> None:
+        try:
+            raw = get_redis().hgetall(CONFIG_KEY)
+        except redis.RedisError as e:
+            logger.debug("Profiling config refresh failed", error=str(e))
+            raw = {}
+        self.queues = {k.decode("utf-8"): json.loads(v) for k, v in raw.items()}
+
+
+config = ProfilingConfig(refresh=settings.PROFILING_REFRESH_SECONDS)
+
+# task_id -> (queue, selector, sampler, started, traces memory)
+_active: Dict[str, Tuple[str, str, StackSampler, float, bool]] = {}
+_tracing_tasks = 0
+# Whether tracemalloc was started here (and so is ours to stop)
+_started_tracing = False
+
+
+def _queue(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or "eager"
+
+
+@signals.task_prerun.connect
+def _on_prerun(task_id: str = None, task=None, **kwargs) -> None:
+    global _tracing_tasks, _started_tracing
+    # Sampling off: one clock read per task
+    if not config.active():
+        return
+    queue = _queue(task)
+    selector, options = config.for_queue(queue)
+    if options is None or random.random() >= options.get("sample_rate", 1.0):
+        return
+
+    memory = bool(options.get("memory"))
+    if memory:
+        if _tracing_tasks == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.PROFILING_MEMORY_FRAMES)
+            _started_tracing = True
+        else:
+            tracemalloc.reset_peak()
+        _tracing_tasks += 1
+    interval = options.get("interval_ms", settings.PROFILING_INTERVAL_MS) / 1000
+    sampler = StackSampler(threading.get_ident(), interval).start()
+    _active[task_id] = (queue, selector, sampler, time.perf_counter(), memory)
+
+
+@signals.task_postrun.connect
+def _on_postrun(task_id: str = None, task=None, **kwargs) -> None:
+    global _tracing_tasks, _started_tracing
+    if not _active:
+        return
+    active = _active.pop(task_id, None)
+    if active is None:
+        return
+    queue, selector, sampler, started, memory = active
+    stacks = sampler.stop()
+    record: Dict[str, Any] = {
+        "task": task.name,
+        "queue": queue,
+        "task_id": task_id,
+        "pid": os.getpid(),
+        "duration_ms": (time.perf_counter() - started) * 1000,
+        "samples": sampler.samples,
+        "finished_at": time.time(),
+    }
+    if memory:
+        record.update(memory_snapshot(settings.PROFILING_MEMORY_TOP))
+        _tracing_tasks -= 1
+        if _tracing_tasks == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+    # Stored under the selector that enabled profiling, so dump_collapsed("*")
+    # returns what profiling "*" collected
+    _store(selector, stacks, record)
+
+
+def memory_snapshot(top: int) -> Dict[str, Any]:
+    """Peak traced memory and the largest live allocation sites."""
+    _, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    ).statistics("lineno")
+    return {
+        "peak_memory_kb": peak / 1024,
+        "top_allocations": [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "size_kb": stat.size / 1024, "count": stat.count}
+            for stat in statistics[:top]
+        ],
+    }
+
+
+def _store(queue: str, stacks: Counter, record: Dict[str, Any]) -> None:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for stack, count in stacks.items():
+            pipe.hincrby(stacks_key(queue), stack, count)
+        pipe.lpush(tasks_key(queue), json.dumps(record, default=str))
+        pipe.ltrim(tasks_key(queue), 0, settings.PROFILING_MAX_TASK_RECORDS - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Profile upload failed", queue=queue, task=record["task"], error=str(e))
+
+
+def start_profiling(queue: str, sample_rate: float = 1.0, memory: bool = False, interval_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Turn profiling on for a queue (a base queue such as ``monitor`` covers its shards; ``*`` for all).
+
+    Workers pick it up within the refresh interval.
+    """
+    options = {
+        "sample_rate": max(0.0, min(1.0, sample_rate)),
+        "memory": memory,
+        "interval_ms": interval_ms or settings.PROFILING_INTERVAL_MS,
+        "started_at": time.time(),
+    }
+    get_redis().hset(CONFIG_KEY, queue, json.dumps(options))
+    return options
+
+
+def stop_profiling(queue: str) -> bool:
+    return bool(get_redis().hdel(CONFIG_KEY, queue))
+
+
+def dump_collapsed(queue: str, reset: bool = False) -> str:
+    """Aggregated collapsed stacks for a queue, one ``stack count`` line each."""
+    client = get_redis()
+    raw = client.hgetall(stacks_key(queue))
+    if reset:
+        client.delete(stacks_key(queue))
+    lines = sorted(f"{stack.decode('utf-8')} {int(count)}" for stack, count in raw.items())
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def recent_task_profiles(queue: str, limit: int = 20) -> List[Dict[str, Any]]:
+    return [json.loads(item) for item in get_redis().lrange(tasks_key(queue), 0, limit - 1)]
@@ -0,0 +1,74 @@
+# Created automatically by Cursor AI (2024-12-19)
+import bisect
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+MONITOR_QUEUE = "monitor"
+# Monitor tasks whose first argument is the incident id
+MONITOR_TASKS = {"monitor_ingest_mentions", "detect_rumors"}
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes.
+
+    Adding a shard to N moves only about 1/(N+1) of the keys, all of them
+    onto the new shard, so per-incident state elsewhere stays put.
+    """
+
+    def __init__(self, shards: int, vnodes: int = 128):
+        self.shards = shards
+        self.vnodes = vnodes
+        ring: List[Tuple[int, int]] = sorted(
+            (_point(f"shard-{shard}#{v}"), shard) for shard in range(shards) for v in range(vnodes)
+        )
+        self._points = [p for p, _ in ring]
+        self._owners = [s for _, s in ring]
+
+    def shard_for(self, key: str) -> int:
+        if self.shards <= 1:
+            return 0
+        index = bisect.bisect(self._points, _point(key))
+        return self._owners[index % len(self._points)]
+
+    def moved(self, other: "HashRing", keys: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """Keys whose shard differs on ``other``: key -> (shard here, shard there)."""
+        moves = {}
+        for key in keys:
+            here, there = self.shard_for(key), other.shard_for(key)
+            if here != there:
+                moves[key] = (here, there)
+        return moves
+
+
+@lru_cache(maxsize=8)
+def _ring(shards: int, vnodes: int) -> HashRing:
+    return HashRing(shards, vnodes)
+
+
+def get_ring(shards: Optional[int] = None) -> HashRing:
+    return _ring(shards or settings.MONITOR_SHARDS, settings.MONITOR_SHARD_VNODES)
+
+
+def monitor_queue(incident_id: str, shards: Optional[int] = None) -> str:
+    """Queue of the monitor shard that owns the incident (``monitor`` when unsharded)."""
+    ring = get_ring(shards)
+    if ring.shards <= 1:
+        return MONITOR_QUEUE
+    return f"{MONITOR_QUEUE}.{ring.shard_for(incident_id)}"
+
+
+def route_monitor_task(name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any], options: Dict[str, Any], task=None, **kw):
+    """Celery router: send per-incident monitor tasks to the owning shard's queue."""
+    if name not in MONITOR_TASKS:
+        return None
+    incident_id = args[0] if args else kwargs.get("incident_id")
+    if incident_id is None:
+        return None
+    return {"queue": monitor_queue(str(incident_id))}
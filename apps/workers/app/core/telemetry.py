@@ -0,0 +1,176 @@
+# Created automatically by Cursor AI (2024-12-19)
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+from celery import signals
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, SpanExporter
+from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+from prometheus_client import multiprocess
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+SENT_AT_HEADER = "x-sent-at"
+
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+TASK_QUEUE_WAIT = Histogram(
+    "worker_task_queue_wait_seconds",
+    "Time between publish and start of execution",
+    ["task", "queue"],
+)
+TASK_RUNTIME = Histogram(
+    "worker_task_runtime_seconds",
+    "Task execution time",
+    ["task", "queue", "state"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+TASK_PAYLOAD_BYTES = Histogram(
+    "worker_task_payload_bytes",
+    "Serialized task message body size",
+    ["task", "queue"],
+    buckets=BYTES_BUCKETS,
+)
+TASK_RESULT_BYTES = Histogram(
+    "worker_task_result_bytes",
+    "JSON size of task results",
+    ["task", "queue"],
+    buckets=BYTES_BUCKETS,
+)
+TASK_RETRIES = Counter("worker_task_retries_total", "Task retries", ["task", "queue"])
+TASK_FAILURES = Counter("worker_task_failures_total", "Task failures", ["task", "queue"])
+
+tracer = trace.get_tracer("crisis_crew.workers")
+
+# task_id -> (span, context token, started)
+_active: Dict[str, Tuple[trace.Span, object, float]] = {}
+
+
+class _RequestGetter:
+    """Reads propagated headers, which Celery exposes as request attributes."""
+
+    def get(self, carrier, key: str):
+        value = getattr(carrier, key, None)
+        if value is None and isinstance(getattr(carrier, "headers", None), dict):
+            value = carrier.headers.get(key)
+        return [value] if isinstance(value, str) else value
+
+    def keys(self, carrier):
+        return []
+
+
+_getter = _RequestGetter()
+
+
+def configure_tracing(exporter: Optional[SpanExporter] = None) -> TracerProvider:
+    """Install the tracer provider; pass an in-memory exporter in tests."""
+    provider = TracerProvider(resource=Resource.create({"service.name": "crisis-crew-workers"}))
+    if exporter is not None:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    elif settings.OTEL_ENDPOINT:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_ENDPOINT, insecure=True)))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def _queue(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or "eager"
+
+
+@signals.before_task_publish.connect
+def _on_publish(headers: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+    if headers is None:
+        return
+    headers[SENT_AT_HEADER] = time.time()
+    # Carries the orchestrator request / parent task span into the child task
+    propagate.inject(headers)
+
+
+@signals.task_received.connect
+def _on_received(request=None, **kwargs) -> None:
+    body = getattr(request, "body", None)
+    if body is not None:
+        delivery_info = getattr(request, "delivery_info", None) or {}
+        TASK_PAYLOAD_BYTES.labels(request.name, delivery_info.get("routing_key") or "unknown").observe(len(body))
+
+
+@signals.task_prerun.connect
+def _on_prerun(task_id: str = None, task=None, **kwargs) -> None:
+    now = time.time()
+    queue = _queue(task)
+    sent_at = _getter.get(task.request, SENT_AT_HEADER)
+    if sent_at:
+        sent_at = sent_at[0] if isinstance(sent_at, list) else sent_at
+        TASK_QUEUE_WAIT.labels(task.name, queue).observe(max(0.0, now - float(sent_at)))
+
+    parent = propagate.extract(task.request, getter=_getter)
+    span = tracer.start_span(task.name, context=parent, kind=trace.SpanKind.CONSUMER)
+    span.set_attribute("celery.task_id", task_id)
+    span.set_attribute("celery.queue", queue)
+    token = context.attach(trace.set_span_in_context(span))
+    _active[task_id] = (span, token, time.perf_counter())
+
+
+@signals.task_postrun.connect
+def _on_postrun(task_id: str = None, task=None, retval=None, state: str = None, **kwargs) -> None:
+    active = _active.pop(task_id, None)
+    if active is None:
+        return
+    span, token, started = active
+    queue = _queue(task)
+    TASK_RUNTIME.labels(task.name, queue, state or "UNKNOWN").observe(time.perf_counter() - started)
+    if state == "SUCCESS" and retval is not None:
+        TASK_RESULT_BYTES.labels(task.name, queue).observe(len(json.dumps(retval, default=str)))
+    span.set_attribute("celery.state", state or "UNKNOWN")
+    span.end()
+    context.detach(token)
+
+
+@signals.task_retry.connect
+def _on_retry(sender=None, request=None, **kwargs) -> None:
+    delivery_info = getattr(request, "delivery_info", None) or {}
+    TASK_RETRIES.labels(sender.name, delivery_info.get("routing_key") or "eager").inc()
+
+
+@signals.task_failure.connect
+def _on_failure(sender=None, task_id: str = None, exception: BaseException = None, **kwargs) -> None:
+    TASK_FAILURES.labels(sender.name, _queue(sender)).inc()
+    active = _active.get(task_id)
+    if active is not None:
+        active[0].record_exception(exception)
+        active[0].set_status(trace.Status(trace.StatusCode.ERROR, str(exception)))
+
+
+@signals.worker_init.connect
+def _on_worker_init(sender=None, **kwargs) -> None:
+    start_metrics_server(settings.WORKERS_PORT)
+    if "prefork" not in str(getattr(sender, "pool_cls", "")).lower():
+        configure_tracing()
+
+
+@signals.worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    # Span processor threads do not survive fork, so each child sets up its own
+    configure_tracing()
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve /metrics for all prefork children (needs PROMETHEUS_MULTIPROC_DIR)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        logger.warning("PROMETHEUS_MULTIPROC_DIR not set; /metrics only covers the main process")
+        start_http_server(port)
+    logger.info("Worker metrics server started", port=port)
@@ -0,0 +1,199 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Warm-up of hot resources before a worker consumes tasks.
+
+Steps run in the worker's main process on ``worker_init``, which Celery
+sends before the pool forks and before the consumer starts, so prefork
+children (including the replacements started every
+``worker_max_tasks_per_child`` tasks) inherit warm state instead of
+rebuilding it on their first task. The approved-statement vectors can come
+from a prebuilt snapshot (``python warmup_snapshot.py build``) that is
+memory-mapped, so children share its pages rather than copying them.
+
+A step tied to task modules only runs when the worker imports one of them,
+so a worker started with ``WORKER_QUEUES=exports`` does not build the reply
+index or the approved-statement vectors it will never query.
+
+``WORKER_READY_FILE`` is written on ``worker_ready`` and removed on shutdown;
+point the readiness probe at it so traffic only arrives once warm-up is done.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+import structlog
+from celery import signals
+from prometheus_client import Gauge
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+WARMUP_DURATION = Gauge("worker_warmup_seconds", "Time spent in each warm-up step", ["step"], multiprocess_mode="max")
+
+SAMPLE_TEXT = (
+    "On March 3rd, 2024 we detected that approximately 12,000 customer records, including email "
+    "addresses and hashed passwords, were exposed from a misconfigured S3 bucket in the UK and US. "
+    "RT @newsdesk: is it true the data was leaked? https://example.com/story"
+)
+
+WARMUP_STEPS: Dict[str, Callable[[], Any]] = {}
+STEP_MODULES: Dict[str, Tuple[str, ...]] = {}
+
+
+def warmup_step(name: str, *modules: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """Register a warm-up step, needed by the given task modules (every worker when none); steps run in registration order."""
+    def register(fn: Callable[[], Any]) -> Callable[[], Any]:
+        WARMUP_STEPS[name] = fn
+        STEP_MODULES[name] = modules
+        return fn
+    return register
+
+
+def worker_steps(queues: Optional[str] = None) -> List[str]:
+    """Steps a worker consuming ``queues`` needs."""
+    from celery_app import task_modules
+
+    included = set(task_modules(queues))
+    return [name for name in WARMUP_STEPS if not STEP_MODULES[name] or included.intersection(STEP_MODULES[name])]
+
+
+@warmup_step("celery")
+def _celery() -> int:
+    from celery_app import celery_app
+
+    # Task registry and result backend are otherwise resolved on the first task
+    celery_app.finalize(auto=True)
+    celery_app.backend
+    return len(celery_app.tasks)
+
+
+@warmup_step("telemetry")
+def _telemetry() -> None:
+    from opentelemetry import context, trace
+
+    # Loads the OTel runtime context entry point, which task spans need
+    context.detach(context.attach(trace.set_span_in_context(trace.INVALID_SPAN)))
+
+
+@warmup_step("jurisdictions", "app.tasks.legal_linter", "app.tasks.plan_builder", "app.tasks.intake_normalizer", "app.tasks.bulk_intake",
+             "app.tasks.approvals")
+def _jurisdictions() -> int:
+    from app.services.jurisdictions import get_index
+
+    index = get_index()
+    index.risky_terms(["uk", "us"])
+    return len(index._by_key)
+
+
+@warmup_step("approved_statements", "app.tasks.statement_index", "app.tasks.content_writer", "app.tasks.legal_linter")
+def _approved_statements() -> int:
+    from app.tasks.statement_index import get_approved_store
+
+    store = get_approved_store()
+    if settings.WARMUP_SNAPSHOT_PATH and store.load_snapshot(Path(settings.WARMUP_SNAPSHOT_PATH)):
+        logger.info("Approved statement snapshot loaded", entries=len(store))
+    try:
+        store.sync()
+    except redis.RedisError as e:
+        logger.warning("Approved statement sync failed during warm-up", error=str(e))
+    store.nearest(SAMPLE_TEXT)
+    return len(store)
+
+
+@warmup_step("approvals", "app.tasks.approvals")
+def _approvals() -> int:
+    from app.tasks.approvals import engine, get_policy, restore_routes
+
+    get_policy().route("holding_statement", "high", ["uk"])
+    if settings.APPROVAL_PERSIST:
+        try:
+            restore_routes()
+        except redis.RedisError as e:
+            logger.warning("Approval route restore failed during warm-up", error=str(e))
+    return len(engine)
+
+
+@warmup_step("extraction", "app.tasks.intake_normalizer", "app.tasks.bulk_intake")
+def _extraction() -> int:
+    from app.services.extraction import extract_facts
+
+    return len(extract_facts(SAMPLE_TEXT).facts)
+
+
+@warmup_step("social_replies", "app.tasks.social_pack")
+def _social_replies() -> int:
+    from app.services.social import get_reply_index
+
+    index = get_reply_index()
+    index.search(SAMPLE_TEXT)
+    return len(index)
+
+
+@warmup_step("mentions", "app.tasks.monitor_ingest")
+def _mentions() -> int:
+    from app.services.dedup import canonical_source, normalize_mention
+    from app.tasks.monitor_ingest import is_rumor, score_sentiment
+
+    normalize_mention(SAMPLE_TEXT)
+    canonical_source("x.com")
+    score_sentiment(SAMPLE_TEXT)
+    return int(is_rumor(SAMPLE_TEXT))
+
+
+def run_warmup(steps: Optional[List[str]] = None) -> Dict[str, float]:
+    """Run the warm-up steps and return their durations in seconds.
+
+    A failing step is logged and skipped (the resource then loads lazily on
+    first use) unless ``WARMUP_STRICT`` is set, in which case it stops the
+    worker before it takes any task.
+    """
+    timings: Dict[str, float] = {}
+    for name in steps or worker_steps(settings.WORKER_QUEUES):
+        started = time.perf_counter()
+        try:
+            WARMUP_STEPS[name]()
+        except Exception as e:
+            if settings.WARMUP_STRICT:
+                raise
+            logger.warning("Warm-up step failed", step=name, error=str(e))
+            continue
+        timings[name] = time.perf_counter() - started
+        WARMUP_DURATION.labels(name).set(timings[name])
+    logger.info("Worker warm-up completed", total_ms=round(sum(timings.values()) * 1000, 1),
+                steps={name: round(s * 1000, 1) for name, s in timings.items()})
+    return timings
+
+
+def build_snapshot(path: Path) -> int:
+    """Sync the approved statements from Redis and write them as a snapshot."""
+    from app.tasks.statement_index import get_approved_store
+
+    store = get_approved_store()
+    store.sync()
+    store.save_snapshot(path)
+    return len(store)
+
+
+_timings: Dict[str, float] = {}
+
+
+@signals.worker_init.connect
+def _on_worker_init(**kwargs) -> None:
+    if settings.WARMUP_ENABLED:
+        _timings.update(run_warmup())
+
+
+@signals.worker_ready.connect
+def _on_worker_ready(**kwargs) -> None:
+    if settings.WORKER_READY_FILE:
+        ready = {"pid": os.getpid(), "ready_at": time.time(), "warmup_ms": {k: round(v * 1000, 1) for k, v in _timings.items()}}
+        Path(settings.WORKER_READY_FILE).write_text(json.dumps(ready))
+
+
+@signals.worker_shutdown.connect
+def _on_worker_shutdown(**kwargs) -> None:
+    if settings.WORKER_READY_FILE:
+        Path(settings.WORKER_READY_FILE).unlink(missing_ok=True)
@@ -0,0 +1,255 @@
+# Created automatically by Cursor AI (2024-12-19)
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+VOLUME_SPIKE = "volume_spike"
+SENTIMENT_DROP = "sentiment_drop"
+
+
+class AnomalyAlert(BaseModel):
+    type: str  # monitor.anomaly
+    kind: str  # volume_spike | sentiment_drop
+    incident_id: str
+    detected_at: datetime
+    value: float
+    baseline: float
+    z_score: float
+    window_mentions: int
+    window_sentiment: Optional[float] = None
+
+
+class _IncidentWindow:
+    """Per-incident state; every field is a scalar or a fixed-size ring, so updates are O(1)."""
+
+    __slots__ = (
+        "bucket", "bucket_count", "alerted_bucket",
+        "ring_counts", "ring_sentiment", "window_count", "window_sentiment",
+        "volume_mean", "volume_var", "closed_buckets",
+        "sentiment_mean", "sentiment_var", "sentiment_n", "cusum",
+        "last_alert", "last_seen",
+    )
+
+    def __init__(self, bucket: int, size: int):
+        self.bucket = bucket
+        self.bucket_count = 0
+        self.alerted_bucket = -1
+        self.ring_counts = [0] * size
+        self.ring_sentiment = [0.0] * size
+        self.window_count = 0
+        self.window_sentiment = 0.0
+        self.volume_mean = 0.0
+        self.volume_var = 0.0
+        self.closed_buckets = 0
+        self.sentiment_mean = 0.0
+        self.sentiment_var = 0.0
+        self.sentiment_n = 0
+        self.cusum = 0.0
+        self.last_alert: Dict[str, float] = {}
+        self.last_seen = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_IncidentWindow":
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(state, name, data[name])
+        return state
+
+
+def _ewm(mean: float, var: float, x: float, alpha: float) -> Tuple[float, float]:
+    """Exponentially weighted mean and variance (Welford-style incremental update)."""
+    delta = x - mean
+    mean += alpha * delta
+    var = (1 - alpha) * (var + alpha * delta * delta)
+    return mean, var
+
+
+class AnomalyDetector:
+    """Streaming spike detector over mention volume and sentiment for many incidents.
+
+    Volume: mentions are counted into fixed-width time buckets. Closed buckets
+    feed an EWMA mean/variance baseline, and the *open* bucket is z-scored
+    against it on every mention, so a spike alerts as soon as it crosses the
+    threshold instead of when its bucket closes.
+
+    Sentiment: each mention is z-scored against an EWMA baseline and fed to a
+    one-sided CUSUM that alarms on a sustained negative shift.
+
+    A ring of the last ``window_buckets`` buckets keeps sliding-window totals
+    for alert context. No history is re-scanned; idle incidents are dropped by
+    ``expire``.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: float = 5.0,
+        window_buckets: int = 60,
+        volume_alpha: float = 0.1,
+        sentiment_alpha: float = 0.02,
+        z_threshold: float = 5.0,
+        min_count: int = 10,
+        warmup_buckets: int = 12,
+        cusum_k: float = 0.5,
+        cusum_h: float = 12.0,
+        sentiment_warmup: int = 30,
+        cooldown_seconds: float = 60.0,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.volume_alpha = volume_alpha
+        self.sentiment_alpha = sentiment_alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.sentiment_warmup = sentiment_warmup
+        self.cooldown_seconds = cooldown_seconds
+        self._incidents: Dict[str, _IncidentWindow] = {}
+
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def observe(self, incident_id: str, ts: float, sentiment: Optional[float] = None) -> List[AnomalyAlert]:
+        """Account for one mention seen at ``ts`` (epoch seconds)."""
+        bucket = int(ts // self.bucket_seconds)
+        state = self._incidents.get(incident_id)
+        if state is None:
+            state = self._incidents[incident_id] = _IncidentWindow(bucket, self.window_buckets)
+        elif bucket > state.bucket:
+            self._roll(state, bucket)
+        state.last_seen = max(state.last_seen, ts)
+
+        # Late mentions count towards the open bucket
+        state.bucket_count += 1
+        slot = state.bucket % self.window_buckets
+        state.ring_counts[slot] += 1
+        state.window_count += 1
+
+        alerts: List[AnomalyAlert] = []
+        volume = self._check_volume(incident_id, state, ts)
+        if volume is not None:
+            alerts.append(volume)
+
+        if sentiment is not None:
+            state.ring_sentiment[slot] += sentiment
+            state.window_sentiment += sentiment
+            drop = self._check_sentiment(incident_id, state, ts, sentiment)
+            if drop is not None:
+                alerts.append(drop)
+        return alerts
+
+    def observe_many(self, incident_id: str, mentions: Iterable[Tuple[float, Optional[float]]]) -> List[AnomalyAlert]:
+        alerts: List[AnomalyAlert] = []
+        for ts, sentiment in mentions:
+            alerts.extend(self.observe(incident_id, ts, sentiment))
+        return alerts
+
+    def _roll(self, state: _IncidentWindow, bucket: int) -> None:
+        """Close buckets up to ``bucket``; gaps longer than the window are collapsed."""
+        gap = bucket - state.bucket
+        count = state.bucket_count
+        for step in range(min(gap, self.window_buckets)):
+            state.volume_mean, state.volume_var = _ewm(state.volume_mean, state.volume_var, count, self.volume_alpha)
+            state.closed_buckets += 1
+            count = 0
+            slot = (state.bucket + step + 1) % self.window_buckets
+            state.window_count -= state.ring_counts[slot]
+            state.window_sentiment -= state.ring_sentiment[slot]
+            state.ring_counts[slot] = 0
+            state.ring_sentiment[slot] = 0.0
+        if gap > self.window_buckets:
+            # Idle for a whole window: the quiet tail of the baseline decays in closed form
+            decay = (1 - self.volume_alpha) ** (gap - self.window_buckets)
+            state.volume_var = state.volume_var * decay + state.volume_mean ** 2 * decay * (1 - decay)
+            state.volume_mean *= decay
+            state.closed_buckets += gap - self.window_buckets
+        state.bucket = bucket
+        state.bucket_count = 0
+
+    def _cooled_down(self, state: _IncidentWindow, kind: str, ts: float) -> bool:
+        return ts - state.last_alert.get(kind, float("-inf")) >= self.cooldown_seconds
+
+    def _check_volume(self, incident_id: str, state: _IncidentWindow, ts: float) -> Optional[AnomalyAlert]:
+        if state.closed_buckets < self.warmup_buckets or state.alerted_bucket == state.bucket:
+            return None
+        count = state.bucket_count
+        if count < self.min_count:
+            return None
+        # The baseline starts at zero; undo that bias while it warms up
+        correction = 1 - (1 - self.volume_alpha) ** state.closed_buckets
+        mean = state.volume_mean / correction
+        # Poisson floor keeps a near-silent baseline from alerting on a handful of mentions
+        spread = max(math.sqrt(state.volume_var / correction), math.sqrt(mean), 1.0)
+        z = (count - mean) / spread
+        if z < self.z_threshold or not self._cooled_down(state, VOLUME_SPIKE, ts):
+            return None
+        state.alerted_bucket = state.bucket
+        state.last_alert[VOLUME_SPIKE] = ts
+        return self._alert(VOLUME_SPIKE, incident_id, state, ts, count, mean, z)
+
+    def _check_sentiment(self, incident_id: str, state: _IncidentWindow, ts: float, sentiment: float) -> Optional[AnomalyAlert]:
+        state.sentiment_n += 1
+        if state.sentiment_n == 1:
+            state.sentiment_mean = sentiment
+            return None
+        # Variance starts at zero: bias-correct by the number of updates so far
+        updates = state.sentiment_n - 2
+        var = state.sentiment_var / (1 - (1 - self.sentiment_alpha) ** updates) if updates > 0 else 0.0
+        spread = max(math.sqrt(var), 0.05)
+        z = (state.sentiment_mean - sentiment) / spread
+        baseline = state.sentiment_mean
+        state.sentiment_mean, state.sentiment_var = _ewm(state.sentiment_mean, state.sentiment_var, sentiment, self.sentiment_alpha)
+        if state.sentiment_n <= self.sentiment_warmup:
+            return None
+
+        state.cusum = max(0.0, state.cusum + z - self.cusum_k)
+        if state.cusum < self.cusum_h:
+            return None
+        score = state.cusum
+        state.cusum = 0.0
+        if not self._cooled_down(state, SENTIMENT_DROP, ts):
+            return None
+        state.last_alert[SENTIMENT_DROP] = ts
+        return self._alert(SENTIMENT_DROP, incident_id, state, ts, sentiment, baseline, score)
+
+    def _alert(
+        self, kind: str, incident_id: str, state: _IncidentWindow, ts: float, value: float, baseline: float, z: float
+    ) -> AnomalyAlert:
+        return AnomalyAlert(
+            type="monitor.anomaly",
+            kind=kind,
+            incident_id=incident_id,
+            detected_at=datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None),
+            value=round(value, 4),
+            baseline=round(baseline, 4),
+            z_score=round(z, 2),
+            window_mentions=state.window_count,
+            window_sentiment=round(state.window_sentiment / state.window_count, 4) if state.window_count else None,
+        )
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._incidents
+
+    def incidents(self) -> List[str]:
+        return list(self._incidents)
+
+    def export(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an incident's state and return it JSON-serializable, e.g. for another shard."""
+        state = self._incidents.pop(incident_id, None)
+        return state.to_dict() if state is not None else None
+
+    def restore(self, incident_id: str, data: Dict[str, Any]) -> None:
+        self._incidents[incident_id] = _IncidentWindow.from_dict(data)
+
+    def expire(self, now: float, idle_seconds: float) -> int:
+        """Forget incidents with no mentions for ``idle_seconds``."""
+        stale = [key for key, state in self._incidents.items() if now - state.last_seen > idle_seconds]
+        for key in stale:
+            del self._incidents[key]
+        return len(stale)
@@ -0,0 +1,388 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Approval routing: compiled policies and event-driven approval chains.
+
+A policy is an ordered list of rules (first match wins), each naming the roles
+that must approve, in order, artifacts of some kinds, severities and
+jurisdictions. ``compile_policy`` turns it into a decision table once: one cell
+per (artifact kind, severity), each an array indexed by the bitmask of the
+cell's jurisdictions an artifact carries. Routing an artifact is a dict lookup
+and an index, however many rules the policy has.
+
+``ApprovalEngine`` holds one state machine per routed artifact and moves it on
+events (routed, approved, rejected, withdrawn) instead of polling approvals.
+Routes waiting on each role and routes outstanding per incident are indexes
+updated on every transition, so neither "what is waiting on legal" nor "is
+this incident ready" scans the pending approvals.
+"""
+import itertools
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+DEFAULT_POLICY_PATH = Path(__file__).resolve().parent.parent / "data" / "approval_policy.json"
+
+ROLES = ("owner", "admin", "pr", "legal", "social", "exec", "viewer")
+SEVERITIES = ("low", "medium", "high", "critical")
+ANY = "*"
+
+# Route status
+PENDING = "pending"
+APPROVED = "approved"
+REJECTED = "rejected"
+NOT_REQUIRED = "not_required"
+
+DECISIONS = (APPROVED, REJECTED)
+
+# Jurisdictions one table cell may condition on (its array has 2**n entries)
+MAX_CELL_JURISDICTIONS = 16
+
+
+class ApprovalError(Exception):
+    pass
+
+
+class ApprovalRule(BaseModel):
+    name: str
+    artifact_kinds: List[str] = []  # empty = any kind
+    severities: List[str] = []  # empty = any severity
+    jurisdictions: List[str] = []  # matches an artifact in any of them; empty = any
+    chain: List[str]  # roles in approval order; empty = no approval needed
+
+
+class ApprovalPolicy(BaseModel):
+    rules: List[ApprovalRule] = []
+    default_chain: List[str] = ["pr", "legal", "exec"]
+
+    @classmethod
+    def load(cls, path: Path) -> "ApprovalPolicy":
+        with open(path, "rb") as f:
+            return cls(**json.load(f))
+
+
+class _Cell:
+    __slots__ = ("bits", "table")
+
+    def __init__(self, bits: Dict[str, int], table: List[int]):
+        self.bits = bits  # jurisdiction -> bit
+        self.table = table  # jurisdiction mask -> outcome index
+
+
+class CompiledPolicy:
+    """Decision table of an ``ApprovalPolicy``; see ``compile_policy``."""
+
+    def __init__(self, cells: Dict[Tuple[str, str], _Cell], outcomes: List[Tuple[str, Tuple[str, ...]]]):
+        self._cells = cells
+        self._outcomes = outcomes  # (rule name, chain)
+
+    def __len__(self) -> int:
+        return sum(len(cell.table) for cell in self._cells.values())
+
+    def route(self, artifact_kind: str, severity: str, jurisdictions: Iterable[str] = ()) -> Tuple[str, Tuple[str, ...]]:
+        """``(rule name, required role order)`` for an artifact."""
+        kind = artifact_kind.lower()
+        severity = severity.lower()
+        if severity not in SEVERITIES:
+            severity = ANY
+        cell = self._cells.get((kind, severity)) or self._cells[(ANY, severity)]
+        mask = 0
+        if cell.bits:
+            for code in jurisdictions:
+                mask |= cell.bits.get(code.lower(), 0)
+        return self._outcomes[cell.table[mask]]
+
+
+def _roles(chain: Sequence[str], rule: str) -> Tuple[str, ...]:
+    roles = tuple(role.lower() for role in chain)
+    unknown = [role for role in roles if role not in ROLES]
+    if unknown:
+        raise ApprovalError(f"Rule {rule!r} requires unknown roles {unknown}")
+    return roles
+
+
+def compile_policy(policy: ApprovalPolicy) -> CompiledPolicy:
+    """Compile a policy's rules into a decision table.
+
+    Each (kind, severity) cell keeps only the rules that can match it, up to
+    the first one without a jurisdiction condition (later rules are shadowed),
+    and precomputes the winning rule for every combination of the
+    jurisdictions those rules name. Kinds no rule names and severities outside
+    ``SEVERITIES`` share the ``*`` cells, where only unconditioned rules apply.
+    """
+    rules = [(rule.name, {k.lower() for k in rule.artifact_kinds}, {s.lower() for s in rule.severities},
+              [j.lower() for j in rule.jurisdictions], _roles(rule.chain, rule.name)) for rule in policy.rules]
+    for _, _, severities, _, _ in rules:
+        if severities - set(SEVERITIES):
+            raise ApprovalError(f"Unknown severities {sorted(severities - set(SEVERITIES))}")
+    rules.append(("default", set(), set(), [], _roles(policy.default_chain, "default")))
+
+    outcome_ids: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    kinds = sorted(set(itertools.chain.from_iterable(kinds for _, kinds, _, _, _ in rules)))
+    cells: Dict[Tuple[str, str], _Cell] = {}
+
+    for kind, severity in itertools.product(kinds + [ANY], SEVERITIES + (ANY,)):
+        candidates = []
+        for name, rule_kinds, rule_severities, rule_jurisdictions, chain in rules:
+            if rule_kinds and kind not in rule_kinds or rule_severities and severity not in rule_severities:
+                continue
+            candidates.append((name, rule_jurisdictions, chain))
+            if not rule_jurisdictions:
+                break
+
+        bits: Dict[str, int] = {}
+        for _, rule_jurisdictions, _ in candidates:
+            for code in rule_jurisdictions:
+                bits.setdefault(code, 1 << len(bits))
+        if len(bits) > MAX_CELL_JURISDICTIONS:
+            raise ApprovalError(f"Rules for {kind}/{severity} condition on {len(bits)} jurisdictions "
+                                f"(at most {MAX_CELL_JURISDICTIONS})")
+        masks = [sum(bits[code] for code in rule_jurisdictions) for _, rule_jurisdictions, _ in candidates]
+
+        table = []
+        for mask in range(1 << len(bits)):
+            for (name, _, chain), rule_mask in zip(candidates, masks):
+                if not rule_mask or rule_mask & mask:
+                    break
+            table.append(outcome_ids.setdefault((name, chain), len(outcome_ids)))
+        cells[(kind, severity)] = _Cell(bits, table)
+
+    outcomes = sorted(outcome_ids, key=outcome_ids.get)
+    return CompiledPolicy(cells, outcomes)
+
+
+class ApprovalEvent(BaseModel):
+    type: str  # approval.routed | approval.advanced | approval.approved | approval.rejected | approval.withdrawn
+    incident_id: str
+    artifact_id: str
+    artifact_kind: str
+    rule: str
+    required_order: List[str]
+    status: str
+    previous_status: Optional[str] = None
+    order_idx: Optional[int] = None  # next step awaiting a decision (1-based)
+    role_required: Optional[str] = None
+    actor: Optional[str] = None
+    comment: Optional[str] = None
+    incident_ready: bool
+    at: datetime
+
+
+class _Route:
+    __slots__ = ("incident_id", "artifact_id", "kind", "rule", "chain", "step", "status", "decisions", "routed_at",
+                 "version")
+
+    def __init__(self, incident_id: str, artifact_id: str, kind: str, rule: str, chain: Tuple[str, ...],
+                 routed_at: datetime, step: int = 0, status: Optional[str] = None,
+                 decisions: Optional[List[Dict[str, Any]]] = None, version: int = 1):
+        self.incident_id = incident_id
+        self.artifact_id = artifact_id
+        self.kind = kind
+        self.rule = rule
+        self.chain = chain
+        self.step = step
+        self.status = status or (PENDING if chain else NOT_REQUIRED)
+        self.decisions = decisions or []
+        self.routed_at = routed_at
+        self.version = version  # bumped on every transition, for conditional writes to a shared store
+
+    @property
+    def waiting_on(self) -> Optional[str]:
+        return self.chain[self.step] if self.status == PENDING else None
+
+    @property
+    def settled(self) -> bool:
+        return self.status in (APPROVED, NOT_REQUIRED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "incident_id": self.incident_id,
+            "artifact_id": self.artifact_id,
+            "artifact_kind": self.kind,
+            "rule": self.rule,
+            "required_order": list(self.chain),
+            "status": self.status,
+            "order_idx": self.step + 1 if self.status == PENDING else None,
+            "role_required": self.waiting_on,
+            "decisions": self.decisions,
+            "routed_at": self.routed_at.isoformat(),
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Route":
+        status = data["status"]
+        chain = tuple(data["required_order"])
+        step = data["order_idx"] - 1 if status == PENDING else len(data["decisions"])
+        return cls(data["incident_id"], data["artifact_id"], data["artifact_kind"], data["rule"], chain,
+                   datetime.fromisoformat(data["routed_at"]), step, status, data["decisions"], data.get("version", 1))
+
+
+class ApprovalEngine:
+    """Approval state machines of every routed artifact, across incidents.
+
+    A route is ``pending`` at step ``i`` until the role ``required_order[i]``
+    decides: approval moves it to the next step, or to ``approved`` after the
+    last one; rejection ends it as ``rejected`` until the artifact is routed
+    again (e.g. after revision), which restarts the chain. Every transition is
+    O(1) and returns the ``ApprovalEvent`` describing it.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], _Route] = {}
+        self._by_incident: Dict[str, Dict[str, _Route]] = {}
+        # role -> routes waiting on it, oldest first (dict as ordered set)
+        self._waiting: Dict[str, Dict[Tuple[str, str], None]] = {role: {} for role in ROLES}
+        # incident -> routes not yet approved
+        self._outstanding: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def _index(self, route: _Route) -> None:
+        key = (route.incident_id, route.artifact_id)
+        self._routes[key] = route
+        self._by_incident.setdefault(route.incident_id, {})[route.artifact_id] = route
+        if route.waiting_on:
+            self._waiting[route.waiting_on][key] = None
+        if not route.settled:
+            self._outstanding[route.incident_id] = self._outstanding.get(route.incident_id, 0) + 1
+
+    def _unindex(self, route: _Route) -> None:
+        key = (route.incident_id, route.artifact_id)
+        del self._routes[key]
+        routes = self._by_incident[route.incident_id]
+        del routes[route.artifact_id]
+        if not routes:
+            del self._by_incident[route.incident_id]
+        if route.waiting_on:
+            del self._waiting[route.waiting_on][key]
+        if not route.settled:
+            self._outstanding[route.incident_id] -= 1
+            if not self._outstanding[route.incident_id]:
+                del self._outstanding[route.incident_id]
+
+    def ready(self, incident_id: str) -> bool:
+        """True once an incident has routed artifacts and all of them are approved (or need no approval)."""
+        return incident_id in self._by_incident and not self._outstanding.get(incident_id)
+
+    def _event(self, event_type: str, route: _Route, previous: Optional[str], at: datetime,
+               actor: Optional[str] = None, comment: Optional[str] = None) -> ApprovalEvent:
+        return ApprovalEvent(
+            type=event_type,
+            incident_id=route.incident_id,
+            artifact_id=route.artifact_id,
+            artifact_kind=route.kind,
+            rule=route.rule,
+            required_order=list(route.chain),
+            status=route.status,
+            previous_status=previous,
+            order_idx=route.step + 1 if route.status == PENDING else None,
+            role_required=route.waiting_on,
+            actor=actor,
+            comment=comment,
+            incident_ready=self.ready(route.incident_id),
+            at=at,
+        )
+
+    def route(self, incident_id: str, artifact_id: str, artifact_kind: str, rule: str, chain: Sequence[str],
+              now: Optional[datetime] = None) -> ApprovalEvent:
+        """Start an artifact's approval chain, restarting it if the artifact was routed before."""
+        chain = _roles(chain, "explicit")
+        now = now or datetime.utcnow()
+        previous = self._routes.get((incident_id, artifact_id))
+        if previous is not None:
+            self._unindex(previous)
+        route = _Route(incident_id, artifact_id, artifact_kind, rule, chain, now,
+                       version=previous.version + 1 if previous else 1)
+        self._index(route)
+        return self._event("approval.routed", route, previous.status if previous else None, now)
+
+    def decide(self, incident_id: str, artifact_id: str, order_idx: int, role: str, decision: str,
+               user_id: Optional[str] = None, comment: Optional[str] = None,
+               now: Optional[datetime] = None) -> ApprovalEvent:
+        """Apply a decision on step ``order_idx``, which must be the step awaiting ``role``."""
+        if decision not in DECISIONS:
+            raise ApprovalError(f"Decision must be one of {DECISIONS}, not {decision!r}")
+        route = self._routes.get((incident_id, artifact_id))
+        if route is None:
+            raise ApprovalError(f"Artifact {artifact_id} has no approval route")
+        if route.status != PENDING:
+            raise ApprovalError(f"Artifact {artifact_id} is {route.status}; route it again to restart approvals")
+        if order_idx != route.step + 1:
+            raise ApprovalError(f"Artifact {artifact_id} awaits step {route.step + 1}/{len(route.chain)}, not {order_idx}")
+        if role != route.waiting_on:
+            raise ApprovalError(f"Step {order_idx} of artifact {artifact_id} requires {route.waiting_on}, not {role}")
+
+        now = now or datetime.utcnow()
+        self._unindex(route)
+        route.decisions.append({"order_idx": order_idx, "role": role, "user_id": user_id, "decision": decision,
+                                "comment": comment, "acted_at": now.isoformat()})
+        if decision == REJECTED:
+            route.status = REJECTED
+        else:
+            route.step += 1
+            if route.step == len(route.chain):
+                route.status = APPROVED
+        route.version += 1
+        self._index(route)
+        event_type = "approval.advanced" if route.status == PENDING else f"approval.{route.status}"
+        return self._event(event_type, route, PENDING, now, actor=user_id, comment=comment)
+
+    def withdraw(self, incident_id: str, artifact_id: str, now: Optional[datetime] = None) -> Optional[ApprovalEvent]:
+        """Drop an artifact's route (artifact deleted or channel disabled)."""
+        route = self._routes.get((incident_id, artifact_id))
+        if route is None:
+            return None
+        self._unindex(route)
+        previous, route.status = route.status, "withdrawn"
+        route.version += 1
+        return self._event("approval.withdrawn", route, previous, now or datetime.utcnow())
+
+    def cancel_incident(self, incident_id: str) -> int:
+        """Drop every route of an incident (e.g. on archive)."""
+        routes = list(self._by_incident.get(incident_id, {}).values())
+        for route in routes:
+            self._unindex(route)
+        return len(routes)
+
+    def version(self, incident_id: str, artifact_id: str) -> int:
+        """Version of an artifact's route, 0 when it has none."""
+        route = self._routes.get((incident_id, artifact_id))
+        return route.version if route is not None else 0
+
+    def get(self, incident_id: str, artifact_id: str) -> Optional[Dict[str, Any]]:
+        route = self._routes.get((incident_id, artifact_id))
+        return route.to_dict() if route is not None else None
+
+    def incident(self, incident_id: str) -> List[Dict[str, Any]]:
+        """Routes of one incident."""
+        return [route.to_dict() for route in self._by_incident.get(incident_id, {}).values()]
+
+    def waiting_on(self, role: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Routes whose next step needs ``role``, oldest first."""
+        keys = itertools.islice(self._waiting.get(role, {}), limit)
+        return [self._routes[key].to_dict() for key in keys]
+
+    def pending_count(self, role: Optional[str] = None) -> int:
+        if role is not None:
+            return len(self._waiting.get(role, {}))
+        return sum(len(waiting) for waiting in self._waiting.values())
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Restore routes from ``get``/``incident`` records."""
+        count = 0
+        for record in records:
+            route = _Route.from_dict(record)
+            existing = self._routes.get((route.incident_id, route.artifact_id))
+            if existing is not None:
+                self._unindex(existing)
+            self._index(route)
+            count += 1
+        return count
+
+    def replace_incident(self, incident_id: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Replace an incident's routes with ``records``, e.g. as re-read from a shared store."""
+        self.cancel_incident(incident_id)
+        return self.load(records)
@@ -0,0 +1,270 @@
+# Created automatically by Cursor AI (2024-12-19)
+import base64
+import hashlib
+import math
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from prometheus_client import Counter
+
+DEDUP_ITEMS = Counter("mention_dedup_items_total", "Mentions seen by the dedup stage", ["result"])
+_UNIQUE = DEDUP_ITEMS.labels("unique")
+_DUPLICATE = DEDUP_ITEMS.labels("duplicate")
+
+# Canonical source name for the spellings feeds use
+SOURCE_ALIASES: Dict[str, str] = {
+    "twitter": "twitter", "x": "twitter", "tw": "twitter", "tweet": "twitter",
+    "twitter.com": "twitter", "x.com": "twitter", "t.co": "twitter", "mobile.twitter.com": "twitter",
+    "reddit": "reddit", "reddit.com": "reddit", "old.reddit.com": "reddit", "redd.it": "reddit",
+    "facebook": "facebook", "fb": "facebook", "facebook.com": "facebook", "m.facebook.com": "facebook",
+    "instagram": "instagram", "ig": "instagram", "instagram.com": "instagram",
+    "linkedin": "linkedin", "linkedin.com": "linkedin", "lnkd.in": "linkedin",
+    "tiktok": "tiktok", "tiktok.com": "tiktok",
+    "youtube": "youtube", "yt": "youtube", "youtube.com": "youtube", "youtu.be": "youtube",
+    "mastodon": "mastodon", "threads": "threads", "threads.net": "threads",
+    "news": "news", "rss": "news", "google news": "news", "news.google.com": "news",
+}
+
+# Fields that carry the platform's own post id, in order of preference
+SOURCE_ID_FIELDS = ("source_id", "post_id", "tweet_id", "external_id", "url")
+
+_RETWEET = re.compile(r"^(?:rt|mt)\s+@\w+:?\s*")
+_VIA = re.compile(r"\s+(?:via|h/t)\s+@\w+\s*$")
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_NON_WORD = re.compile(r"[^\w@#]+")
+
+
+def canonical_source(source: Optional[str], url: Optional[str] = None) -> str:
+    """Map feed-specific source labels (or the post URL's host) to one name."""
+    raw = (source or "").strip().lower()
+    if raw in SOURCE_ALIASES:
+        return SOURCE_ALIASES[raw]
+    host = urlparse(url).hostname if url else None
+    if not host and "." in raw:
+        host = urlparse(raw if "//" in raw else f"//{raw}").hostname
+    if host:
+        host = host[4:] if host.startswith("www.") else host
+        return SOURCE_ALIASES.get(host, host)
+    return raw or "unknown"
+
+
+def normalize_mention(text: str) -> str:
+    """Text key for syndicated copies: drops retweet/via wrappers, links and punctuation."""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    text = text.lower().strip()
+    # Cheap substring checks keep the common case to a single regex pass
+    if text.startswith(("rt ", "mt ")):
+        text = _RETWEET.sub("", text)
+    if "via " in text or "h/t " in text:
+        text = _VIA.sub("", text)
+    if "http" in text or "www." in text:
+        text = _URL.sub(" ", text)
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for ``capacity`` items at ``error_rate``."""
+
+    __slots__ = ("capacity", "num_bits", "num_hashes", "bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: bytes) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def contains(self, positions: List[int]) -> bool:
+        bits = self.bits
+        for p in positions:
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add(self, positions: List[int]) -> None:
+        bits = self.bits
+        for p in positions:
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "count": self.count, "bits": base64.b64encode(zlib.compress(self.bits)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], error_rate: float) -> "BloomFilter":
+        bloom = cls(data["capacity"], error_rate)
+        bloom.bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        bloom.count = data["count"]
+        return bloom
+
+
+class RotatingBloomFilter:
+    """Time-partitioned Bloom filter: remembers keys for about ``window_seconds``.
+
+    Keys go into the newest of ``partitions`` filters and lookups check all of
+    them. The oldest partition is recycled when the newest one's time slice
+    ends or it reaches capacity, so memory never grows and the false-positive
+    rate stays near ``error_rate`` (each partition gets an equal share)
+    whatever the feed rate. Under overload the dedup window shrinks instead.
+    """
+
+    def __init__(self, window_seconds: float, partitions: int, capacity: int, error_rate: float):
+        self.partition_seconds = window_seconds / partitions
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(capacity, error_rate / partitions) for _ in range(partitions)]
+        self.current = 0
+        self.slice = None
+
+    def _rotate(self, ts: float) -> None:
+        slice_ = int(ts // self.partition_seconds)
+        if self.slice is None:
+            self.slice = slice_
+            return
+        newest = self.filters[self.current]
+        elapsed = slice_ - self.slice
+        if elapsed <= 0 and newest.count < newest.capacity:
+            return
+        # Recycle one partition per elapsed slice (or one if the newest is full)
+        for _ in range(max(1, min(elapsed, len(self.filters)))):
+            self.current = (self.current + 1) % len(self.filters)
+            self.filters[self.current].clear()
+        self.slice = max(self.slice, slice_)
+
+    def add(self, keys: Iterable[bytes], ts: float) -> bool:
+        """Record the keys; True if any was (probably) seen inside the window."""
+        self._rotate(ts)
+        newest = self.filters[self.current]
+        active = [f for f in self.filters if f.count]
+        seen = False
+        for key in keys:
+            positions = newest.positions(key)
+            for f in active:
+                if f.contains(positions):
+                    seen = True
+                    break
+            else:
+                newest.add(positions)
+        return seen
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "partition_seconds": self.partition_seconds,
+            "error_rate": self.error_rate,
+            "current": self.current,
+            "slice": self.slice,
+            "filters": [f.to_dict() for f in self.filters],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RotatingBloomFilter":
+        rotating = cls.__new__(cls)
+        rotating.partition_seconds = data["partition_seconds"]
+        rotating.error_rate = data["error_rate"]
+        rotating.current = data["current"]
+        rotating.slice = data["slice"]
+        share = data["error_rate"] / len(data["filters"])
+        rotating.filters = [BloomFilter.from_dict(f, share) for f in data["filters"]]
+        return rotating
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
+
+
+class MentionDeduplicator:
+    """Per-incident dedup of raw feed items by platform post id and normalized text."""
+
+    def __init__(
+        self,
+        window_seconds: float = 3600.0,
+        partitions: int = 4,
+        capacity: int = 10000,
+        error_rate: float = 0.001,
+        min_text_length: int = 24,
+    ):
+        self.window_seconds = window_seconds
+        self.partitions = partitions
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.min_text_length = min_text_length
+        self._filters: Dict[str, RotatingBloomFilter] = {}
+        self._last_seen: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._filters)
+
+    def keys(self, item: Dict[str, Any], source: str) -> List[bytes]:
+        keys: List[bytes] = []
+        for field in SOURCE_ID_FIELDS:
+            value = item.get(field)
+            if value:
+                keys.append(f"id:{source}:{value}".encode("utf-8"))
+                break
+        text = normalize_mention(item.get("text", ""))
+        # Very short texts ("so bad") repeat without being the same post
+        if len(text) >= self.min_text_length:
+            keys.append(f"text:{text}".encode("utf-8"))
+        return keys
+
+    def filter(self, incident_id: str, items: Iterable[Dict[str, Any]], ts: float) -> Tuple[List[Dict[str, Any]], int]:
+        """Unique items (with ``source`` canonicalized) and the number of duplicates dropped."""
+        bloom = self._filters.get(incident_id)
+        if bloom is None:
+            bloom = self._filters[incident_id] = RotatingBloomFilter(
+                self.window_seconds, self.partitions, self.capacity, self.error_rate
+            )
+        self._last_seen[incident_id] = ts
+
+        unique: List[Dict[str, Any]] = []
+        duplicates = 0
+        for item in items:
+            source = canonical_source(item.get("source"), item.get("url"))
+            keys = self.keys(item, source)
+            if keys and bloom.add(keys, ts):
+                duplicates += 1
+                continue
+            unique.append({**item, "source": source})
+        _UNIQUE.inc(len(unique))
+        if duplicates:
+            _DUPLICATE.inc(duplicates)
+        return unique, duplicates
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._filters
+
+    def incidents(self) -> List[str]:
+        return list(self._filters)
+
+    def export(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an incident's filter and return it JSON-serializable, e.g. for another shard."""
+        if incident_id not in self._filters:
+            return None
+        return {"filter": self._filters.pop(incident_id).to_dict(), "last_seen": self._last_seen.pop(incident_id)}
+
+    def restore(self, incident_id: str, data: Dict[str, Any]) -> None:
+        self._filters[incident_id] = RotatingBloomFilter.from_dict(data["filter"])
+        self._last_seen[incident_id] = data["last_seen"]
+
+    def expire(self, now: float) -> int:
+        """Drop incidents idle for longer than the dedup window."""
+        stale = [key for key, ts in self._last_seen.items() if now - ts > self.window_seconds]
+        for key in stale:
+            del self._filters[key]
+            del self._last_seen[key]
+        return len(stale)
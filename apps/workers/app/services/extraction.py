@@ -0,0 +1,342 @@
+# Created automatically by Cursor AI (2024-12-19)
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+CONFIDENCE_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Gazetteers: surface form -> (canonical value, confidence)
+DATA_TYPES: Dict[str, Tuple[str, str]] = {
+    "email": ("email", "medium"),
+    "emails": ("email", "medium"),
+    "email address": ("email", "high"),
+    "email addresses": ("email", "high"),
+    "password": ("password", "high"),
+    "passwords": ("password", "high"),
+    "password hashes": ("password", "high"),
+    "hashed passwords": ("password", "high"),
+    "credentials": ("password", "medium"),
+    "phone number": ("phone", "high"),
+    "phone numbers": ("phone", "high"),
+    "home address": ("address", "high"),
+    "home addresses": ("address", "high"),
+    "postal address": ("address", "high"),
+    "postal addresses": ("address", "high"),
+    "date of birth": ("date_of_birth", "high"),
+    "dates of birth": ("date_of_birth", "high"),
+    "social security number": ("ssn", "high"),
+    "social security numbers": ("ssn", "high"),
+    "ssn": ("ssn", "high"),
+    "ssns": ("ssn", "high"),
+    "national insurance number": ("national_id", "high"),
+    "national insurance numbers": ("national_id", "high"),
+    "passport": ("national_id", "medium"),
+    "passport numbers": ("national_id", "high"),
+    "driver's license": ("national_id", "high"),
+    "credit card": ("payment_card", "high"),
+    "credit cards": ("payment_card", "high"),
+    "credit card numbers": ("payment_card", "high"),
+    "card numbers": ("payment_card", "high"),
+    "payment card": ("payment_card", "high"),
+    "cvv": ("payment_card", "high"),
+    "bank account": ("financial", "high"),
+    "bank accounts": ("financial", "high"),
+    "iban": ("financial", "high"),
+    "financial data": ("financial", "medium"),
+    "medical records": ("health", "high"),
+    "health records": ("health", "high"),
+    "health data": ("health", "high"),
+    "phi": ("health", "medium"),
+    "biometric": ("biometric", "medium"),
+    "biometric data": ("biometric", "high"),
+    "ip addresses": ("ip_address", "medium"),
+    "api keys": ("secret", "high"),
+    "access tokens": ("secret", "high"),
+    "personal data": ("personal_data", "low"),
+    "pii": ("personal_data", "medium"),
+}
+
+SYSTEMS: Dict[str, Tuple[str, str]] = {
+    "database": ("database", "low"),
+    "production database": ("database", "medium"),
+    "s3 bucket": ("s3", "high"),
+    "s3": ("s3", "medium"),
+    "crm": ("crm", "medium"),
+    "salesforce": ("salesforce", "high"),
+    "zendesk": ("zendesk", "high"),
+    "jira": ("jira", "high"),
+    "slack": ("slack", "high"),
+    "vpn": ("vpn", "medium"),
+    "active directory": ("active_directory", "high"),
+    "okta": ("okta", "high"),
+    "github": ("github", "high"),
+    "gitlab": ("gitlab", "high"),
+    "data warehouse": ("data_warehouse", "medium"),
+    "snowflake": ("snowflake", "high"),
+    "elasticsearch": ("elasticsearch", "high"),
+    "mongodb": ("mongodb", "high"),
+    "payment gateway": ("payment_gateway", "medium"),
+    "mobile app": ("mobile_app", "medium"),
+    "customer portal": ("customer_portal", "medium"),
+    "email server": ("email_server", "medium"),
+    "backup server": ("backups", "medium"),
+    "backups": ("backups", "low"),
+}
+
+# Regulator -> (canonical name, confidence); jurisdiction codes for the
+# canonical names live in REGULATOR_JURISDICTIONS.
+REGULATORS: Dict[str, Tuple[str, str]] = {
+    "ico": ("ICO", "medium"),
+    "information commissioner's office": ("ICO", "high"),
+    "cnil": ("CNIL", "high"),
+    "data protection commission": ("DPC", "high"),
+    "dpc": ("DPC", "medium"),
+    "edpb": ("EDPB", "high"),
+    "ftc": ("FTC", "high"),
+    "federal trade commission": ("FTC", "high"),
+    "sec": ("SEC", "medium"),
+    "securities and exchange commission": ("SEC", "high"),
+    "hhs": ("HHS OCR", "medium"),
+    "ocr": ("HHS OCR", "low"),
+    "office for civil rights": ("HHS OCR", "high"),
+    "california attorney general": ("California AG", "high"),
+    "attorney general": ("Attorney General", "low"),
+    "oaic": ("OAIC", "high"),
+    "opc": ("OPC", "medium"),
+    "privacy commissioner of canada": ("OPC", "high"),
+    "pdpc": ("PDPC", "high"),
+    "bfdi": ("BfDI", "high"),
+    "garante": ("Garante", "high"),
+    "aepd": ("AEPD", "high"),
+}
+
+REGULATOR_JURISDICTIONS: Dict[str, str] = {
+    "ICO": "UK",
+    "CNIL": "FR",
+    "DPC": "IE",
+    "EDPB": "EU",
+    "FTC": "US",
+    "SEC": "US",
+    "HHS OCR": "US",
+    "California AG": "US-CA",
+    "OAIC": "AU",
+    "OPC": "CA",
+    "PDPC": "SG",
+    "BfDI": "DE",
+    "Garante": "IT",
+    "AEPD": "ES",
+}
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Surface forms of month names: full names and abbreviations only
+MONTH_NAMES = [
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december", *MONTHS, "sept",
+]
+
+SCALES = {"k": 1_000, "thousand": 1_000, "m": 1_000_000, "million": 1_000_000, "bn": 1_000_000_000, "billion": 1_000_000_000}
+
+_GAZETTEER: Dict[str, Tuple[str, str, str]] = {}
+for _label, _table in (("data_type", DATA_TYPES), ("system", SYSTEMS), ("regulator", REGULATORS)):
+    for _surface, (_canonical, _confidence) in _table.items():
+        _GAZETTEER[_surface] = (_label, _canonical, _confidence)
+
+# Units that make a number a count of affected people or records ("rows" is
+# not one: log lines report rows scanned or returned)
+UNITS = ("records", "users", "customers", "accounts", "individuals", "people", "patients", "employees", "members", "subscribers")
+
+# Short terms that are ordinary words or other abbreviations in lower case
+# ("sec", "phi", "ocr"): they only count when written as upper-case acronyms
+ACRONYMS = {"phi", "ico", "sec", "ocr", "hhs", "dpc", "opc"}
+
+# An acronym regulator keeps its confidence only next to a notification cue;
+# "SEC" or "ICO" alone may be anything
+REGULATOR_CUE = re.compile(
+    r"\b(?:notif(?:y|ied|ying|ication)|report(?:ed|ing)?\s+(?:it\s+|this\s+)?to|regulators?|supervisory"
+    r"|authorit(?:y|ies)|filed|filing|informed|contacted)\b"
+)
+_CUE_WINDOW = 60
+
+# Facts below this confidence stay in ``facts`` for review but never set the
+# record count, data types, systems, regulators or jurisdictions
+MIN_SUMMARY_CONFIDENCE = "medium"
+
+def _trie_pattern(terms) -> str:
+    """Prefix-factored alternation, so the regex engine branches once per character."""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+_MONTH_RE = _trie_pattern(MONTH_NAMES) + r"\b\.?"
+
+# Single master pattern over the lowercased text: every fact kind is a named
+# alternative, so the document is scanned exactly once with finditer. Counts
+# are anchored on their (rare) unit word and parsed backwards from there,
+# which keeps digit-heavy logs cheap to scan.
+_MASTER = re.compile(
+    r"\b(?:"
+    r"(?P<iso>\d{4}-\d{2}-\d{2})"
+    r"|(?P<dmy>\d{1,2}(?:st|nd|rd|th)?\s+" + _MONTH_RE + r"\s+\d{4})"
+    r"|(?P<mdy>" + _MONTH_RE + r"\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4})"
+    r"|(?P<term>" + _trie_pattern(_GAZETTEER) + r")"
+    r"|(?P<unit>" + _trie_pattern(UNITS) + r")"
+    r")\b"
+)
+
+_COUNT_BEFORE = re.compile(
+    r"(?<![\w.,])"
+    r"(?:(?P<approx>approximately|about|around|roughly|nearly|almost|over|more than|up to|an estimated|estimated)\s+)?"
+    r"(?P<num>\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(?P<scale>thousand|million|billion|bn|k|m)?\s+"
+    r"(?:[a-z][\w-]*\s+){0,2}$"
+)
+
+_COUNT_WINDOW = 80
+
+# A-Z -> a-z only, so offsets in the lowered text match the original
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+_DIGITS = re.compile(r"\d+")
+
+
+class ExtractedFact(BaseModel):
+    label: str
+    value: str
+    confidence: str
+    source: str = "description"
+    start: int
+    end: int
+
+
+class ExtractionResult(BaseModel):
+    facts: List[ExtractedFact]
+    record_count: Optional[int] = None
+    record_count_exact: bool = False
+    data_types: List[str]
+    systems: List[str]
+    regulators: List[str]
+    jurisdictions: List[str]
+    dates: List[str]
+
+
+def _count_before(lowered: str, start: int) -> Optional[re.Match]:
+    return _COUNT_BEFORE.search(lowered, max(0, start - _COUNT_WINDOW), start)
+
+
+def _parse_count(match: re.Match) -> int:
+    value = float(match.group("num").replace(",", ""))
+    scale = match.group("scale")
+    if scale:
+        value *= SCALES[scale.lower()]
+    return int(value)
+
+
+def _parse_date(text: str) -> Optional[str]:
+    try:
+        if "-" in text:
+            return datetime.strptime(text, "%Y-%m-%d").date().isoformat()
+        parts = _DIGITS.findall(text)
+        month_word = re.search(r"[a-z]{3}", text).group(0)
+        day, year = (int(parts[0]), int(parts[1]))
+        return datetime(year, MONTHS[month_word], day).date().isoformat()
+    except (ValueError, KeyError, AttributeError, IndexError):
+        return None
+
+
+def _has_cue(lowered: str, start: int, end: int) -> bool:
+    return REGULATOR_CUE.search(lowered, max(0, start - _CUE_WINDOW), end + _CUE_WINDOW) is not None
+
+
+def extract_facts(text: str, min_confidence: str = MIN_SUMMARY_CONFIDENCE) -> ExtractionResult:
+    """Extract record counts, data types, dates, systems and regulators from free text.
+
+    Every match is returned in ``facts``; the summary fields (``record_count``,
+    ``data_types``, ``systems``, ``regulators``, ``jurisdictions``) only use
+    facts at or above ``min_confidence``.
+    """
+    best: Dict[Tuple[str, str], ExtractedFact] = {}
+    counts: List[Tuple[int, bool, str]] = []
+
+    def keep(label: str, value: str, confidence: str, start: int, end: int) -> None:
+        key = (label, value)
+        current = best.get(key)
+        if current is None or CONFIDENCE_RANK[confidence] > CONFIDENCE_RANK[current.confidence]:
+            best[key] = ExtractedFact(label=label, value=value, confidence=confidence, start=start, end=end)
+
+    lowered = text.translate(_ASCII_LOWER)
+    parsed_dates: Dict[str, Optional[str]] = {}
+
+    for match in _MASTER.finditer(lowered):
+        kind = match.lastgroup
+        raw = match.group(kind)
+        start, end = match.span()
+
+        if kind == "term":
+            label, canonical, confidence = _GAZETTEER[raw]
+            if raw in ACRONYMS:
+                if text[start:end] != raw.upper():
+                    continue
+                if label == "regulator" and not _has_cue(lowered, start, end):
+                    confidence = "low"
+            keep(label, canonical, confidence, start, end)
+            if raw.rsplit(" ", 1)[-1] not in UNITS:
+                continue
+            kind = "unit"
+
+        if kind == "unit":
+            count_match = _count_before(lowered, start)
+            if count_match:
+                count = _parse_count(count_match)
+                exact = not count_match.group("approx") and not count_match.group("scale")
+                confidence = "high" if exact else "medium"
+                keep("record_count", str(count), confidence, count_match.start(), end)
+                counts.append((count, exact, confidence))
+            continue
+
+        if raw not in parsed_dates:
+            parsed_dates[raw] = _parse_date(raw)
+        if parsed_dates[raw]:
+            keep("date", parsed_dates[raw], "high" if kind == "iso" else "medium", start, end)
+
+    floor = CONFIDENCE_RANK[min_confidence]
+    facts = sorted(best.values(), key=lambda f: f.start)
+    confident = [f for f in facts if CONFIDENCE_RANK[f.confidence] >= floor]
+    record_count: Optional[int] = None
+    record_count_exact = False
+    for count, exact, confidence in counts:
+        if CONFIDENCE_RANK[confidence] >= floor and (record_count is None or count > record_count):
+            record_count, record_count_exact = count, exact
+    regulators = [f.value for f in confident if f.label == "regulator"]
+    jurisdictions = []
+    for regulator in regulators:
+        code = REGULATOR_JURISDICTIONS.get(regulator)
+        if code and code not in jurisdictions:
+            jurisdictions.append(code)
+
+    return ExtractionResult(
+        facts=facts,
+        record_count=record_count,
+        record_count_exact=record_count_exact,
+        data_types=[f.value for f in confident if f.label == "data_type"],
+        systems=[f.value for f in confident if f.label == "system"],
+        regulators=regulators,
+        jurisdictions=jurisdictions,
+        dates=[f.value for f in facts if f.label == "date"],
+    )
@@ -0,0 +1,244 @@
+# Created automatically by Cursor AI (2024-12-19)
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = structlog.get_logger()
+
+INGEST_MENTIONS = Counter("ingest_mentions_total", "Feed items handed to batch processing", ["source"])
+INGEST_INVALID = Counter("ingest_invalid_total", "Feed messages that could not be decoded", ["source"])
+INGEST_BATCH_SIZE = Histogram(
+    "ingest_batch_size",
+    "Items per micro-batch",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+INGEST_BATCH_SECONDS = Histogram("ingest_batch_seconds", "Micro-batch processing time")
+INGEST_QUEUE_DEPTH = Gauge("ingest_queue_depth", "Items waiting for a batch")
+
+_END = object()
+
+
+def decode_items(payload: bytes, incident_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """A message is one mention object or a JSON array of them."""
+    data = json.loads(payload)
+    items = data if isinstance(data, list) else [data]
+    if incident_id:
+        for item in items:
+            item.setdefault("incident_id", incident_id)
+    return [item for item in items if isinstance(item, dict) and item.get("incident_id")]
+
+
+class FeedSource:
+    """Async stream of raw mention dicts (each carrying ``incident_id``)."""
+
+    name = "unknown"
+
+    def items(self) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySource(FeedSource):
+    """In-process stand-in: push items from the same process, or replay an iterable."""
+
+    name = "memory"
+
+    def __init__(self, initial: Iterable[Dict[str, Any]] = (), maxsize: int = 0):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._initial = initial
+
+    async def push(self, item: Dict[str, Any]) -> None:
+        await self._queue.put(item)
+
+    async def items(self) -> AsyncIterator[Dict[str, Any]]:
+        for item in self._initial:
+            yield item
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                return
+            yield item
+
+    async def close(self) -> None:
+        await self._queue.put(_END)
+
+
+class FileSource(FeedSource):
+    """NDJSON file, one mention (or array of mentions) per line; ``follow`` tails it."""
+
+    name = "file"
+
+    def __init__(self, path: str, follow: bool = False, poll_interval: float = 0.2, chunk_bytes: int = 1 << 20):
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.chunk_bytes = chunk_bytes
+        self._closed = False
+
+    async def items(self) -> AsyncIterator[Dict[str, Any]]:
+        with open(self.path, "rb") as f:
+            while not self._closed:
+                lines = await asyncio.to_thread(f.readlines, self.chunk_bytes)
+                if not lines:
+                    if not self.follow:
+                        return
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        for item in decode_items(line):
+                            yield item
+                    except ValueError:
+                        INGEST_INVALID.labels(self.name).inc()
+
+    async def close(self) -> None:
+        self._closed = True
+
+
+class NatsSource(FeedSource):
+    """Core NATS subscription; a queue group spreads subjects across ingest processes.
+
+    Publishers send to ``<subject>.<incident_id>`` (or include ``incident_id``
+    in the body). When the batch queue is full the subscription stops being
+    drained and NATS buffers up to ``pending_msgs_limit`` before flagging a
+    slow consumer.
+    """
+
+    name = "nats"
+
+    def __init__(self, url: str, subject: str, queue_group: str = "", pending_msgs_limit: int = 65536):
+        self.url = url
+        self.subject = subject
+        self.queue_group = queue_group
+        self.pending_msgs_limit = pending_msgs_limit
+        self._nc = None
+        self._sub = None
+
+    async def items(self) -> AsyncIterator[Dict[str, Any]]:
+        import nats
+
+        self._nc = await nats.connect(self.url, name="crisis-crew-ingest")
+        self._sub = await self._nc.subscribe(
+            f"{self.subject}.>", queue=self.queue_group, pending_msgs_limit=self.pending_msgs_limit
+        )
+        logger.info("Subscribed to feed", url=self.url, subject=f"{self.subject}.>", queue_group=self.queue_group)
+        try:
+            async for msg in self._sub.messages:
+                incident_id = msg.subject[len(self.subject) + 1:] or None
+                try:
+                    for item in decode_items(msg.data, incident_id):
+                        yield item
+                except ValueError:
+                    INGEST_INVALID.labels(self.name).inc()
+        finally:
+            if self._nc is not None and not self._nc.is_closed:
+                await self._nc.drain()
+
+    async def close(self) -> None:
+        if self._sub is not None:
+            await self._sub.unsubscribe()
+
+
+class FeedIngestor:
+    """Reads a source into a bounded queue and processes it in micro-batches.
+
+    A batch is flushed when it reaches ``batch_size`` items or ``max_wait``
+    seconds after its first item, whichever comes first. The reader blocks on
+    a full queue, which pushes back on the source instead of buffering without
+    bound. Batches run in a worker thread so the event loop keeps reading
+    while the previous batch is processed.
+    """
+
+    def __init__(
+        self,
+        source: FeedSource,
+        process: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+        batch_size: int = 500,
+        max_wait: float = 0.2,
+        queue_size: int = 20000,
+    ):
+        self.source = source
+        self.process = process
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.processed = 0
+        self.batches = 0
+        self.error: Optional[Exception] = None
+
+    async def run(self) -> None:
+        """Consume until the source ends or ``stop`` is called, then drain what is queued."""
+        reader = asyncio.create_task(self._read())
+        try:
+            await self._consume()
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+        if self.error is not None:
+            raise self.error
+
+    async def stop(self) -> None:
+        await self.source.close()
+
+    async def _read(self) -> None:
+        try:
+            async for item in self.source.items():
+                await self._queue.put(item)
+        except Exception as e:
+            logger.error("Feed source failed", source=self.source.name, error=str(e))
+            self.error = e
+        # Lets the consumer drain what was read and finish
+        await self._queue.put(_END)
+
+    async def _consume(self) -> None:
+        while True:
+            batch, done = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if done:
+                return
+
+    async def _next_batch(self) -> Tuple[List[Dict[str, Any]], bool]:
+        item = await self._queue.get()
+        if item is _END:
+            return [], True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        INGEST_QUEUE_DEPTH.set(self._queue.qsize())
+        INGEST_BATCH_SIZE.observe(len(batch))
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.process, batch)
+        except Exception as e:
+            # A bad batch is logged and skipped; the stream keeps flowing
+            logger.error("Feed batch failed", size=len(batch), error=str(e))
+        INGEST_BATCH_SECONDS.observe(time.perf_counter() - started)
+        INGEST_MENTIONS.labels(self.source.name).inc(len(batch))
+        self.processed += len(batch)
+        self.batches += 1
@@ -0,0 +1,97 @@
+# Created automatically by Cursor AI (2024-12-19)
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _uuid(value: Optional[str]) -> Optional[str]:
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        # Free-text dates stay in the detected_at fact only
+        return None
+
+
+class PostgresIncidentStore:
+    """Bulk writes of normalized incidents and their facts, one transaction per chunk.
+
+    Each table gets one multi-row statement per chunk rather than a round trip
+    per row. Incidents are upserted and their facts, jurisdictions and data
+    categories replaced, so replaying an import (stable incident ids) updates
+    rather than duplicates.
+    """
+
+    def __init__(self, dsn: str):
+        import psycopg2
+        import psycopg2.extras
+
+        self._psycopg2 = psycopg2
+        self._extras = psycopg2.extras
+        self.dsn = dsn
+        self.conn = None
+
+    def _connect(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = self._psycopg2.connect(self.dsn)
+        return self.conn
+
+    def save(self, org_id: Optional[str], items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> int:
+        """Persist ``(incident, normalized facts)`` pairs; returns the number of incidents written."""
+        if not items:
+            return 0
+        org = _uuid(org_id)
+        incidents, facts, jurisdictions, categories = [], [], [], []
+        for incident, normalized in items:
+            incident_id = incident["id"]
+            incidents.append((incident_id, org, incident["title"], incident.get("type") or "other",
+                              normalized["severity"], _timestamp(incident.get("detected_at"))))
+            facts.extend((incident_id, f["label"], f["value"], f.get("confidence", "medium"), f.get("source"), False)
+                         for f in normalized["facts"])
+            facts.extend((incident_id, label, "", "low", "normalizer", True) for label in normalized["unknowns"])
+            jurisdictions.extend((incident_id, code) for code in normalized["jurisdictions"])
+            categories.extend((incident_id, category) for category in normalized["data_categories"])
+        ids = [row[0] for row in incidents]
+
+        conn = self._connect()
+        try:
+            with conn, conn.cursor() as cur:
+                self._extras.execute_values(
+                    cur,
+                    "INSERT INTO incidents (id, org_id, title, type, severity, detected_at) VALUES %s "
+                    "ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, type = EXCLUDED.type, "
+                    "severity = EXCLUDED.severity, detected_at = EXCLUDED.detected_at, updated_at = now()",
+                    incidents,
+                    page_size=len(incidents),
+                )
+                for table in ("incident_facts", "jurisdictions", "data_categories"):
+                    cur.execute(f"DELETE FROM {table} WHERE incident_id = ANY(%s::uuid[])", (ids,))
+                if facts:
+                    self._extras.execute_values(
+                        cur,
+                        "INSERT INTO incident_facts (incident_id, label, value, confidence, source, is_unknown) VALUES %s",
+                        facts,
+                        page_size=len(facts),
+                    )
+                if jurisdictions:
+                    self._extras.execute_values(
+                        cur, "INSERT INTO jurisdictions (incident_id, code) VALUES %s", jurisdictions, page_size=len(jurisdictions),
+                    )
+                if categories:
+                    self._extras.execute_values(
+                        cur, "INSERT INTO data_categories (incident_id, category) VALUES %s", categories, page_size=len(categories),
+                    )
+        except self._psycopg2.OperationalError:
+            self.conn.close()
+            raise
+        return len(incidents)
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
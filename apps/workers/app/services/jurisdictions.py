@@ -0,0 +1,79 @@
+# Created automatically by Cursor AI (2024-12-19)
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "jurisdictions.json"
+
+
+class Regulator(BaseModel):
+    name: str
+    contact: str
+
+
+class NotificationRule(BaseModel):
+    regulator_hours: Optional[int] = None
+    individuals: str
+    basis: str
+
+
+class Jurisdiction(BaseModel):
+    code: str
+    name: str
+    aliases: List[str] = []
+    regulators: List[Regulator] = []
+    notification: NotificationRule
+    risky_terms: Dict[str, str] = {}
+
+
+class JurisdictionIndex:
+    """Prebuilt lookup table of jurisdictions keyed by code and alias."""
+
+    def __init__(self, jurisdictions: Iterable[Jurisdiction]):
+        self._by_key: Dict[str, Jurisdiction] = {}
+        for jurisdiction in jurisdictions:
+            self._by_key[jurisdiction.code.lower()] = jurisdiction
+            self._by_key[jurisdiction.name.lower()] = jurisdiction
+        # Aliases never shadow a real code or name
+        for jurisdiction in list(self._by_key.values()):
+            for alias in jurisdiction.aliases:
+                self._by_key.setdefault(alias.lower(), jurisdiction)
+
+    @classmethod
+    def load(cls, path: Path) -> "JurisdictionIndex":
+        with open(path, "rb") as f:
+            data = json.load(f)
+        return cls(Jurisdiction(**item) for item in data["jurisdictions"])
+
+    def get(self, code_or_alias: str) -> Optional[Jurisdiction]:
+        return self._by_key.get(code_or_alias.strip().lower())
+
+    def canonical(self, codes: Iterable[str]) -> List[str]:
+        """Map codes/aliases to canonical codes, keeping unknown values as given."""
+        result: List[str] = []
+        for code in codes:
+            jurisdiction = self.get(code)
+            value = jurisdiction.code if jurisdiction else code
+            if value not in result:
+                result.append(value)
+        return result
+
+    def risky_terms(self, codes: Iterable[str]) -> Dict[str, str]:
+        """Merged jurisdiction-specific risky terms (term -> safe rewrite)."""
+        terms: Dict[str, str] = {}
+        for code in codes:
+            jurisdiction = self.get(code)
+            if jurisdiction:
+                terms.update(jurisdiction.risky_terms)
+        return terms
+
+
+@lru_cache(maxsize=1)
+def get_index() -> JurisdictionIndex:
+    """Process-wide index, parsed once on first use."""
+    return JurisdictionIndex.load(Path(settings.JURISDICTIONS_PATH or DEFAULT_PATH))
@@ -0,0 +1,387 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Provider-agnostic async LLM client shared by every task in a worker process.
+
+Each provider gets one pooled ``httpx.AsyncClient`` (keep-alive connections
+survive across tasks), a concurrency semaphore and a tokens-per-minute
+bucket. Completions are cached by prompt hash in a ``ResultCache`` (local
+LRU, optionally Redis). When a request runs past the provider's rolling p95
+latency and a concurrency slot is free, an identical hedge request is sent
+and the first answer wins. ``stream`` yields text deltas from the provider's
+server-sent events.
+
+Celery tasks are synchronous, so ``complete_sync`` runs requests on a
+process-wide event loop thread; the loop (and its connection pools) is
+created lazily in each prefork child, never inherited across fork.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import structlog
+from prometheus_client import Counter, Histogram
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.events import get_redis
+from app.core.memo import ResultCache
+
+logger = structlog.get_logger()
+
+LLM_REQUESTS = Counter("worker_llm_requests_total", "LLM calls by provider and outcome", ["provider", "result"])
+LLM_LATENCY = Histogram(
+    "worker_llm_request_duration_seconds",
+    "LLM HTTP request latency",
+    ["provider"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_TOKENS = Counter("worker_llm_tokens_total", "Tokens used by provider and direction", ["provider", "kind"])
+LLM_HEDGES = Counter("worker_llm_hedges_total", "Hedge requests sent and won", ["provider", "outcome"])
+
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "anthropic": "claude-3-5-haiku-latest"}
+
+
+class LLMError(RuntimeError):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMRequest(BaseModel):
+    prompt: str
+    system: Optional[str] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    max_tokens: int = 512
+    temperature: float = 0.0
+    cache: bool = True
+
+
+class LLMResponse(BaseModel):
+    text: str
+    provider: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+    hedged: bool = False
+    latency_ms: float = 0.0
+
+
+class OpenAIAdapter:
+    """Chat Completions wire format."""
+
+    path = "/chat/completions"
+
+    def headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def body(self, request: LLMRequest, model: str, stream: bool) -> Dict[str, Any]:
+        messages = [{"role": "system", "content": request.system}] if request.system else []
+        messages.append({"role": "user", "content": request.prompt})
+        return {"model": model, "messages": messages, "max_tokens": request.max_tokens,
+                "temperature": request.temperature, "stream": stream}
+
+    def parse(self, data: Dict[str, Any]) -> Tuple[str, int, int]:
+        usage = data.get("usage") or {}
+        return data["choices"][0]["message"]["content"], usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    def delta(self, event: Dict[str, Any]) -> Optional[str]:
+        choices = event.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
+
+
+class AnthropicAdapter:
+    """Messages API wire format."""
+
+    path = "/messages"
+
+    def headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        headers = {"anthropic-version": "2023-06-01"}
+        if api_key:
+            headers["x-api-key"] = api_key
+        return headers
+
+    def body(self, request: LLMRequest, model: str, stream: bool) -> Dict[str, Any]:
+        body = {"model": model, "messages": [{"role": "user", "content": request.prompt}],
+                "max_tokens": request.max_tokens, "temperature": request.temperature, "stream": stream}
+        if request.system:
+            body["system"] = request.system
+        return body
+
+    def parse(self, data: Dict[str, Any]) -> Tuple[str, int, int]:
+        usage = data.get("usage") or {}
+        text = "".join(block.get("text", "") for block in data.get("content", []))
+        return text, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    def delta(self, event: Dict[str, Any]) -> Optional[str]:
+        if event.get("type") == "content_block_delta":
+            return (event.get("delta") or {}).get("text")
+        return None
+
+
+ADAPTERS = {"openai": OpenAIAdapter, "anthropic": AnthropicAdapter}
+
+
+class TokenRateLimiter:
+    """Async token bucket refilled at ``tokens_per_minute``; charges may run into debt."""
+
+    def __init__(self, tokens_per_minute: float):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(tokens_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float) -> None:
+        tokens = min(tokens, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def adjust(self, tokens: float) -> None:
+        """Charge (or refund) the difference between the estimate and actual usage."""
+        self._refill()
+        self.tokens -= tokens
+
+
+class Provider:
+    """Connection pool, limits and latency history for one provider."""
+
+    def __init__(self, name: str, base_url: str, api_key: Optional[str], model: Optional[str]):
+        self.name = name
+        self.adapter = ADAPTERS[name]()
+        self.model = model or DEFAULT_MODELS[name]
+        self.api_key = api_key
+        self.http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=2 * settings.LLM_MAX_CONCURRENCY,
+                                max_keepalive_connections=2 * settings.LLM_MAX_CONCURRENCY),
+        )
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.limiter = TokenRateLimiter(settings.LLM_TOKENS_PER_MINUTE)
+        self.latencies: Deque[float] = deque(maxlen=200)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds before hedging: fixed if configured, else the rolling p95 once known."""
+        if settings.LLM_HEDGE_AFTER_MS < 0:
+            return None
+        if settings.LLM_HEDGE_AFTER_MS > 0:
+            return settings.LLM_HEDGE_AFTER_MS / 1000
+        if len(self.latencies) < 20:
+            return None
+        return float(np.percentile(self.latencies, 95))
+
+
+def _estimate_tokens(request: LLMRequest) -> int:
+    # ~4 characters per token, plus the completion budget
+    return (len(request.prompt) + len(request.system or "")) // 4 + request.max_tokens
+
+
+class LLMClient:
+    """Pooled, cached, rate-limited completions across providers."""
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.providers: Dict[str, Provider] = {}
+        self.cache = cache
+
+    def provider(self, name: Optional[str] = None) -> Provider:
+        name = name or settings.LLM_PROVIDER
+        if name not in self.providers:
+            if name == "openai":
+                self.providers[name] = Provider(name, settings.OPENAI_BASE_URL, settings.OPENAI_API_KEY, settings.LLM_MODEL)
+            elif name == "anthropic":
+                self.providers[name] = Provider(name, settings.ANTHROPIC_BASE_URL, settings.ANTHROPIC_API_KEY, settings.LLM_MODEL)
+            else:
+                raise ValueError(f"Unknown LLM provider: {name}")
+        return self.providers[name]
+
+    def cache_key(self, provider: Provider, request: LLMRequest) -> str:
+        canonical = json.dumps(
+            {"provider": provider.name, "model": request.model or provider.model, "system": request.system,
+             "prompt": request.prompt, "max_tokens": request.max_tokens, "temperature": request.temperature},
+            sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        provider = self.provider(request.provider)
+        key = self.cache_key(provider, request) if self.cache is not None and request.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                LLM_REQUESTS.labels(provider.name, "cached").inc()
+                return LLMResponse(**{**cached, "cached": True, "hedged": False, "latency_ms": 0.0})
+
+        response = await self._hedged(provider, request)
+        if key is not None:
+            self.cache.set(key, response.dict())
+        return response
+
+    async def _hedged(self, provider: Provider, request: LLMRequest) -> LLMResponse:
+        delay = provider.hedge_delay()
+        first = asyncio.ensure_future(self._send(provider, request))
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        # Only hedge with spare capacity; a queued hedge just adds load
+        if done or provider.semaphore.locked():
+            return await first
+
+        LLM_HEDGES.labels(provider.name, "sent").inc()
+        second = asyncio.ensure_future(self._send(provider, request))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is second:
+                        LLM_HEDGES.labels(provider.name, "won").inc()
+                    return task.result().copy(update={"hedged": True})
+                error = task.exception()
+        raise error
+
+    async def _send(self, provider: Provider, request: LLMRequest) -> LLMResponse:
+        model = request.model or provider.model
+        estimate = _estimate_tokens(request)
+        async with provider.semaphore:
+            await provider.limiter.acquire(estimate)
+            for attempt in range(settings.LLM_MAX_RETRIES + 1):
+                started = time.perf_counter()
+                try:
+                    http_response = await provider.http.post(
+                        provider.adapter.path,
+                        json=provider.adapter.body(request, model, stream=False),
+                        headers=provider.adapter.headers(provider.api_key),
+                    )
+                except httpx.TransportError as e:
+                    error = LLMError(f"{provider.name} request failed: {e}")
+                else:
+                    if http_response.status_code < 400:
+                        break
+                    error = LLMError(f"{provider.name} returned {http_response.status_code}", http_response.status_code)
+                    if http_response.status_code not in (429, 500, 502, 503, 529):
+                        LLM_REQUESTS.labels(provider.name, "error").inc()
+                        raise error
+                if attempt == settings.LLM_MAX_RETRIES:
+                    LLM_REQUESTS.labels(provider.name, "error").inc()
+                    raise error
+                LLM_REQUESTS.labels(provider.name, "retried").inc()
+                await asyncio.sleep(min(8.0, 0.5 * 2 ** attempt))
+
+        elapsed = time.perf_counter() - started
+        text, input_tokens, output_tokens = provider.adapter.parse(http_response.json())
+        provider.latencies.append(elapsed)
+        provider.limiter.adjust(input_tokens + output_tokens - estimate if input_tokens else 0)
+        LLM_LATENCY.labels(provider.name).observe(elapsed)
+        LLM_REQUESTS.labels(provider.name, "ok").inc()
+        LLM_TOKENS.labels(provider.name, "input").inc(input_tokens)
+        LLM_TOKENS.labels(provider.name, "output").inc(output_tokens)
+        return LLMResponse(text=text, provider=provider.name, model=model, input_tokens=input_tokens,
+                           output_tokens=output_tokens, latency_ms=elapsed * 1000)
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        """Yield completion text as it arrives; the full text is cached at the end."""
+        provider = self.provider(request.provider)
+        key = self.cache_key(provider, request) if self.cache is not None and request.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                LLM_REQUESTS.labels(provider.name, "cached").inc()
+                yield cached["text"]
+                return
+
+        model = request.model or provider.model
+        parts: List[str] = []
+        started = time.perf_counter()
+        async with provider.semaphore:
+            await provider.limiter.acquire(_estimate_tokens(request))
+            async with provider.http.stream(
+                "POST",
+                provider.adapter.path,
+                json=provider.adapter.body(request, model, stream=True),
+                headers=provider.adapter.headers(provider.api_key),
+            ) as http_response:
+                if http_response.status_code >= 400:
+                    LLM_REQUESTS.labels(provider.name, "error").inc()
+                    raise LLMError(f"{provider.name} returned {http_response.status_code}", http_response.status_code)
+                async for line in http_response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = provider.adapter.delta(json.loads(data))
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+
+        LLM_LATENCY.labels(provider.name).observe(time.perf_counter() - started)
+        LLM_REQUESTS.labels(provider.name, "ok").inc()
+        if key is not None:
+            self.cache.set(key, LLMResponse(text="".join(parts), provider=provider.name, model=model).dict())
+
+    async def aclose(self) -> None:
+        for provider in self.providers.values():
+            await provider.http.aclose()
+        self.providers.clear()
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_client: Optional[LLMClient] = None
+_lock = threading.Lock()
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide loop thread; recreated after fork, since threads do not survive it."""
+    global _loop, _loop_pid, _client
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _client = None
+            threading.Thread(target=_loop.run_forever, name="llm-client", daemon=True).start()
+    return _loop
+
+
+def get_llm_client() -> LLMClient:
+    """The process-wide client; use it from coroutines on the ``complete_sync`` loop."""
+    global _client
+    _event_loop()
+    if _client is None:
+        cache = None
+        if settings.LLM_CACHE_ENABLED:
+            cache = ResultCache(
+                "llm",
+                maxsize=settings.LLM_CACHE_SIZE,
+                redis_client=get_redis() if settings.LLM_CACHE_REDIS else None,
+                ttl=settings.LLM_CACHE_TTL_SECONDS,
+            )
+        _client = LLMClient(cache)
+    return _client
+
+
+def complete_sync(request: LLMRequest, timeout: Optional[float] = None) -> LLMResponse:
+    """Blocking completion for Celery tasks, on the shared loop and connection pools."""
+    loop = _event_loop()
+    client = get_llm_client()
+    future = asyncio.run_coroutine_threadsafe(client.complete(request), loop)
+    return future.result(timeout or settings.LLM_TIMEOUT_SECONDS * (settings.LLM_MAX_RETRIES + 1))
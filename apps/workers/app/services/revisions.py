@@ -0,0 +1,235 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Artifact revisions as deltas over periodic snapshots, edited through a piece table.
+
+A revision is stored as the list of replacements ``(start, end, text)`` that
+turns its parent into it, in the parent's coordinates; every
+``snapshot_interval`` revisions the full text is stored instead. Materializing
+version ``v`` loads the snapshot it chains from plus the deltas after it and
+applies them to a ``PieceTable``, which only splits and re-references pieces,
+so the work is proportional to the edits; the text is joined once at the end.
+
+Accepted redlines are applied the same way: all suggestions at once, in the
+linted version's offsets, in a single pass over the pieces.
+"""
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+Op = Tuple[int, int, str]  # replace [start, end) of the parent with text
+
+
+class RevisionError(Exception):
+    """Invalid edit, unknown version or lost race on the parent version."""
+
+
+class PieceTable:
+    """Text as a list of ``(buffer, start, length)`` slices of immutable strings."""
+
+    __slots__ = ("pieces", "length")
+
+    def __init__(self, text: str = ""):
+        self.pieces: List[Tuple[str, int, int]] = [(text, 0, len(text))] if text else []
+        self.length = len(text)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def text(self) -> str:
+        return "".join(buf[start:start + length] for buf, start, length in self.pieces)
+
+    def apply(self, ops: Sequence[Op]) -> None:
+        """Apply sorted, non-overlapping replacements in one pass over the pieces."""
+        previous_end = 0
+        for start, end, _ in ops:
+            if start < previous_end or end < start or end > self.length:
+                raise RevisionError(f"Edit [{start}, {end}) overlaps, is reversed or exceeds length {self.length}")
+            previous_end = end
+
+        new: List[Tuple[str, int, int]] = []
+        pieces = iter(self.pieces)
+        buf, offset, remaining = "", 0, 0  # unconsumed part of the current piece
+        pos = 0  # document position of that part
+
+        def advance(target: int, keep: bool) -> None:
+            nonlocal buf, offset, remaining, pos
+            while pos < target:
+                if not remaining:
+                    buf, offset, remaining = next(pieces)
+                n = min(remaining, target - pos)
+                if keep:
+                    new.append((buf, offset, n))
+                offset += n
+                remaining -= n
+                pos += n
+
+        delta = 0
+        for start, end, text in ops:
+            advance(start, keep=True)
+            advance(end, keep=False)
+            if text:
+                new.append((text, 0, len(text)))
+            delta += len(text) - (end - start)
+        advance(self.length, keep=True)
+        self.pieces = new
+        self.length += delta
+
+
+def diff_ops(old: str, new: str) -> List[Op]:
+    """One replacement covering everything between the common prefix and suffix."""
+    if old == new:
+        return []
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return [(prefix, len(old) - suffix, new[prefix:len(new) - suffix])]
+
+
+def redline_ops(table: PieceTable, redlines: Iterable[Dict[str, Any]]) -> Tuple[List[Op], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Replacements for accepted redlines (``start``/``end``/``original``/``suggestion``).
+
+    Offsets refer to the version that was linted. Redlines whose ``original``
+    no longer matches or that overlap an earlier one are skipped. Applied
+    redlines come back with ``new_start``/``new_end`` in the resulting text.
+    """
+    text = table.text()
+    ops: List[Op] = []
+    applied: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+    shift = 0
+    previous_end = 0
+    for redline in sorted(redlines, key=lambda r: (r["start"], r["end"])):
+        start, end, suggestion = redline["start"], redline["end"], redline["suggestion"]
+        if start < previous_end or end > len(text) or text[start:end] != redline.get("original", text[start:end]):
+            skipped.append(redline)
+            continue
+        ops.append((start, end, suggestion))
+        applied.append({**redline, "new_start": start + shift, "new_end": start + shift + len(suggestion)})
+        shift += len(suggestion) - (end - start)
+        previous_end = end
+    return ops, applied, skipped
+
+
+class RevisionStore:
+    """Revision log per artifact in Redis, with the latest versions cached in process.
+
+    ``revisions:{artifact_id}`` is a list whose item ``v - 1`` is version ``v``:
+    ``{"v", "base", "ops"}`` for a delta or ``{"v", "base": v, "text"}`` for a
+    snapshot. Appends are conditional on the parent still being the head.
+    Without Redis the log is process-local.
+    """
+
+    KEY = "revisions:{}"
+
+    # KEYS[1] revision list; ARGV[1] parent version; ARGV[2] entry
+    _APPEND = """
+    if redis.call('LLEN', KEYS[1]) ~= tonumber(ARGV[1]) then return -1 end
+    return redis.call('RPUSH', KEYS[1], ARGV[2])
+    """
+
+    def __init__(self, redis_client=None, snapshot_interval: int = 16, cache_size: int = 256):
+        self.redis = redis_client
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+        self._local: Dict[str, List[str]] = {}
+        self._heads: "OrderedDict[str, Tuple[int, int, PieceTable]]" = OrderedDict()  # version, base, table
+        self._append = redis_client.register_script(self._APPEND) if redis_client is not None else None
+
+    def _entries(self, artifact_id: str, first: int, last: int) -> List[Dict[str, Any]]:
+        """Entries for versions ``first..last`` (inclusive)."""
+        if self.redis is None:
+            raw = self._local.get(artifact_id, [])[first - 1:last]
+        else:
+            raw = self.redis.lrange(self.KEY.format(artifact_id), first - 1, last - 1)
+        return [json.loads(item) for item in raw]
+
+    def head(self, artifact_id: str) -> int:
+        if self.redis is None:
+            return len(self._local.get(artifact_id, []))
+        return self.redis.llen(self.KEY.format(artifact_id))
+
+    def _cache(self, artifact_id: str, version: int, base: int, table: PieceTable) -> None:
+        self._heads[artifact_id] = (version, base, table)
+        self._heads.move_to_end(artifact_id)
+        while len(self._heads) > self.cache_size:
+            self._heads.popitem(last=False)
+
+    def _load(self, artifact_id: str, version: int) -> Tuple[int, PieceTable]:
+        """Snapshot version ``version`` chains from, and its piece table."""
+        cached = self._heads.get(artifact_id)
+        if cached is not None and cached[0] == version:
+            table = PieceTable()
+            table.pieces, table.length = list(cached[2].pieces), cached[2].length
+            return cached[1], table
+        entry = self._entries(artifact_id, version, version) if version >= 1 else []
+        if not entry:
+            raise RevisionError(f"Artifact {artifact_id} has no version {version}")
+        base = entry[0]["base"]
+        entries = self._entries(artifact_id, base, version)
+        table = PieceTable(entries[0]["text"])
+        for delta in entries[1:]:
+            table.apply(delta["ops"])
+        return base, table
+
+    def table(self, artifact_id: str, version: Optional[int] = None) -> Tuple[int, PieceTable]:
+        """Piece table of ``version`` (default latest): nearest snapshot plus deltas."""
+        version = version or self.head(artifact_id)
+        return version, self._load(artifact_id, version)[1]
+
+    def materialize(self, artifact_id: str, version: Optional[int] = None) -> str:
+        return self.table(artifact_id, version)[1].text()
+
+    def commit(self, artifact_id: str, parent: int, ops: Optional[Sequence[Op]] = None, text: Optional[str] = None,
+               meta: Optional[Dict[str, Any]] = None) -> int:
+        """Append a revision of ``parent`` given as ``ops`` or as the full new ``text``; returns its version."""
+        if parent:
+            base, table = self._load(artifact_id, parent)
+            if ops is None:
+                ops = diff_ops(table.text(), text or "")
+            ops = sorted((int(s), int(e), t) for s, e, t in ops)
+            table.apply(ops)
+        else:
+            table, base = PieceTable(text or ""), 1
+        version = parent + 1
+        if version - base >= self.snapshot_interval or not parent:
+            entry = {"v": version, "base": version, "text": table.text()}
+            base = version
+        else:
+            entry = {"v": version, "base": base, "ops": ops}
+        if meta:
+            entry["meta"] = meta
+        payload = json.dumps(entry)
+
+        if self.redis is None:
+            log = self._local.setdefault(artifact_id, [])
+            if len(log) != parent:
+                raise RevisionError(f"Artifact {artifact_id} is at version {len(log)}, not {parent}")
+            log.append(payload)
+        elif self._append(keys=[self.KEY.format(artifact_id)], args=[parent, payload]) == -1:
+            raise RevisionError(f"Artifact {artifact_id} moved past version {parent}")
+        self._cache(artifact_id, version, base, table)
+        return version
+
+    def apply_redlines(self, artifact_id: str, version: int, redlines: Iterable[Dict[str, Any]],
+                       meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Accept redlines computed against ``version`` as one new revision on top of it."""
+        _, table = self.table(artifact_id, version)
+        ops, applied, skipped = redline_ops(table, redlines)
+        new_version = self.commit(artifact_id, version, ops=ops, meta=meta) if ops else version
+        return {"version": new_version, "applied": applied, "skipped": skipped}
+
+    def stats(self, artifact_id: str) -> Dict[str, int]:
+        entries = self._entries(artifact_id, 1, self.head(artifact_id))
+        snapshots = [e for e in entries if "text" in e]
+        return {
+            "versions": len(entries),
+            "snapshots": len(snapshots),
+            "stored_bytes": sum(len(json.dumps(e)) for e in entries),
+        }
@@ -0,0 +1,188 @@
+# Created automatically by Cursor AI (2024-12-19)
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import redis
+
+VOLUME = "volume"
+SENTIMENT = "sentiment"
+LTTB = "lttb"
+MINMAX = "minmax"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of ``n_out`` points picked by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; every bucket in between contributes
+    the point forming the largest triangle with the previously picked point
+    and the next bucket's average. The bucket averages are computed in one
+    pass; the scan over buckets is sequential by construction, one vector
+    operation per bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The last bucket looks ahead to the last point
+    next_x = np.append(avg_x[1:], x[-1]).tolist()
+    next_y = np.append(avg_y[1:], y[-1]).tolist()
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    bounds = edges.tolist()
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = float(x[a]), float(y[a])
+        cx, cy = next_x[i], next_y[i]
+        # Twice the triangle area, up to sign, expanded to be linear in the candidate
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (cy - ay) * (ax - x[lo:hi]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of each bucket's minimum and maximum, in order, at most ``n_out`` of them.
+
+    Fully vectorized: one stable sort by (bucket, value) puts every bucket's
+    minimum first and maximum last. Spikes and dips always survive, which is
+    what volume charts need; LTTB reads better on smooth series.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    order = np.lexsort((y, bucket))
+    picked = np.concatenate((order[edges[:-1]], order[edges[1:] - 1]))
+    return np.unique(picked)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str = LTTB) -> Tuple[np.ndarray, np.ndarray]:
+    """At most ``max_points`` of the series, chosen to preserve its visual shape."""
+    if len(x) <= max_points:
+        return x, y
+    if method == MINMAX:
+        picked = minmax(y, max_points)
+    elif method == LTTB:
+        picked = lttb(x.astype(np.float64), y.astype(np.float64), max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return x[picked], y[picked]
+
+
+class MentionSeriesStore:
+    """Per-incident mention volume and sentiment in fixed time bins, shared through Redis.
+
+    Each incident keeps two hashes keyed by bin start (count and sentiment
+    sum) and a generation counter bumped on every write, so cached queries
+    can be keyed by it and go stale as soon as new mentions land. Without a
+    Redis client the bins live in this process only.
+    """
+
+    def __init__(self, bin_seconds: int = 60, redis_client: Optional[redis.Redis] = None, ttl: int = 30 * 24 * 3600):
+        self.bin_seconds = bin_seconds
+        self.redis = redis_client
+        self.ttl = ttl
+        self._local: Dict[str, Dict[int, Tuple[int, float]]] = {}
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def _keys(incident_id: str) -> Tuple[str, str, str]:
+        return f"series:{incident_id}:count", f"series:{incident_id}:sentiment", f"series:{incident_id}:gen"
+
+    def add(self, incident_id: str, points: Iterable[Tuple[float, float]]) -> int:
+        """Record ``(timestamp, sentiment)`` mentions; returns the number of bins touched."""
+        data = np.array(list(points), dtype=np.float64).reshape(-1, 2)
+        if not len(data):
+            return 0
+        bins = (data[:, 0] // self.bin_seconds).astype(np.int64) * self.bin_seconds
+        starts, inverse = np.unique(bins, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=data[:, 1])
+
+        if self.redis is None:
+            local = self._local.setdefault(incident_id, {})
+            for start, count, total in zip(starts.tolist(), counts.tolist(), sums.tolist()):
+                prev_count, prev_total = local.get(start, (0, 0.0))
+                local[start] = (prev_count + count, prev_total + total)
+            self._generations[incident_id] = self._generations.get(incident_id, 0) + 1
+            return len(starts)
+
+        count_key, sentiment_key, gen_key = self._keys(incident_id)
+        pipe = self.redis.pipeline(transaction=False)
+        for start, count, total in zip(starts.tolist(), counts.tolist(), sums.tolist()):
+            pipe.hincrby(count_key, start, count)
+            pipe.hincrbyfloat(sentiment_key, start, total)
+        pipe.incr(gen_key)
+        for key in (count_key, sentiment_key, gen_key):
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+        return len(starts)
+
+    def generation(self, incident_id: str) -> int:
+        if self.redis is None:
+            return self._generations.get(incident_id, 0)
+        return int(self.redis.get(self._keys(incident_id)[2]) or 0)
+
+    def load(self, incident_id: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bin starts (epoch seconds), mention counts and sentiment sums, in time order."""
+        if self.redis is None:
+            local = self._local.get(incident_id, {})
+            starts = np.fromiter(local.keys(), dtype=np.int64, count=len(local))
+            values = np.array(list(local.values()), dtype=np.float64).reshape(-1, 2)
+            counts, sums = values[:, 0], values[:, 1]
+        else:
+            count_key, sentiment_key, _ = self._keys(incident_id)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hgetall(count_key)
+            pipe.hgetall(sentiment_key)
+            raw_counts, raw_sums = pipe.execute()
+            starts = np.array([int(k) for k in raw_counts], dtype=np.int64)
+            counts = np.array([float(v) for v in raw_counts.values()], dtype=np.float64)
+            sums = np.array([float(raw_sums.get(k, 0.0)) for k in raw_counts], dtype=np.float64)
+        order = np.argsort(starts, kind="stable")
+        return starts[order], counts[order], sums[order]
+
+    def series(
+        self,
+        incident_id: str,
+        metric: str = VOLUME,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        bin_seconds: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """One metric over ``[start, end)`` at ``bin_seconds`` (a multiple of the stored bins).
+
+        Volume is mentions per bin, with empty bins between the first and last
+        mention as zeros; sentiment is the mean per bin and skips bins without
+        mentions.
+        """
+        starts, counts, sums = self.load(incident_id)
+        step = max(self.bin_seconds, (bin_seconds or self.bin_seconds) // self.bin_seconds * self.bin_seconds)
+        if step != self.bin_seconds and len(starts):
+            starts, inverse = np.unique(starts // step * step, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts)
+            sums = np.bincount(inverse, weights=sums)
+        keep = np.ones(len(starts), dtype=bool)
+        if start is not None:
+            keep &= starts >= start // step * step
+        if end is not None:
+            keep &= starts < end
+        starts, counts, sums = starts[keep], counts[keep], sums[keep]
+
+        if metric == SENTIMENT:
+            return starts, sums / np.maximum(counts, 1)
+        if metric != VOLUME:
+            raise ValueError(f"Unknown series metric: {metric}")
+        if not len(starts):
+            return starts, counts
+        dense = np.arange(starts[0], starts[-1] + step, step, dtype=np.int64)
+        values = np.zeros(len(dense), dtype=np.float64)
+        values[(starts - starts[0]) // step] = counts
+        return dense, values
@@ -0,0 +1,310 @@
+# Created automatically by Cursor AI (2024-12-19)
+import hashlib
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace; the basis for exact-duplicate hashing."""
+    return " ".join(text.lower().split())
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class HashingEmbedder:
+    """Deterministic offline embedding: signed feature hashing of word uni/bigrams
+    and character 4-grams with sublinear TF, optional IDF, L2-normalised.
+
+    Uses crc32 rather than ``hash()`` so vectors are stable across processes.
+    """
+
+    def __init__(self, dim: int = 256, char_ngram: int = 4, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.idf = idf
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        n = self.char_ngram
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+        return features
+
+    def _buckets(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) for f in self._features(text)),
+            dtype=np.uint64,
+        )
+        buckets = (hashes % self.dim).astype(np.int64)
+        signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+        return buckets, signs
+
+    def embed(self, text: str) -> np.ndarray:
+        buckets, signs = self._buckets(text)
+        vector = np.zeros(self.dim, dtype=np.float64)
+        if buckets.size:
+            tf = np.bincount(buckets, minlength=self.dim).astype(np.float64)
+            signed = np.bincount(buckets, weights=signs, minlength=self.dim)
+            nonzero = tf > 0
+            # Sublinear TF keeps long boilerplate from dominating
+            vector[nonzero] = np.sign(signed[nonzero]) * (1.0 + np.log(tf[nonzero]))
+            if self.idf is not None:
+                vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        vectors = [self.embed(t) for t in texts]
+        return np.vstack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
+
+    def fit_idf(self, texts: Sequence[str]) -> None:
+        """Set smoothed IDF weights per hash bucket from a reference corpus."""
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            buckets, _ = self._buckets(text)
+            df[np.unique(buckets)] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1.0).astype(np.float64)
+
+
+class VectorIndex:
+    """Inner-product index over L2-normalised vectors.
+
+    ``flat`` is exact NumPy brute force. ``ivf`` clusters vectors with spherical
+    k-means into ``nlist`` lists and scans the ``nprobe`` closest lists per query.
+    """
+
+    def __init__(self, dim: int, mode: str = "flat", nlist: int = 1024, nprobe: int = 16):
+        if mode not in ("flat", "ivf"):
+            raise ValueError(f"Unsupported index mode: {mode}")
+        self.dim = dim
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ids: List[str] = []
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: len(self.ids)]
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = len(self.ids)
+        end = start + len(vectors)
+        if end > len(self._vectors):
+            grown = np.zeros((max(end, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:start] = self._vectors[:start]
+            self._vectors = grown
+        self._vectors[start:end] = vectors
+        self.ids.extend(ids)
+        if self.trained:
+            self._assign(np.arange(start, end))
+
+    def attach(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Adopt prebuilt vectors (e.g. a read-only mmap) without copying; the next ``add`` copies."""
+        self.ids = list(ids)
+        self._vectors = vectors
+        if self.trained:
+            self._assign(np.arange(len(self.ids)))
+
+    def train(self, iterations: int = 10, sample_size: Optional[int] = None, seed: int = 0) -> None:
+        """Fit IVF centroids on (a sample of) the stored vectors and bucket them."""
+        if self.mode != "ivf":
+            return
+        n = len(self)
+        nlist = min(self.nlist, n)
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, sample_size or 64 * nlist)
+        sample = self.vectors[rng.choice(n, size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[~empty] /= norms[~empty]
+            sums[empty] = centroids[empty]
+            centroids = sums
+
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._list_arrays = {}
+        self._assign(np.arange(n))
+
+    def _assign(self, rows: np.ndarray, chunk: int = 65536) -> None:
+        for offset in range(0, len(rows), chunk):
+            part = rows[offset:offset + chunk]
+            assignment = np.argmax(self._vectors[part] @ self._centroids.T, axis=1)
+            for row, list_id in zip(part.tolist(), assignment.tolist()):
+                self._lists[list_id].append(row)
+                self._list_arrays.pop(list_id, None)
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays.get(list_id)
+        if rows is None:
+            rows = np.asarray(self._lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = rows
+        return rows
+
+    def search(self, query: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) for a normalised query vector."""
+        if not self.ids:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+
+        if self.mode == "ivf" and self.trained:
+            nprobe = min(self.nprobe, len(self._centroids))
+            probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([self._list_rows(p) for p in probes.tolist()])
+            if rows.size == 0:
+                return []
+            scores = self._vectors[rows] @ query
+        else:
+            rows = None
+            scores = self.vectors @ query
+
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(self.ids[rows[i]], float(scores[i])) for i in top.tolist()]
+        return [(self.ids[i], float(scores[i])) for i in top.tolist()]
+
+
+class ApprovedMatch(BaseModel):
+    artifact_id: str
+    kind: str
+    similarity: float
+    text: str
+
+
+class ApprovedStatementStore:
+    """Approved artifact texts with exact (fingerprint) and semantic lookup.
+
+    Entries are appended to a shared Redis list so every worker process can
+    catch up incrementally; without a client the store is process-local.
+    """
+
+    LOG_KEY = "approved_statements:log"
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, redis_client=None, mode: str = "flat"):
+        self.embedder = embedder or HashingEmbedder()
+        self.index = VectorIndex(self.embedder.dim, mode=mode)
+        self.redis = redis_client
+        self._entries: Dict[str, Tuple[str, str]] = {}  # artifact_id -> (kind, text)
+        self._fingerprints: Dict[str, str] = {}  # fingerprint -> artifact_id
+        self._synced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add_local(self, artifact_id: str, kind: str, text: str) -> None:
+        if artifact_id in self._entries:
+            return
+        self._entries[artifact_id] = (kind, text)
+        self._fingerprints.setdefault(text_fingerprint(text), artifact_id)
+        for section in split_sections(text):
+            self._fingerprints.setdefault(text_fingerprint(section[2]), artifact_id)
+        self.index.add([artifact_id], self.embedder.embed(text)[None, :])
+
+    def add(self, artifact_id: str, kind: str, text: str) -> None:
+        """Record an approved artifact (and publish it to the shared log)."""
+        if self.redis is not None:
+            self.redis.rpush(self.LOG_KEY, json.dumps({"artifact_id": artifact_id, "kind": kind, "text": text}))
+        self._add_local(artifact_id, kind, text)
+
+    def sync(self) -> int:
+        """Pull entries other processes appended since the last sync."""
+        if self.redis is None:
+            return 0
+        raw = self.redis.lrange(self.LOG_KEY, self._synced, -1)
+        for item in raw:
+            entry = json.loads(item)
+            self._add_local(entry["artifact_id"], entry["kind"], entry["text"])
+        self._synced += len(raw)
+        return len(raw)
+
+    def save_snapshot(self, path: Path) -> None:
+        """Write entries, fingerprints and vectors so other processes can start warm."""
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "approved_vectors.tmp.npy", np.ascontiguousarray(self.index.vectors))
+        meta = {
+            "synced": self._synced,
+            "ids": self.index.ids,
+            "entries": self._entries,
+            "fingerprints": self._fingerprints,
+        }
+        (path / "approved_entries.tmp.json").write_text(json.dumps(meta))
+        # Rename both into place so readers never see a half-written pair
+        os.replace(path / "approved_vectors.tmp.npy", path / "approved_vectors.npy")
+        os.replace(path / "approved_entries.tmp.json", path / "approved_entries.json")
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Load a snapshot with vectors memory-mapped, shared across processes via the page cache."""
+        meta_path, vectors_path = path / "approved_entries.json", path / "approved_vectors.npy"
+        if not (meta_path.exists() and vectors_path.exists()):
+            return False
+        meta = json.loads(meta_path.read_text())
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if vectors.shape != (len(meta["ids"]), self.embedder.dim):
+            return False
+        self._entries = {artifact_id: tuple(entry) for artifact_id, entry in meta["entries"].items()}
+        self._fingerprints = meta["fingerprints"]
+        self._synced = meta["synced"]
+        self.index.attach(meta["ids"], vectors)
+        return True
+
+    def exact(self, text: str) -> Optional[str]:
+        """Artifact id whose full text or a section is identical after normalisation."""
+        return self._fingerprints.get(text_fingerprint(text))
+
+    def nearest(self, text: str, kind: Optional[str] = None, k: int = 1) -> List[ApprovedMatch]:
+        query = self.embedder.embed(text)
+        # Over-fetch when filtering by kind
+        candidates = self.index.search(query, k if kind is None else 8 * k)
+        matches = []
+        for artifact_id, score in candidates:
+            entry_kind, entry_text = self._entries[artifact_id]
+            if kind is not None and entry_kind != kind:
+                continue
+            matches.append(ApprovedMatch(artifact_id=artifact_id, kind=entry_kind, similarity=score, text=entry_text))
+            if len(matches) == k:
+                break
+        return matches
+
+
+def split_sections(text: str) -> List[Tuple[int, int, str]]:
+    """Paragraph sections as (start, end, text), split on blank lines."""
+    sections = []
+    for match in re.finditer(r"\S(?:.*?\S)?(?=\n\s*\n|\s*$)", text, re.DOTALL):
+        sections.append((match.start(), match.end(), match.group(0)))
+    return sections
+
@@ -0,0 +1,271 @@
+# Created automatically by Cursor AI (2024-12-19)
+import heapq
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+WARNING = "warning"
+BREACH = "breach"
+
+
+class SLAEvent(BaseModel):
+    type: str  # sla.warning | sla.breach
+    incident_id: str
+    item_id: str
+    kind: str  # task | milestone
+    label: str
+    due_at: datetime
+    fired_at: datetime
+
+
+class _Deadline:
+    __slots__ = ("incident_id", "item_id", "kind", "label", "due_ts", "version")
+
+    def __init__(self, incident_id: str, item_id: str, kind: str, label: str, due_ts: float, version: int):
+        self.incident_id = incident_id
+        self.item_id = item_id
+        self.kind = kind
+        self.label = label
+        self.due_ts = due_ts
+        self.version = version
+
+
+def _to_ts(value: datetime) -> float:
+    # Plan timestamps are naive UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _from_ts(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+class SLAEngine:
+    """Min-heap of open task/milestone deadlines across all incidents.
+
+    Each deadline fires a warning ``warning_lead`` before it is due and a breach
+    when it is due. Updates and completions are O(log n) / O(1): superseded heap
+    entries are invalidated by version and discarded when they surface, and the
+    heap is compacted once stale entries outnumber live ones.
+    """
+
+    def __init__(self, warning_lead: timedelta = timedelta(minutes=15)):
+        self.warning_lead = warning_lead.total_seconds()
+        # (fire_ts, seq, key, version, phase)
+        self._heap: List[Tuple[float, int, str, int, str]] = []
+        self._deadlines: Dict[str, _Deadline] = {}
+        self._by_incident: Dict[str, Set[str]] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    @staticmethod
+    def _key(incident_id: str, item_id: str) -> str:
+        return f"{incident_id}:{item_id}"
+
+    def _push(self, fire_ts: float, key: str, version: int, phase: str) -> None:
+        heapq.heappush(self._heap, (fire_ts, next(self._seq), key, version, phase))
+
+    def track(self, incident_id: str, item_id: str, kind: str, label: str, due_at: datetime) -> None:
+        """Start tracking a deadline, or reschedule it if already tracked."""
+        key = self._key(incident_id, item_id)
+        previous = self._deadlines.get(key)
+        version = previous.version + 1 if previous else 0
+        due_ts = _to_ts(due_at)
+
+        self._deadlines[key] = _Deadline(incident_id, item_id, kind, label, due_ts, version)
+        self._by_incident.setdefault(incident_id, set()).add(item_id)
+        self._push(due_ts - self.warning_lead, key, version, WARNING)
+        self._maybe_compact()
+
+    def complete(self, incident_id: str, item_id: str) -> bool:
+        """Stop tracking a deadline; returns False if it was not open."""
+        key = self._key(incident_id, item_id)
+        if self._deadlines.pop(key, None) is None:
+            return False
+        items = self._by_incident.get(incident_id)
+        if items is not None:
+            items.discard(item_id)
+            if not items:
+                del self._by_incident[incident_id]
+        return True
+
+    def cancel_incident(self, incident_id: str) -> int:
+        """Drop every open deadline of an incident (e.g. on resolution)."""
+        items = self._by_incident.pop(incident_id, set())
+        for item_id in items:
+            self._deadlines.pop(self._key(incident_id, item_id), None)
+        return len(items)
+
+    def next_fire_at(self) -> Optional[datetime]:
+        """Time of the earliest pending heap entry (may be stale)."""
+        return _from_ts(self._heap[0][0]) if self._heap else None
+
+    def advance(self, now: Optional[datetime] = None) -> List[SLAEvent]:
+        """Fire every warning and breach due at or before ``now``."""
+        now_ts = _to_ts(now or datetime.utcnow())
+        fired_at = _from_ts(now_ts)
+        events: List[SLAEvent] = []
+
+        while self._heap and self._heap[0][0] <= now_ts:
+            _, _, key, version, phase = heapq.heappop(self._heap)
+            deadline = self._deadlines.get(key)
+            if deadline is None or deadline.version != version:
+                continue
+
+            if phase == WARNING and deadline.due_ts > now_ts:
+                events.append(self._event(deadline, WARNING, fired_at))
+                self._push(deadline.due_ts, key, version, BREACH)
+                continue
+
+            events.append(self._event(deadline, BREACH, fired_at))
+            self.complete(deadline.incident_id, deadline.item_id)
+
+        return events
+
+    def _event(self, deadline: _Deadline, phase: str, fired_at: datetime) -> SLAEvent:
+        return SLAEvent(
+            type=f"sla.{phase}",
+            incident_id=deadline.incident_id,
+            item_id=deadline.item_id,
+            kind=deadline.kind,
+            label=deadline.label,
+            due_at=_from_ts(deadline.due_ts),
+            fired_at=fired_at,
+        )
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) < 1024 or len(self._heap) < 2 * len(self._deadlines):
+            return
+        live = []
+        for entry in self._heap:
+            deadline = self._deadlines.get(entry[2])
+            if deadline is not None and deadline.version == entry[3]:
+                live.append(entry)
+        heapq.heapify(live)
+        self._heap = live
+
+
+class RedisSLAEngine:
+    """``SLAEngine`` kept in Redis, so any worker process may track or tick.
+
+    ``{sla}:deadlines`` maps each deadline to its state (including the phase
+    it fires next), ``{sla}:schedule`` scores it by its next fire time and
+    ``{sla}:incident:{id}`` lists an incident's deadlines. Rescheduling
+    overwrites the entry in place; due entries are fired and rescheduled or
+    removed by one script, so concurrent ticks never fire a deadline twice
+    and a worker restart loses nothing. The script only touches the keys it
+    is passed; breached deadlines leave their incident's set afterwards,
+    and a member left behind by a crash in between is dropped by
+    ``cancel_incident`` like any other.
+    """
+
+    # One hash slot, so the pipelines stay single-slot on Redis Cluster.
+    DEADLINES = "{sla}:deadlines"
+    SCHEDULE = "{sla}:schedule"
+    INCIDENT = "{sla}:incident:"
+
+    # KEYS[1] schedule, KEYS[2] deadlines; ARGV[1] now, ARGV[2] batch size.
+    # Returns phase, deadline pairs.
+    _ADVANCE = """
+    local now = tonumber(ARGV[1])
+    local fired = {}
+    for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[2]))) do
+        local raw = redis.call('HGET', KEYS[2], key)
+        if not raw then
+            redis.call('ZREM', KEYS[1], key)
+        else
+            local deadline = cjson.decode(raw)
+            if deadline.phase == 'warning' and deadline.due_ts > now then
+                deadline.phase = 'breach'
+                redis.call('HSET', KEYS[2], key, cjson.encode(deadline))
+                redis.call('ZADD', KEYS[1], deadline.due_ts, key)
+                table.insert(fired, 'warning')
+            else
+                redis.call('ZREM', KEYS[1], key)
+                redis.call('HDEL', KEYS[2], key)
+                table.insert(fired, 'breach')
+            end
+            table.insert(fired, raw)
+        end
+    end
+    return fired
+    """
+
+    def __init__(self, redis_client, warning_lead: timedelta = timedelta(minutes=15), batch_size: int = 500):
+        self.redis = redis_client
+        self.warning_lead = warning_lead.total_seconds()
+        self.batch_size = batch_size
+        self._advance = redis_client.register_script(self._ADVANCE)
+
+    def __len__(self) -> int:
+        return self.redis.hlen(self.DEADLINES)
+
+    def track(self, incident_id: str, item_id: str, kind: str, label: str, due_at: datetime) -> None:
+        """Start tracking a deadline, or reschedule it if already tracked."""
+        key = SLAEngine._key(incident_id, item_id)
+        due_ts = _to_ts(due_at)
+        deadline = {"incident_id": incident_id, "item_id": item_id, "kind": kind, "label": label,
+                    "due_ts": due_ts, "phase": WARNING}
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self.DEADLINES, key, json.dumps(deadline))
+        pipe.zadd(self.SCHEDULE, {key: due_ts - self.warning_lead})
+        pipe.sadd(self.INCIDENT + incident_id, key)
+        pipe.execute()
+
+    def complete(self, incident_id: str, item_id: str) -> bool:
+        """Stop tracking a deadline; returns False if it was not open."""
+        key = SLAEngine._key(incident_id, item_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hdel(self.DEADLINES, key)
+        pipe.zrem(self.SCHEDULE, key)
+        pipe.srem(self.INCIDENT + incident_id, key)
+        return bool(pipe.execute()[0])
+
+    def cancel_incident(self, incident_id: str) -> int:
+        """Drop every open deadline of an incident (e.g. on resolution)."""
+        keys = list(self.redis.smembers(self.INCIDENT + incident_id))
+        if not keys:
+            return 0
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hdel(self.DEADLINES, *keys)
+        pipe.zrem(self.SCHEDULE, *keys)
+        pipe.delete(self.INCIDENT + incident_id)
+        return pipe.execute()[0]
+
+    def next_fire_at(self) -> Optional[datetime]:
+        """Time of the earliest scheduled fire."""
+        head = self.redis.zrange(self.SCHEDULE, 0, 0, withscores=True)
+        return _from_ts(head[0][1]) if head else None
+
+    def advance(self, now: Optional[datetime] = None) -> List[SLAEvent]:
+        """Fire every warning and breach due at or before ``now``."""
+        now_ts = _to_ts(now or datetime.utcnow())
+        fired_at = _from_ts(now_ts)
+        events: List[SLAEvent] = []
+        while True:
+            fired = self._advance(keys=[self.SCHEDULE, self.DEADLINES], args=[now_ts, self.batch_size])
+            breached = self.redis.pipeline(transaction=False)
+            for phase, raw in zip(fired[::2], fired[1::2]):
+                phase = phase.decode() if isinstance(phase, bytes) else phase
+                deadline = json.loads(raw)
+                if phase == BREACH:
+                    breached.srem(self.INCIDENT + deadline["incident_id"],
+                                  SLAEngine._key(deadline["incident_id"], deadline["item_id"]))
+                events.append(SLAEvent(
+                    type=f"sla.{phase}",
+                    incident_id=deadline["incident_id"],
+                    item_id=deadline["item_id"],
+                    kind=deadline["kind"],
+                    label=deadline["label"],
+                    due_at=_from_ts(deadline["due_ts"]),
+                    fired_at=fired_at,
+                ))
+            breached.execute()
+            if len(fired) < 2 * self.batch_size:
+                return events
@@ -0,0 +1,410 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Social posts: grapheme-accurate platform limits, cadence and canned replies.
+
+Platform limits count user-perceived characters (extended grapheme clusters),
+so a flag, a skin-toned emoji or an accented letter typed as two code points
+counts once, and truncation never splits one. Segmentation follows UAX #29
+without the Indic conjunct rule, from ``unicodedata`` alone.
+
+Suggested replies to rumors come from ``ReplyIndex``: an inverted index over
+the approved reply library whose postings hold precomputed BM25 term weights
+in flat numpy arrays, so a query only touches the postings of its own terms.
+"""
+import json
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+DEFAULT_LIBRARY_PATH = Path(__file__).resolve().parent.parent / "data" / "social_replies.json"
+
+ELLIPSIS = "…"
+
+# Grapheme break classes
+_CR, _LF, _CONTROL, _EXTEND, _ZWJ, _RI, _SPACING, _L, _V, _T, _LV, _LVT, _PICT, _OTHER = range(14)
+
+_PICTOGRAPHIC = (
+    (0x00A9, 0x00A9), (0x00AE, 0x00AE), (0x203C, 0x203C), (0x2049, 0x2049), (0x2122, 0x2122),
+    (0x2139, 0x2139), (0x2194, 0x21AA), (0x231A, 0x23FF), (0x24C2, 0x24C2), (0x25AA, 0x25FE),
+    (0x2600, 0x27BF), (0x2934, 0x2935), (0x2B05, 0x2B55), (0x3030, 0x3030), (0x303D, 0x303D),
+    (0x3297, 0x3299), (0x1F000, 0x1FAFF),
+)
+
+
+@lru_cache(maxsize=8192)
+def _break_class(ch: str) -> int:
+    cp = ord(ch)
+    if cp == 0x0D:
+        return _CR
+    if cp == 0x0A:
+        return _LF
+    if cp == 0x200D:
+        return _ZWJ
+    if 0x1F1E6 <= cp <= 0x1F1FF:
+        return _RI
+    if 0xAC00 <= cp <= 0xD7A3:
+        return _LV if (cp - 0xAC00) % 28 == 0 else _LVT
+    if 0x1100 <= cp <= 0x115F or 0xA960 <= cp <= 0xA97F:
+        return _L
+    if 0x1160 <= cp <= 0x11A7 or 0xD7B0 <= cp <= 0xD7C6:
+        return _V
+    if 0x11A8 <= cp <= 0x11FF or 0xD7CB <= cp <= 0xD7FB:
+        return _T
+    if 0x1F3FB <= cp <= 0x1F3FF or 0xFE00 <= cp <= 0xFE0F or 0xE0020 <= cp <= 0xE007F or cp == 0x200C:
+        return _EXTEND  # emoji modifiers, variation selectors, tags, ZWNJ
+    category = unicodedata.category(ch)
+    if category in ("Mn", "Me"):
+        return _EXTEND
+    if category == "Mc":
+        return _SPACING
+    if category in ("Cc", "Zl", "Zp") or (category == "Cf" and cp != 0x200D):
+        return _CONTROL
+    if any(lo <= cp <= hi for lo, hi in _PICTOGRAPHIC):
+        return _PICT
+    return _OTHER
+
+
+def _joins(prev: int, cur: int, pict_zwj: bool, ri_odd: bool) -> bool:
+    """No break between ``prev`` and ``cur`` (UAX #29 GB3-GB13)."""
+    if prev == _CR and cur == _LF:
+        return True
+    if prev in (_CR, _LF, _CONTROL) or cur in (_CR, _LF, _CONTROL):
+        return False
+    if prev == _L and cur in (_L, _V, _LV, _LVT):
+        return True
+    if prev in (_LV, _V) and cur in (_V, _T):
+        return True
+    if prev in (_LVT, _T) and cur == _T:
+        return True
+    if cur in (_EXTEND, _ZWJ, _SPACING):
+        return True
+    if prev == _ZWJ and cur == _PICT and pict_zwj:
+        return True
+    return prev == _RI and cur == _RI and ri_odd
+
+
+def graphemes(text: str) -> List[str]:
+    """Split ``text`` into extended grapheme clusters."""
+    if text.isascii() and "\r\n" not in text:
+        return list(text)
+    clusters: List[str] = []
+    start = 0
+    prev = None
+    pict = False  # inside Extended_Pictographic Extend* (ZWJ)?
+    ri_count = 0
+    for i, ch in enumerate(text):
+        cur = _break_class(ch)
+        if prev is None:
+            pass
+        elif prev == _OTHER and cur == _OTHER:
+            clusters.append(text[start:i])  # the common case, decided without _joins
+            start = i
+        elif not _joins(prev, cur, pict and prev == _ZWJ, ri_count % 2 == 1):
+            clusters.append(text[start:i])
+            start = i
+        if cur == _PICT:
+            pict = True
+        elif cur not in (_EXTEND, _ZWJ):
+            pict = False
+        ri_count = ri_count + 1 if cur == _RI else 0
+        prev = cur
+    if start < len(text):
+        clusters.append(text[start:])
+    return clusters
+
+
+def grapheme_len(text: str) -> int:
+    if text.isascii():
+        return len(text) - text.count("\r\n")
+    return len(graphemes(text))
+
+
+def truncate(text: str, limit: int, ellipsis: str = ELLIPSIS) -> str:
+    """At most ``limit`` graphemes, cut at a word boundary where possible."""
+    clusters = graphemes(text)
+    if len(clusters) <= limit:
+        return text
+    keep = limit - grapheme_len(ellipsis)
+    if keep <= 0:
+        return "".join(clusters[:limit])
+    cut = keep
+    while cut > keep // 2 and not clusters[cut].isspace():
+        cut -= 1
+    if cut <= keep // 2:
+        cut = keep
+    return "".join(clusters[:cut]).rstrip() + ellipsis
+
+
+class PlatformSpec(BaseModel):
+    name: str
+    limit: int  # graphemes
+    url_length: Optional[int] = None  # links count as this many characters, whatever their length
+    max_hashtags: int = 3
+    cadence_factor: float = 1.0  # multiple of the severity's update interval
+
+
+PLATFORMS: Dict[str, PlatformSpec] = {spec.name: spec for spec in (
+    PlatformSpec(name="twitter", limit=280, url_length=23, max_hashtags=2),
+    PlatformSpec(name="threads", limit=500, max_hashtags=1),
+    PlatformSpec(name="bluesky", limit=300, max_hashtags=2),
+    PlatformSpec(name="mastodon", limit=500, url_length=23, max_hashtags=3),
+    PlatformSpec(name="linkedin", limit=3000, max_hashtags=3, cadence_factor=2.0),
+    PlatformSpec(name="facebook", limit=63206, max_hashtags=2, cadence_factor=2.0),
+    PlatformSpec(name="instagram", limit=2200, max_hashtags=5, cadence_factor=4.0),
+)}
+PLATFORM_ALIASES = {"x": "twitter"}
+
+# Minutes between updates while an incident is open
+CADENCE_MINUTES = {"critical": 30, "high": 60, "medium": 120, "low": 240}
+
+URL_PATTERN = re.compile(r"https?://\S+")
+
+
+def get_platform(name: str) -> PlatformSpec:
+    key = PLATFORM_ALIASES.get(name.lower(), name.lower())
+    return PLATFORMS.get(key) or PlatformSpec(name=key, limit=500)
+
+
+def post_length(text: str, spec: PlatformSpec) -> int:
+    if spec.url_length is None:
+        return grapheme_len(text)
+    urls = URL_PATTERN.findall(text)
+    return grapheme_len(URL_PATTERN.sub("", text)) + spec.url_length * len(urls)
+
+
+def compose_post(body: str, spec: PlatformSpec, url: Optional[str] = None, hashtags: Sequence[str] = ()) -> Tuple[str, List[str], int, bool]:
+    """``body`` + link + hashtags within the platform limit: ``(content, hashtags kept, length, truncated)``.
+
+    Hashtags go first, then the body is shortened; the link is always kept.
+    """
+    tags = [t if t.startswith("#") else f"#{t}" for t in hashtags][:spec.max_hashtags]
+    tail = f" {url}" if url else ""
+    while True:
+        content = body + tail + ("\n\n" + " ".join(tags) if tags else "")
+        length = post_length(content, spec)
+        if length <= spec.limit:
+            return content, tags, length, False
+        if not tags:
+            break
+        tags.pop()
+    room = spec.limit - post_length(tail, spec)
+    content = truncate(body, max(room, 0)) + tail
+    return content, [], post_length(content, spec), True
+
+
+def posting_cadence(severity: str, platforms: Iterable[str], start: datetime, updates: int) -> List[Tuple[str, datetime, str]]:
+    """``(platform, at, kind)`` for the first post and ``updates`` follow-ups per platform."""
+    interval = CADENCE_MINUTES.get(severity, CADENCE_MINUTES["medium"])
+    schedule = []
+    for name in platforms:
+        spec = get_platform(name)
+        step = timedelta(minutes=interval * spec.cadence_factor)
+        schedule.append((spec.name, start, "initial"))
+        schedule.extend((spec.name, start + step * i, "update") for i in range(1, updates + 1))
+    return sorted(schedule, key=lambda item: (item[1], item[0]))
+
+
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can do for from has have i if in is it its of on or our so that the their "
+    "them there they this to was we were what when will with you your".split()
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Crude suffix folding: hacked/hacks/hacking -> hack
+        if len(token) > 5 and token.endswith("ing"):
+            token = token[:-3]
+        elif len(token) > 4 and token.endswith("ed"):
+            token = token[:-2]
+        elif len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class Reply(BaseModel):
+    id: str
+    text: str
+    tags: List[str] = []
+
+
+class ReplyMatch(BaseModel):
+    id: str
+    text: str
+    score: float
+
+
+class ReplyIndex:
+    """BM25 over the approved reply library, postings stored CSR-style.
+
+    ``_offsets[t]:_offsets[t + 1]`` slices ``_docs``/``_weights`` for term
+    ``t`` in reply order; each weight is the term's full BM25 contribution
+    for that reply. Terms with more than ``impact_cap`` postings also keep
+    their ``impact_cap`` heaviest ones (``_top_docs``/``_top_weights``) and
+    the weight the rest stay at or under (``_cutoff``).
+
+    Search is exact top-k with MaxScore-style pruning: scores are gathered
+    from the full postings of rare terms and the top postings of common
+    ones, which gives a k-th best score to beat. A reply missing from a
+    common term's top postings gets at most its cutoff from that term, so
+    common terms are read in full (highest cutoff per posting first) only
+    until the cutoffs left can no longer lift an unseen reply past that
+    score; the few replies that still could are then scored exactly.
+    """
+
+    def __init__(self, replies: Sequence[Reply], k1: float = 1.2, b: float = 0.75, impact_cap: int = 512):
+        self.replies = list(replies)
+        self.impact_cap = impact_cap
+        vocab: Dict[str, int] = {}
+        terms: List[int] = []
+        lengths: List[int] = []
+        for reply in self.replies:
+            # Tags are indexed with the text, once each
+            tokens = tokenize(reply.text + " " + " ".join(reply.tags))
+            terms.extend(vocab.setdefault(t, len(vocab)) for t in tokens)
+            lengths.append(len(tokens))
+        self.vocab = vocab
+        n = max(len(self.replies), 1)
+        doc_len = np.array(lengths, dtype=np.float32)
+        avg = float(doc_len.mean()) if len(lengths) and doc_len.sum() else 1.0
+
+        # (term, reply) pairs sorted by term then reply, with their counts
+        keys, tf = np.unique(
+            np.asarray(terms, dtype=np.int64) * n + np.repeat(np.arange(len(lengths), dtype=np.int64), lengths),
+            return_counts=True,
+        )
+        term_of = keys // n
+        self._docs = (keys % n).astype(np.int32)
+        df = np.bincount(term_of, minlength=len(vocab))
+        self._offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=self._offsets[1:])
+        idf = np.log1p((len(lengths) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        tf = tf.astype(np.float32)
+        norm = k1 * (1 - b + b * doc_len[self._docs] / avg)
+        self._weights = (idf[term_of] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        common = np.flatnonzero(df > impact_cap)
+        self._in_top = np.zeros(len(self._docs), dtype=bool)  # posting is one of its term's top postings
+        self._cutoff = np.zeros(len(vocab), dtype=np.float32)
+        self._top: Dict[int, slice] = {}
+        self._top_docs = np.empty(len(common) * impact_cap, dtype=np.int32)
+        self._top_weights = np.empty(len(common) * impact_cap, dtype=np.float32)
+        for i, term in enumerate(common):
+            lo, hi = self._offsets[term], self._offsets[term + 1]
+            weights = self._weights[lo:hi]
+            order = np.argsort(-weights, kind="stable")
+            top = slice(i * impact_cap, (i + 1) * impact_cap)
+            self._top_docs[top] = self._docs[lo:hi][order[:impact_cap]]
+            self._in_top[lo + order[:impact_cap]] = True
+            self._top_weights[top] = weights[order[:impact_cap]]
+            self._cutoff[term] = weights[order[impact_cap]]
+            self._top[int(term)] = top
+
+    def __len__(self) -> int:
+        return len(self.replies)
+
+    @classmethod
+    def load(cls, path: Path) -> "ReplyIndex":
+        with open(path, "rb") as f:
+            data = json.load(f)
+        return cls([Reply(**item) for item in data["replies"]])
+
+    def _gather(self, full: List[int], truncated: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Replies in the postings read, with their exact weight from ``full`` terms,
+        the weight found in ``truncated`` terms' top postings and those terms' cutoffs summed."""
+        parts = [(self._docs[self._offsets[t]:self._offsets[t + 1]], self._weights[self._offsets[t]:self._offsets[t + 1]]) for t in full]
+        tops = [(self._top_docs[self._top[t]], self._top_weights[self._top[t]], self._cutoff[t]) for t in truncated]
+        size = sum(len(d) for d, _ in parts) + len(tops) * self.impact_cap
+        if size * 2 > len(self.replies):
+            # Most replies are hit anyway: accumulate densely, no sort
+            exact = np.zeros(len(self.replies), dtype=np.float32)
+            found = np.zeros(len(self.replies), dtype=np.float32)
+            covered = np.zeros(len(self.replies), dtype=np.float32)
+            for docs, weights in parts:
+                exact[docs] += weights
+            for docs, weights, cutoff in tops:
+                found[docs] += weights
+                covered[docs] += cutoff
+            docs = np.flatnonzero(exact + found)
+            return docs, exact[docs], found[docs], covered[docs]
+        all_docs = np.concatenate([d for d, _ in parts] + [d for d, _, _ in tops])
+        docs, inverse = np.unique(all_docs, return_inverse=True)
+        split = size - len(tops) * self.impact_cap
+        exact = np.bincount(inverse[:split], weights=np.concatenate([w for _, w in parts] or [np.zeros(0)]), minlength=len(docs))
+        found = np.bincount(inverse[split:], weights=np.concatenate([w for _, w, _ in tops] or [np.zeros(0)]), minlength=len(docs))
+        covered = np.bincount(inverse[split:], weights=np.repeat([c for _, _, c in tops], self.impact_cap), minlength=len(docs))
+        return docs, exact, found, covered
+
+    def _lookup(self, term: int, candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Weight of ``term`` for each of ``candidates`` outside its top postings, and which those are."""
+        lo, hi = self._offsets[term], self._offsets[term + 1]
+        docs = self._docs[lo:hi]
+        pos = np.searchsorted(docs, candidates)
+        pos[pos == len(docs)] = 0
+        hit = docs[pos] == candidates
+        in_top = hit & self._in_top[lo + pos]
+        return np.where(hit & ~in_top, self._weights[lo + pos], 0.0), in_top
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> List[ReplyMatch]:
+        terms = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not terms:
+            return []
+        full = [t for t in terms if t not in self._top]
+        truncated = [t for t in terms if t in self._top]
+        docs, exact, found, covered = self._gather(full, truncated)
+        seen = exact + found
+        kth = float(np.partition(seen, -k)[-k]) if len(seen) >= k else 0.0
+
+        # Read common terms in full until a reply outside the postings read can no longer reach the k-th score
+        remaining = float(sum(self._cutoff[t] for t in truncated))
+        truncated.sort(key=lambda t: self._cutoff[t] / (self._offsets[t + 1] - self._offsets[t]))
+        upgraded = False
+        while truncated and remaining >= max(kth, min_score):
+            t = truncated.pop()
+            full.append(t)
+            remaining -= float(self._cutoff[t])
+            upgraded = True
+        if upgraded:
+            docs, exact, found, covered = self._gather(full, truncated)
+
+        # Score the rest exactly, one truncated term at a time, dropping replies whose
+        # upper bound (weights so far plus the cutoff of each top list they are missing
+        # from) falls under the k-th lower bound
+        weights = exact + found
+        slack = remaining - covered
+        for t in sorted(truncated, key=lambda t: self._cutoff[t], reverse=True):
+            keep = (weights + slack >= kth - 1e-4) & (weights + slack > min_score)  # slack for float32 sums
+            docs, weights, slack = docs[keep], weights[keep], slack[keep]
+            extra, in_top = self._lookup(t, docs)
+            weights = weights + extra
+            slack = slack - np.where(in_top, 0.0, self._cutoff[t])
+            if len(weights) >= k:
+                kth = max(kth, float(np.partition(weights, -k)[-k]))
+        keep = weights > min_score
+        docs, weights = docs[keep], weights[keep]
+        if len(docs) > k:
+            top = weights >= np.partition(weights, -k)[-k]  # ties at the k-th score are broken by reply order
+            docs, weights = docs[top], weights[top]
+        order = np.lexsort((docs, -weights))[:k]
+        return [
+            ReplyMatch(id=self.replies[docs[i]].id, text=self.replies[docs[i]].text, score=round(float(weights[i]), 4))
+            for i in order if weights[i] > min_score
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_reply_index() -> ReplyIndex:
+    """Process-wide reply index, built once on first use (or at warm-up)."""
+    return ReplyIndex.load(Path(settings.SOCIAL_REPLY_LIBRARY_PATH or DEFAULT_LIBRARY_PATH))
@@ -0,0 +1,259 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+import json
+import time
+import structlog
+
+from app.core.audit import audit
+from app.core.config import settings
+from app.core.events import get_redis, publish_event
+from app.services.approvals import (
+    DEFAULT_POLICY_PATH,
+    ApprovalEngine,
+    ApprovalError,
+    ApprovalEvent,
+    ApprovalPolicy,
+    CompiledPolicy,
+    compile_policy,
+)
+from app.services.jurisdictions import get_index
+
+logger = structlog.get_logger()
+
+# Routes live in Redis (``approvals:{incident_id}``, one hash field per
+# artifact); the engine is this process's cache of them. Every transition
+# re-reads the incident's routes first and writes back only if the route's
+# version is still the one it read, so any number of worker processes may
+# consume the ``approvals`` queue. Without APPROVAL_PERSIST the engine is the
+# only copy (single process).
+engine = ApprovalEngine()
+
+ROUTES_KEY = "approvals:{}"
+INCIDENTS_KEY = "approvals:incidents"
+WAITING_KEY = "approvals:waiting:{}"  # role -> ZSET of json [incident_id, artifact_id] by time it started waiting
+WRITE_ATTEMPTS = 5
+
+# KEYS: routes hash, incidents set, waiting zset of the old role, of the new role
+# ARGV: artifact_id, expected version, route json ('' to delete), incident_id,
+#       waiting member, old role ('' if none), new role ('' if none), now
+_WRITE = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local version = 0
+if current then
+    version = cjson.decode(current).version or 1
+end
+if version ~= tonumber(ARGV[2]) then
+    return 0
+end
+if ARGV[6] ~= '' then
+    redis.call('ZREM', KEYS[3], ARGV[5])
+end
+if ARGV[3] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 1
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[4])
+if ARGV[7] ~= '' then
+    redis.call('ZADD', KEYS[4], tonumber(ARGV[8]), ARGV[5])
+end
+return 1
+"""
+
+@lru_cache(maxsize=1)
+def _write_script():
+    return get_redis().register_script(_WRITE)
+
+@lru_cache(maxsize=1)
+def get_policy() -> CompiledPolicy:
+    """The org-wide approval policy, compiled once per process."""
+    path = Path(settings.APPROVAL_POLICY_PATH) if settings.APPROVAL_POLICY_PATH else DEFAULT_POLICY_PATH
+    return compile_policy(ApprovalPolicy.load(path))
+
+@lru_cache(maxsize=64)
+def _compiled(policy_json: str) -> CompiledPolicy:
+    return compile_policy(ApprovalPolicy(**json.loads(policy_json)))
+
+def policy_for(policy: Optional[Dict[str, Any]] = None) -> CompiledPolicy:
+    """Compiled form of a caller's policy (cached per distinct policy), or the default one."""
+    if policy is None:
+        return get_policy()
+    return _compiled(json.dumps(policy, sort_keys=True))
+
+def restore_routes() -> int:
+    """Fill the engine cache with every route in Redis."""
+    client = get_redis()
+    incidents = client.smembers(INCIDENTS_KEY)
+    pipe = client.pipeline(transaction=False)
+    for incident_id in incidents:
+        pipe.hvals(ROUTES_KEY.format(incident_id.decode()))
+    records = [json.loads(raw) for routes in pipe.execute() for raw in routes]
+    return engine.load(records)
+
+def _member(incident_id: str, artifact_id: str) -> str:
+    return json.dumps([incident_id, artifact_id])
+
+def _refresh(incident_id: str) -> None:
+    """Replace the cached routes of an incident with what Redis holds now."""
+    routes = get_redis().hvals(ROUTES_KEY.format(incident_id))
+    engine.replace_incident(incident_id, [json.loads(raw) for raw in routes])
+
+def _store(incident_id: str, artifact_id: str, previous: Optional[Dict[str, Any]]) -> bool:
+    """Write the engine's route back over ``previous``; False if Redis no longer holds ``previous``."""
+    route = engine.get(incident_id, artifact_id)
+    old_role = previous and previous["role_required"] or ""
+    new_role = route and route["role_required"] or ""
+    return bool(_write_script()(
+        keys=[ROUTES_KEY.format(incident_id), INCIDENTS_KEY, WAITING_KEY.format(old_role), WAITING_KEY.format(new_role)],
+        args=[artifact_id, previous["version"] if previous else 0, json.dumps(route) if route else "", incident_id,
+              _member(incident_id, artifact_id), old_role, new_role, time.time()],
+    ))
+
+def _transition(incident_id: str, artifact_id: str, apply: Callable[[], Optional[ApprovalEvent]]) -> Optional[ApprovalEvent]:
+    """Run ``apply`` on the incident's current routes and store its result.
+
+    If another process moved the route between the read and the write, the
+    write is refused and ``apply`` runs again on the fresh state (where it may
+    now raise ``ApprovalError``, e.g. the step was already decided).
+    """
+    if not settings.APPROVAL_PERSIST:
+        return apply()
+    for _ in range(WRITE_ATTEMPTS):
+        _refresh(incident_id)
+        previous = engine.get(incident_id, artifact_id)
+        event = apply()
+        if event is None or _store(incident_id, artifact_id, previous):
+            return event
+        logger.info("Approval route changed concurrently, retrying", incident_id=incident_id, artifact_id=artifact_id)
+    raise ApprovalError(f"Artifact {artifact_id} approval route kept changing; try again")
+
+def _notify(event: ApprovalEvent, org_id: Optional[str] = None) -> Dict[str, Any]:
+    data = event.dict()
+    publish_event(f"incident:{event.incident_id}:approvals", data)
+    audit(
+        event.type,
+        f"artifact:{event.artifact_id}",
+        incident_id=event.incident_id,
+        org_id=org_id,
+        user_id=event.actor,
+        meta={"status": event.status, "previous_status": event.previous_status, "rule": event.rule,
+              "required_order": event.required_order, "order_idx": event.order_idx, "comment": event.comment},
+    )
+    return data
+
+@celery_app.task(bind=True)
+def route_artifact_approval(
+    self,
+    incident_id: str,
+    artifact_id: str,
+    artifact_kind: str,
+    severity: str = "high",
+    jurisdictions: Optional[List[str]] = None,
+    approval_required: bool = True,
+    chain: Optional[List[str]] = None,
+    policy: Optional[Dict[str, Any]] = None,
+    org_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Route an artifact (``Approval.route(artifact, policy)``) and start its approval chain.
+
+    The required role order comes from the compiled policy unless the caller
+    gives an explicit ``chain``; an artifact with ``approval_required`` unset
+    (``ContentResponse.approval_required``) needs no approval. Routing an
+    artifact again, e.g. after a revision, restarts its chain.
+    """
+    if not approval_required:
+        rule, required = "not_required", ()
+    elif chain is not None:
+        rule, required = "explicit", tuple(chain)
+    else:
+        codes = get_index().canonical(jurisdictions or [])
+        rule, required = policy_for(policy).route(artifact_kind, severity, codes)
+    event = _transition(incident_id, artifact_id,
+                        lambda: engine.route(incident_id, artifact_id, artifact_kind, rule, required))
+    logger.info("Artifact routed for approval", incident_id=incident_id, artifact_id=artifact_id,
+                rule=rule, required_order=list(required), pending=engine.pending_count())
+    return _notify(event, org_id)
+
+@celery_app.task(bind=True)
+def record_approval_decision(
+    self,
+    incident_id: str,
+    artifact_id: str,
+    order_idx: int,
+    role: str,
+    decision: str,
+    user_id: Optional[str] = None,
+    comment: Optional[str] = None,
+    org_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Apply an approve/reject on the step awaiting ``role`` and advance the artifact's chain."""
+    try:
+        event = _transition(incident_id, artifact_id, lambda: engine.decide(
+            incident_id, artifact_id, order_idx, role, decision, user_id=user_id, comment=comment))
+    except ApprovalError as e:
+        publish_event(f"incident:{incident_id}:approvals", {
+            "type": "approval.refused",
+            "incident_id": incident_id,
+            "artifact_id": artifact_id,
+            "order_idx": order_idx,
+            "actor": user_id,
+            "error": str(e),
+        })
+        raise
+    if event.incident_ready:
+        logger.info("Incident approvals complete", incident_id=incident_id)
+    return _notify(event, org_id)
+
+@celery_app.task(bind=True)
+def withdraw_artifact_approval(self, incident_id: str, artifact_id: str, org_id: Optional[str] = None) -> Dict[str, Any]:
+    """Stop tracking an artifact's approvals (artifact deleted or its channel disabled)."""
+    event = _transition(incident_id, artifact_id, lambda: engine.withdraw(incident_id, artifact_id))
+    if event is None:
+        return {"incident_id": incident_id, "artifact_id": artifact_id, "withdrawn": False}
+    return _notify(event, org_id)
+
+@celery_app.task(bind=True)
+def cancel_incident_approvals(self, incident_id: str) -> Dict[str, Any]:
+    """Drop all approval routes of an archived incident."""
+    cancelled = engine.cancel_incident(incident_id)
+    if settings.APPROVAL_PERSIST:
+        client = get_redis()
+        key = ROUTES_KEY.format(incident_id)
+        routes = [json.loads(raw) for raw in client.hvals(key)]
+        pipe = client.pipeline(transaction=True)
+        for route in routes:
+            if route["role_required"]:
+                pipe.zrem(WAITING_KEY.format(route["role_required"]), _member(incident_id, route["artifact_id"]))
+        pipe.delete(key)
+        pipe.srem(INCIDENTS_KEY, incident_id)
+        pipe.execute()
+        cancelled = len(routes)
+    return {"incident_id": incident_id, "cancelled": cancelled}
+
+@celery_app.task(bind=True)
+def approval_status(self, incident_id: str) -> Dict[str, Any]:
+    """Approval routes of an incident and whether it may be set ``ready``."""
+    if settings.APPROVAL_PERSIST:
+        _refresh(incident_id)
+    return {"incident_id": incident_id, "ready": engine.ready(incident_id), "routes": engine.incident(incident_id)}
+
+@celery_app.task(bind=True)
+def pending_approvals(self, role: str, limit: int = 100) -> Dict[str, Any]:
+    """Artifacts whose next approval step needs ``role``, oldest first."""
+    if not settings.APPROVAL_PERSIST:
+        return {"role": role, "total": engine.pending_count(role), "routes": engine.waiting_on(role, limit)}
+    client = get_redis()
+    key = WAITING_KEY.format(role)
+    pipe = client.pipeline(transaction=False)
+    pipe.zcard(key)
+    pipe.zrange(key, 0, limit - 1)
+    total, members = pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for member in members:
+        incident_id, artifact_id = json.loads(member)
+        pipe.hget(ROUTES_KEY.format(incident_id), artifact_id)
+    routes = [json.loads(raw) for raw in pipe.execute() if raw]
+    return {"role": role, "total": total, "routes": routes}
@@ -0,0 +1,66 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+import structlog
+
+from app.core.audit import audit
+from app.core.config import settings
+from app.core.events import get_redis
+from app.services.revisions import RevisionStore
+
+logger = structlog.get_logger()
+
+@lru_cache(maxsize=1)
+def get_revision_store() -> RevisionStore:
+    """Process-wide artifact revision store, shared through Redis."""
+    return RevisionStore(
+        redis_client=get_redis(),
+        snapshot_interval=settings.REVISION_SNAPSHOT_INTERVAL,
+        cache_size=settings.REVISION_CACHE_SIZE,
+    )
+
+@celery_app.task(bind=True)
+def commit_revision(
+    self,
+    artifact_id: str,
+    parent: int,
+    content: Optional[str] = None,
+    ops: Optional[List[List[Any]]] = None,
+    author_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Save an edit of version ``parent``, as the full new content or as ``[start, end, text]`` ops."""
+    version = get_revision_store().commit(
+        artifact_id, parent, ops=ops, text=content, meta={"author_id": author_id} if author_id else None
+    )
+    logger.info("Artifact revision saved", artifact_id=artifact_id, version=version)
+    return {"artifact_id": artifact_id, "version": version}
+
+@celery_app.task(bind=True)
+def accept_redlines(
+    self,
+    artifact_id: str,
+    version: int,
+    redlines: List[Dict[str, Any]],
+    incident_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Apply accepted ``legal_lint_content`` redlines for ``version`` as one new revision."""
+    result = get_revision_store().apply_redlines(artifact_id, version, redlines, meta={"author_id": user_id} if user_id else None)
+    if result["applied"]:
+        audit(
+            "legal.redlines_accepted",
+            f"artifact:{artifact_id}",
+            incident_id=incident_id,
+            user_id=user_id,
+            meta={"from_version": version, "version": result["version"], "applied": len(result["applied"]), "skipped": len(result["skipped"])},
+        )
+    logger.info("Redlines accepted", artifact_id=artifact_id, version=result["version"],
+                applied=len(result["applied"]), skipped=len(result["skipped"]))
+    return {"artifact_id": artifact_id, **result}
+
+@celery_app.task(bind=True)
+def get_revision(self, artifact_id: str, version: Optional[int] = None) -> Dict[str, Any]:
+    """Content of ``version`` (default latest)."""
+    version, table = get_revision_store().table(artifact_id, version)
+    return {"artifact_id": artifact_id, "version": version, "content": table.text()}
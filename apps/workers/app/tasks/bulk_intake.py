@@ -0,0 +1,54 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from functools import lru_cache
+from typing import Dict, Any, List
+import structlog
+
+from app.core.config import settings
+from app.core.events import publish_event
+from app.services.incident_store import PostgresIncidentStore
+from app.tasks.intake_normalizer import normalize
+
+logger = structlog.get_logger()
+
+@lru_cache(maxsize=1)
+def get_incident_store() -> PostgresIncidentStore:
+    """Per-process connection for bulk writes."""
+    return PostgresIncidentStore(settings.DATABASE_URL)
+
+@celery_app.task(bind=True)
+def normalize_incident_batch(self, batch_id: str, org_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Normalize and persist one chunk of a bulk import (``POST /incidents/bulk-intake``).
+
+    ``records`` are ``{"line", "incident"}`` as queued by the orchestrator. A
+    record that fails to normalize is reported with its line and skipped; the
+    rest of the chunk is persisted in one transaction. Chunks are spread over
+    the bulk queue's worker processes, so throughput grows with the pool's
+    concurrency. Per-chunk progress and errors go to ``intake:{batch_id}:records``.
+    """
+    normalized = []
+    errors: List[Dict[str, Any]] = []
+    for record in records:
+        incident = record["incident"]
+        try:
+            normalized.append((incident, normalize(incident).dict()))
+        except Exception as e:
+            errors.append({"line": record.get("line"), "incident_id": incident.get("id"), "error": f"{type(e).__name__}: {e}"})
+
+    persisted = get_incident_store().save(org_id, normalized) if settings.BULK_INTAKE_PERSIST else 0
+    publish_event(f"intake:{batch_id}:records", {
+        "type": "intake.chunk",
+        "batch_id": batch_id,
+        "normalized": len(normalized),
+        "persisted": persisted,
+        "errors": errors,
+    })
+    logger.info("Bulk intake chunk normalized", batch_id=batch_id, records=len(records), errors=len(errors), persisted=persisted)
+    return {
+        "batch_id": batch_id,
+        "normalized": len(normalized),
+        "persisted": persisted,
+        "errors": errors,
+        "incidents": [{"id": incident["id"], "severity": facts["severity"], "unknowns": facts["unknowns"]}
+                      for incident, facts in normalized],
+    }
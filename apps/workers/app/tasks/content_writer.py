@@ -8,6 +8,10 @@ from pydantic import BaseModel, Field
 from celery import shared_task
 import structlog
 
+from app.core.memo import memoize_task
+from app.services.social import compose_post, get_platform
+from app.tasks.statement_index import closest_approved, synced_store
+
 logger = structlog.get_logger()
 
 class ContentRequest(BaseModel):
@@ -47,6 +51,7 @@ class SocialMediaPost(BaseModel):
     includes_media: bool = False
 
 @shared_task(bind=True, name="generate_holding_statement")
+@memoize_task("generate_holding_statement", ContentRequest, generation=lambda: len(synced_store()))
 def generate_holding_statement(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
     """Generate a holding statement for immediate release."""
     try:
@@ -80,6 +85,9 @@ For the latest status updates, please visit our status page or contact our suppo
             systems_list = ", ".join(affected_systems[:3])  # Limit to first 3
             content += f"\n\nAffected systems: {systems_list}"
         
+        # Closest previously approved statement as a starting point
+        reference = closest_approved("holding_statement", content)
+        
         response = ContentResponse(
             content_id=f"holding_{request.incident_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
             content_type="holding_statement",
@@ -90,7 +98,8 @@ For the latest status updates, please visit our status page or contact our suppo
                 "tone": tone,
                 "target_audience": request.target_audience,
                 "word_count": len(content.split()),
-                "estimated_read_time": "30 seconds"
+                "estimated_read_time": "30 seconds",
+                "closest_approved": reference.dict() if reference else None
             },
             generated_at=datetime.now(),
             confidence_score=0.85,
@@ -140,7 +149,7 @@ WHAT WE'RE DOING:
 Our technical teams are working around the clock to resolve this issue. We have implemented containment measures and are systematically restoring affected services. We are also conducting a thorough investigation to prevent similar incidents in the future.
 
 WHAT THIS MEANS FOR YOU:
-{self._generate_user_impact_section(request)}
+{_generate_user_impact_section(self, request)}
 
 TIMELINE:
 - {detected_time}: Issue detected and investigation began
@@ -161,6 +170,8 @@ Contact: Media Relations
 Email: media@{company_name.lower().replace(' ', '')}.com
 Phone: [CONTACT_NUMBER]"""
         
+        reference = closest_approved("press_release", content)
+        
         response = ContentResponse(
             content_id=f"press_{request.incident_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
             content_type="press_release",
@@ -172,7 +183,8 @@ Phone: [CONTACT_NUMBER]"""
                 "target_audience": request.target_audience,
                 "word_count": len(content.split()),
                 "estimated_read_time": "2 minutes",
-                "boilerplate_included": True
+                "boilerplate_included": True,
+                "closest_approved": reference.dict() if reference else None
             },
             generated_at=datetime.now(),
             confidence_score=0.80,
@@ -221,7 +233,7 @@ SEVERITY: {request.severity.upper()}
 DETECTED: {request.incident_facts.get('detected_time', 'Recently')}
 
 IMPACT:
-{self._generate_impact_summary(request)}
+{_generate_impact_summary(self, request)}
 
 WHAT WE'RE DOING:
 - Incident response team is activated and coordinating
@@ -288,6 +300,7 @@ This is an automated message. For urgent matters, contact the incident commander
         raise
 
 @shared_task(bind=True, name="generate_faq")
+@memoize_task("generate_faq", ContentRequest)
 def generate_faq(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
     """Generate FAQ content based on incident facts."""
     try:
@@ -404,26 +417,21 @@ def generate_social_media(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         
         posts = []
         
+        status_url = request.template_variables.get("status_url", "[STATUS_PAGE_URL]")
         for platform in platforms:
-            if platform.lower() == "twitter":
-                post = SocialMediaPost(
-                    platform="twitter",
-                    content=f"We're aware of a {incident_type} and are working to resolve it. Updates: [STATUS_PAGE_URL] #ServiceUpdate",
-                    hashtags=["#ServiceUpdate", "#CustomerFirst"],
-                    character_count=140,
-                    includes_media=False
-                )
-                posts.append(post)
-                
-            elif platform.lower() == "linkedin":
-                post = SocialMediaPost(
-                    platform="linkedin",
-                    content=f"We're experiencing a {incident_type} and our team is actively working to resolve it. We'll provide updates as we have more information. Thank you for your patience.",
-                    hashtags=["#ServiceUpdate", "#CustomerService"],
-                    character_count=300,
-                    includes_media=False
-                )
-                posts.append(post)
+            spec = get_platform(platform)
+            if spec.limit <= 500:
+                message = f"We're aware of a {incident_type} and are working to resolve it. Updates:"
+            else:
+                message = f"We're experiencing a {incident_type} and our team is actively working to resolve it. We'll provide updates as we have more information. Thank you for your patience."
+            content, hashtags, length, _ = compose_post(message, spec, url=status_url, hashtags=["ServiceUpdate", "CustomerFirst"])
+            posts.append(SocialMediaPost(
+                platform=spec.name,
+                content=content,
+                hashtags=hashtags,
+                character_count=length,
+                includes_media=False
+            ))
         
         # Create response with all posts
         content = "SOCIAL MEDIA POSTS\n\n"
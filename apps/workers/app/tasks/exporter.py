@@ -8,6 +8,8 @@ import base64
 import io
 import zipfile
 
+from app.core.audit import audit
+
 class ExportRequest(BaseModel):
     incident_id: str
     export_type: str  # pdf|csv|mdx|zip
@@ -66,6 +68,12 @@ def export_generate(self, req: Dict[str, Any]) -> Dict[str, Any]:
     else:
         raise ValueError('Unsupported export_type')
 
+    audit(
+        "export.generated",
+        f"export:{filename}",
+        incident_id=data.incident_id,
+        meta={"export_type": data.export_type, "bytes": len(content_bytes)},
+    )
     resp = ExportResponse(
         export_type=data.export_type,
         filename=filename,
@@ -4,6 +4,9 @@ from pydantic import BaseModel
 from typing import List, Dict, Any
 import structlog
 
+from app.services.extraction import extract_facts
+from app.services.jurisdictions import get_index
+
 logger = structlog.get_logger()
 
 class IncidentInput(BaseModel):
@@ -21,48 +24,82 @@ class NormalizedFacts(BaseModel):
     jurisdictions: List[str]
     data_categories: List[str]
 
+def normalize(incident_data: Dict[str, Any]) -> NormalizedFacts:
+    """Structured facts, unknowns and severity for one incident input."""
+    # Parse input
+    incident = IncidentInput(**incident_data)
+
+    # Extract facts
+    facts = [
+        {"label": "title", "value": incident.title, "confidence": "high"},
+        {"label": "detected_at", "value": incident.detected_at, "confidence": "high"},
+        {"label": "affected_users", "value": str(incident.affected_users), "confidence": "medium"},
+        {"label": "data_types", "value": ", ".join(incident.data_types), "confidence": "high"},
+    ]
+
+    # Low-confidence matches (a bare "SEC", "personal data", "database") stay
+    # facts only and never set the count, categories, jurisdictions or systems below
+    extracted = extract_facts(incident.description)
+    facts.extend(
+        {"label": f.label, "value": f.value, "confidence": f.confidence, "source": f.source}
+        for f in extracted.facts
+    )
+
+    affected_users = incident.affected_users or extracted.record_count or 0
+    data_categories = list(dict.fromkeys(incident.data_types + extracted.data_types))
+    jurisdiction_index = get_index()
+    jurisdictions = jurisdiction_index.canonical(incident.jurisdictions + extracted.jurisdictions)
+    for code in jurisdictions:
+        jurisdiction = jurisdiction_index.get(code)
+        if jurisdiction is None:
+            continue
+        rule = jurisdiction.notification
+        regulators = ", ".join(r.name for r in jurisdiction.regulators)
+        deadline = f"{rule.regulator_hours}h to {regulators}" if rule.regulator_hours else f"individuals: {rule.individuals}"
+        facts.append({
+            "label": "notification_deadline",
+            "value": f"{code}: {deadline} ({rule.basis})",
+            "confidence": "medium",
+            "source": "jurisdiction_index",
+        })
+
+    # Determine unknowns
+    unknowns = []
+    if incident.affected_users == 0 and not extracted.record_count_exact:
+        unknowns.append("exact_user_count")
+    if not jurisdictions:
+        unknowns.append("affected_jurisdictions")
+    if not data_categories:
+        unknowns.append("data_categories")
+    if not extracted.systems:
+        unknowns.append("affected_systems")
+
+    # Calculate severity
+    severity = "high"
+    if affected_users > 10000:
+        severity = "critical"
+    elif affected_users < 100:
+        severity = "medium"
+
+    return NormalizedFacts(
+        facts=facts,
+        unknowns=unknowns,
+        severity=severity,
+        jurisdictions=jurisdictions,
+        data_categories=data_categories,
+    )
+
 @celery_app.task(bind=True)
 def normalize_incident(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize incident input into structured facts and unknowns."""
     logger.info("Starting incident normalization", incident_id=incident_data.get("id"))
     
     try:
-        # Parse input
-        incident = IncidentInput(**incident_data)
-        
-        # Extract facts
-        facts = [
-            {"label": "title", "value": incident.title, "confidence": "high"},
-            {"label": "detected_at", "value": incident.detected_at, "confidence": "high"},
-            {"label": "affected_users", "value": str(incident.affected_users), "confidence": "medium"},
-            {"label": "data_types", "value": ", ".join(incident.data_types), "confidence": "high"},
-        ]
-        
-        # Determine unknowns
-        unknowns = []
-        if incident.affected_users == 0:
-            unknowns.append("exact_user_count")
-        if not incident.jurisdictions:
-            unknowns.append("affected_jurisdictions")
-        
-        # Calculate severity
-        severity = "high"
-        if incident.affected_users > 10000:
-            severity = "critical"
-        elif incident.affected_users < 100:
-            severity = "medium"
-        
-        result = NormalizedFacts(
-            facts=facts,
-            unknowns=unknowns,
-            severity=severity,
-            jurisdictions=incident.jurisdictions,
-            data_categories=incident.data_types,
-        )
+        result = normalize(incident_data)
         
         logger.info("Incident normalization completed", 
                    incident_id=incident_data.get("id"),
-                   severity=severity)
+                   severity=result.severity)
         
         return result.dict()
         
@@ -6,6 +6,13 @@ from pydantic import BaseModel, Field
 from celery import shared_task
 import structlog
 
+from app.core.audit import audit
+from app.core.config import settings
+from app.core.memo import memoize_task
+from app.services.jurisdictions import get_index
+from app.services.similarity import split_sections
+from app.tasks.statement_index import synced_store
+
 logger = structlog.get_logger()
 
 RISKY_TERMS = {
@@ -39,22 +46,54 @@ class LegalLintResponse(BaseModel):
     summary: Dict[str, Any]
     generated_at: datetime
 
+def _cleared_sections(text: str) -> List[tuple]:
+    """(start, end) of sections identical to approved text (up to case and whitespace).
+
+    Only exact matches are skipped: a near-duplicate may differ by exactly the
+    risky words ("We guarantee ...") that need a redline.
+    """
+    store = synced_store()
+    if not len(store):
+        return []
+    return [(start, end) for start, end, section in split_sections(text) if store.exact(section)]
+
 @shared_task(bind=True, name="legal_lint_content")
 def legal_lint_content(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    result = _lint_content(self, request_data)
+    # Outside the memoized body: cache hits are audited too
+    audit(
+        "legal.redlines",
+        f"artifact:{result['artifact_id']}",
+        incident_id=result["incident_id"],
+        meta={"total": result["summary"]["total"], "by_severity": result["summary"]["by_severity"]},
+    )
+    return result
+
+@memoize_task("legal_lint_content", LegalLintRequest, generation=lambda: len(synced_store()), clock=datetime.utcnow)
+def _lint_content(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
     request = LegalLintRequest(**request_data)
     logger.info("Legal lint started", incident_id=request.incident_id, artifact_id=request.artifact_id)
 
     text = request.content
     redlines: List[Redline] = []
 
+    terms = dict(RISKY_TERMS)
+    if request.jurisdiction:
+        terms.update(get_index().risky_terms([request.jurisdiction]))
+
+    cleared = _cleared_sections(text) if settings.LEGAL_LINT_SKIP_CLEARED else []
+
     lowered = text.lower()
-    for risky, safe in RISKY_TERMS.items():
+    for risky, safe in terms.items():
         start = 0
         while True:
             idx = lowered.find(risky, start)
             if idx == -1:
                 break
             end = idx + len(risky)
+            if any(s <= idx < e for s, e in cleared):
+                start = end
+                continue
             original = text[idx:end]
             reason = f"Replace '{risky}' with '{safe}' to reduce liability/exposure."
             severity = "high" if risky in ["breach", "hack", "stolen"] else "medium"
@@ -63,6 +102,8 @@ def legal_lint_content(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
 
     summary = {
         "total": len(redlines),
+        "skipped_sections": len(cleared),
+        "jurisdiction": get_index().canonical([request.jurisdiction])[0] if request.jurisdiction else None,
         "by_severity": {
             "critical": sum(1 for r in redlines if r.severity == "critical"),
             "high": sum(1 for r in redlines if r.severity == "high"),
@@ -1,14 +1,42 @@
 # Created automatically by Cursor AI (2024-12-19)
 
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field
 from celery import shared_task
+import json
 import random
+import time
+import redis
 import structlog
 
+from app.core.config import settings
+from app.core.events import get_redis, publish_event
+from app.core.sharding import MONITOR_QUEUE, monitor_queue
+from app.services.anomaly import AnomalyDetector
+from app.services.dedup import MentionDeduplicator
+from app.tasks.monitor_series import get_series_store
+
 logger = structlog.get_logger()
 
+# One detector and dedup filter per worker process: an incident's mentions must
+# keep landing on the same process for its windows to be meaningful.
+deduplicator = MentionDeduplicator(
+    window_seconds=settings.DEDUP_WINDOW_SECONDS,
+    partitions=settings.DEDUP_PARTITIONS,
+    capacity=settings.DEDUP_PARTITION_CAPACITY,
+    error_rate=settings.DEDUP_ERROR_RATE,
+)
+detector = AnomalyDetector(
+    bucket_seconds=settings.ANOMALY_BUCKET_SECONDS,
+    window_buckets=settings.ANOMALY_WINDOW_BUCKETS,
+    z_threshold=settings.ANOMALY_Z_THRESHOLD,
+    min_count=settings.ANOMALY_MIN_COUNT,
+    cusum_h=settings.ANOMALY_CUSUM_H,
+    cooldown_seconds=settings.ANOMALY_COOLDOWN_SECONDS,
+)
+_last_expiry = time.monotonic()
+
 class Mention(BaseModel):
     id: str
     incident_id: str
@@ -25,45 +53,108 @@ class Rumor(BaseModel):
     severity: str
     created_at: datetime
 
-class SentimentPoint(BaseModel):
-    t: datetime
-    value: float
+RUMOR_KEYWORDS = ("breach", "leak", "stolen", "lawsuit", "fine")
 
-@shared_task(bind=True, name="monitor_ingest_mentions")
-def monitor_ingest_mentions(self, incident_id: str, raw_feed: List[Dict[str, Any]]) -> Dict[str, Any]:
+def score_sentiment(text: str) -> float:
+    return round(random.uniform(-0.5, 0.9), 2) if text else 0.0
+
+def is_rumor(text: str) -> bool:
+    lowered = text.lower()
+    return any(kw in lowered for kw in RUMOR_KEYWORDS)
+
+def build_mentions(incident_id: str, raw_feed: List[Dict[str, Any]], now: datetime) -> List[Mention]:
     mentions: List[Mention] = []
-    now = datetime.utcnow()
     for idx, item in enumerate(raw_feed):
         text = item.get("text", "")
-        sentiment = random.uniform(-0.5, 0.9) if text else 0.0
         mentions.append(Mention(
-            id=f"m-{int(now.timestamp())}-{idx}",
+            id=item.get("id") or f"m-{int(now.timestamp())}-{idx}",
             incident_id=incident_id,
             source=item.get("source", "unknown"),
             text=text,
             created_at=now - timedelta(minutes=random.randint(0, 120)),
-            sentiment=round(sentiment, 2)
+            sentiment=score_sentiment(text)
         ))
-    logger.info("monitor_ingest_mentions", count=len(mentions))
-    return {"mentions": [m.dict() for m in mentions]}
-
-@shared_task(bind=True, name="analyze_sentiment_series")
-def analyze_sentiment_series(self, incident_id: str, hours: int = 24) -> Dict[str, Any]:
-    now = datetime.utcnow()
-    points: List[SentimentPoint] = []
-    base = random.uniform(-0.1, 0.1)
-    for i in range(hours):
-        jitter = random.uniform(-0.2, 0.2)
-        val = max(-1.0, min(1.0, base + jitter))
-        points.append(SentimentPoint(t=now - timedelta(hours=hours - i), value=round(val, 2)))
-    return {"series": [p.dict() for p in points]}
+        logger.debug("mention_ingested", incident_id=incident_id, source=mentions[-1].source, sentiment=mentions[-1].sentiment)
+    return mentions
+
+def _handoff_key(incident_id: str) -> str:
+    return f"monitor:handoff:{incident_id}"
+
+def adopt_incident(incident_id: str) -> bool:
+    """On first sight of an incident, pick up state handed off by its previous shard."""
+    if incident_id in detector or incident_id in deduplicator:
+        return False
+    try:
+        payload = get_redis().getdel(_handoff_key(incident_id))
+    except redis.RedisError as e:
+        logger.debug("Handoff lookup failed", incident_id=incident_id, error=str(e))
+        return False
+    if payload is None:
+        return False
+    state = json.loads(payload)
+    if state.get("detector"):
+        detector.restore(incident_id, state["detector"])
+    if state.get("dedup"):
+        deduplicator.restore(incident_id, state["dedup"])
+    logger.info("Incident state adopted", incident_id=incident_id)
+    return True
+
+def hand_off_incident(incident_id: str) -> bool:
+    """Release an incident's in-memory state to Redis for its new shard to adopt."""
+    state = {"detector": detector.export(incident_id), "dedup": deduplicator.export(incident_id)}
+    try:
+        get_redis().setex(_handoff_key(incident_id), settings.MONITOR_HANDOFF_TTL_SECONDS, json.dumps(state))
+        return True
+    except redis.RedisError as e:
+        # The new owner starts cold; windows and dedup rebuild from live traffic
+        logger.warning("Handoff failed", incident_id=incident_id, error=str(e))
+        return False
+
+def dedupe_feed(incident_id: str, raw_feed: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Drop reposts/re-polls already seen for the incident and canonicalize sources."""
+    if not settings.DEDUP_ENABLED:
+        return raw_feed, 0
+    return deduplicator.filter(incident_id, raw_feed, time.time())
+
+@shared_task(bind=True, name="monitor_ingest_mentions")
+def monitor_ingest_mentions(self, incident_id: str, raw_feed: List[Dict[str, Any]]) -> Dict[str, Any]:
+    adopt_incident(incident_id)
+    feed, duplicates = dedupe_feed(incident_id, raw_feed)
+    mentions = build_mentions(incident_id, feed, datetime.utcnow())
+    anomalies = watch_mentions(incident_id, mentions)
+    record_series(incident_id, mentions)
+    logger.info("monitor_ingest_mentions", count=len(mentions), duplicates=duplicates, anomalies=len(anomalies))
+    return {"mentions": [m.dict() for m in mentions], "duplicates": duplicates, "anomalies": anomalies}
+
+def watch_mentions(incident_id: str, mentions: List[Mention]) -> List[Dict[str, Any]]:
+    """Feed mentions to the spike detector (by arrival time) and publish any alerts."""
+    global _last_expiry
+    arrived = time.time()
+    alerts = detector.observe_many(incident_id, ((arrived, m.sentiment) for m in mentions if m.text))
+    for alert in alerts:
+        publish_event(f"incident:{incident_id}:monitor", alert.dict())
+        logger.warning("Mention anomaly detected", incident_id=incident_id, kind=alert.kind, z_score=alert.z_score)
+
+    if time.monotonic() - _last_expiry > settings.ANOMALY_IDLE_SECONDS / 2:
+        _last_expiry = time.monotonic()
+        detector.expire(arrived, settings.ANOMALY_IDLE_SECONDS)
+        deduplicator.expire(arrived)
+    return [alert.dict() for alert in alerts]
+
+def record_series(incident_id: str, mentions: List[Mention]) -> None:
+    """Add mentions to the incident's chart bins; charts lag rather than fail the task on Redis errors."""
+    points = [(m.created_at.replace(tzinfo=timezone.utc).timestamp(), m.sentiment) for m in mentions if m.text]
+    try:
+        get_series_store().add(incident_id, points)
+    except redis.RedisError as e:
+        logger.warning("Series write failed", incident_id=incident_id, error=str(e))
 
 @shared_task(bind=True, name="detect_rumors")
 def detect_rumors(self, incident_id: str, mentions: List[Dict[str, Any]]) -> Dict[str, Any]:
     rumors: List[Rumor] = []
     for m in mentions:
         text = m.get("text", "")
-        if any(kw in text.lower() for kw in ["breach", "leak", "stolen", "lawsuit", "fine"]):
+        if is_rumor(text):
             rumors.append(Rumor(
                 id=f"r-{m.get('id', '')}",
                 incident_id=incident_id,
@@ -73,3 +164,29 @@ def detect_rumors(self, incident_id: str, mentions: List[Dict[str, Any]]) -> Dic
                 created_at=datetime.utcnow()
             ))
     return {"rumors": [r.dict() for r in rumors]}
+
+@shared_task(bind=True, name="monitor_rebalance")
+def monitor_rebalance(self, shards: int) -> Dict[str, Any]:
+    """Hand off every incident this shard no longer owns on a ring of ``shards`` shards.
+
+    Sent to each current monitor queue by ``rebalance_monitor_shards``; shard
+    workers run with concurrency 1, so the queue's one process holds all of
+    its incidents.
+    """
+    own_queue = (self.request.delivery_info or {}).get("routing_key") or MONITOR_QUEUE
+    local = set(detector.incidents()) | set(deduplicator.incidents())
+    moved = [incident_id for incident_id in local if monitor_queue(incident_id, shards) != own_queue]
+    handed_off = sum(hand_off_incident(incident_id) for incident_id in moved)
+    logger.info("Monitor shard rebalanced", queue=own_queue, shards=shards, kept=len(local) - len(moved), moved=len(moved))
+    return {"queue": own_queue, "kept": len(local) - len(moved), "moved": len(moved), "handed_off": handed_off}
+
+def rebalance_monitor_shards(old_shards: int, new_shards: int) -> List[str]:
+    """Ask every shard of the old layout to release incidents that move on the new one.
+
+    Start the new shard workers first, run this, then switch producers to the
+    new ``MONITOR_SHARDS``; incidents that arrive before their handoff start cold.
+    """
+    queues = [MONITOR_QUEUE] if old_shards <= 1 else [f"{MONITOR_QUEUE}.{i}" for i in range(old_shards)]
+    for queue in queues:
+        monitor_rebalance.apply_async(args=[new_shards], queue=queue)
+    return queues
@@ -0,0 +1,108 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Chart reads of the mention series (``monitor_ingest`` writes the bins).
+
+The series lives in Redis, so these run on the ``interactive`` workers
+rather than behind ingest on the single-process monitor shard queues.
+"""
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pydantic import BaseModel, Field
+from celery import shared_task
+import json
+import random
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.events import get_redis
+from app.core.memo import get_cache, request_key
+from app.services.series import LTTB, VOLUME, MentionSeriesStore, downsample
+
+logger = structlog.get_logger()
+
+@lru_cache(maxsize=1)
+def get_series_store() -> MentionSeriesStore:
+    """Process-wide mention series, shared through Redis."""
+    return MentionSeriesStore(bin_seconds=settings.SERIES_BIN_SECONDS, redis_client=get_redis(), ttl=settings.SERIES_TTL_SECONDS)
+
+class SentimentPoint(BaseModel):
+    t: datetime
+    value: float
+
+class SeriesQuery(BaseModel):
+    incident_id: str
+    metric: str = Field(default=VOLUME, description="volume | sentiment")
+    start: Optional[datetime] = Field(default=None, description="UTC; from the first mention when unset")
+    end: Optional[datetime] = Field(default=None, description="UTC, exclusive; up to the latest mention when unset")
+    bin_seconds: Optional[int] = Field(default=None, description="Resolution; the stored bin size when unset")
+    max_points: Optional[int] = Field(default=None, ge=3, description="Point budget; SERIES_MAX_POINTS when unset")
+    method: str = Field(default=LTTB, description="lttb | minmax")
+
+class SeriesResponse(BaseModel):
+    incident_id: str
+    metric: str
+    method: str
+    bin_seconds: int
+    raw_points: int
+    downsampled: bool
+    series: List[SentimentPoint]
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+@shared_task(bind=True, name="analyze_sentiment_series")
+def analyze_sentiment_series(self, incident_id: str, hours: int = 24, max_points: Optional[int] = None) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    points: List[SentimentPoint] = []
+    base = random.uniform(-0.1, 0.1)
+    for i in range(hours):
+        jitter = random.uniform(-0.2, 0.2)
+        val = max(-1.0, min(1.0, base + jitter))
+        points.append(SentimentPoint(t=now - timedelta(hours=hours - i), value=round(val, 2)))
+    budget = min(max_points or settings.SERIES_MAX_POINTS, settings.SERIES_MAX_POINTS_LIMIT)
+    if len(points) > budget:
+        picked, _ = downsample(np.arange(len(points)), np.array([p.value for p in points]), budget)
+        points = [points[i] for i in picked.tolist()]
+    return {"series": [p.dict() for p in points]}
+
+@shared_task(bind=True, name="query_mention_series")
+def query_mention_series(self, incident_id: str, **query: Any) -> Dict[str, Any]:
+    """Mention volume or sentiment over a window, downsampled to a point budget for charts.
+
+    Results are cached per (incident, window, resolution, budget) and keyed
+    by the incident's series generation, so new mentions invalidate them.
+    """
+    request = SeriesQuery(incident_id=incident_id, **query)
+    store = get_series_store()
+    cache = get_cache("query_mention_series") if settings.MEMO_ENABLED else None
+    key = request_key("query_mention_series", request, store.generation(incident_id)) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    bin_seconds = max(store.bin_seconds, (request.bin_seconds or store.bin_seconds) // store.bin_seconds * store.bin_seconds)
+    starts, values = store.series(incident_id, request.metric, _epoch(request.start), _epoch(request.end), bin_seconds)
+    budget = min(request.max_points or settings.SERIES_MAX_POINTS, settings.SERIES_MAX_POINTS_LIMIT)
+    times, values = downsample(starts, values, budget, request.method)
+    response = SeriesResponse(
+        incident_id=incident_id,
+        metric=request.metric,
+        method=request.method,
+        bin_seconds=bin_seconds,
+        raw_points=len(starts),
+        downsampled=len(times) < len(starts),
+        series=[
+            SentimentPoint(t=datetime.utcfromtimestamp(t), value=round(v, 4))
+            for t, v in zip(times.tolist(), values.tolist())
+        ],
+    )
+    # Same shape as a cache hit (timestamps as strings)
+    result = json.loads(json.dumps(response.dict(), default=str))
+    if cache is not None:
+        cache.set(key, result)
+    logger.info("Mention series queried", incident_id=incident_id, metric=request.metric, raw_points=len(starts), points=len(times))
+    return result
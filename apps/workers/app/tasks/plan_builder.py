@@ -1,24 +1,29 @@
 # Created automatically by Cursor AI (2024-12-19)
 from celery_app import celery_app
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import structlog
 
+from app.services.jurisdictions import get_index
+from app.tasks.sla_timer import sla_track_plan
+
 logger = structlog.get_logger()
 
 class TimelineItem(BaseModel):
     label: str
     at: datetime
     description: str
+    id: Optional[str] = None  # stable key for SLA tracking; the label when unset
 
 class TaskItem(BaseModel):
     title: str
     owner_role: str
     due_at: datetime
-    depends_on: str = None
+    depends_on: Optional[str] = None
     priority: int = 3
-    channel_hint: str = None
+    channel_hint: Optional[str] = None
+    id: Optional[str] = None  # stable key for SLA tracking; the task's position when unset
 
 class PlanResult(BaseModel):
     timeline: List[TimelineItem]
@@ -150,6 +155,29 @@ def build_plan(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
                 )
             ]
         
+        # Regulator notification deadlines per affected jurisdiction
+        jurisdiction_index = get_index()
+        for code in jurisdiction_index.canonical(incident_data.get("jurisdictions", [])):
+            jurisdiction = jurisdiction_index.get(code)
+            if jurisdiction is None or not jurisdiction.notification.regulator_hours:
+                continue
+            hours = jurisdiction.notification.regulator_hours
+            regulators = ", ".join(r.name for r in jurisdiction.regulators)
+            timeline.append(TimelineItem(
+                id=f"notification:{code}",
+                label=f"T+{hours}h {code}",
+                at=now + timedelta(hours=hours),
+                description=f"{code} regulator notification deadline ({jurisdiction.notification.basis})"
+            ))
+            tasks.append(TaskItem(
+                id=f"notification:{code}",
+                title=f"Prepare regulator notification for {code} ({regulators})",
+                owner_role="legal",
+                due_at=now + timedelta(hours=hours),
+                priority=1
+            ))
+        timeline.sort(key=lambda item: item.at)
+        
         result = PlanResult(
             timeline=[item.dict() for item in timeline],
             tasks=[item.dict() for item in tasks],
@@ -161,10 +189,21 @@ def build_plan(self, incident_data: Dict[str, Any]) -> Dict[str, Any]:
                    incident_id=incident_data.get("id"),
                    task_count=len(tasks))
         
-        return result.dict()
+        plan = result.dict()
+        if incident_data.get("id"):
+            _track_sla(incident_data["id"], plan)
+        
+        return plan
         
     except Exception as e:
         logger.error("Plan building failed", 
                     incident_id=incident_data.get("id"),
                     error=str(e))
         raise
+
+def _track_sla(incident_id: str, plan: Dict[str, Any]) -> None:
+    """Hand the plan deadlines to the SLA timer queue without failing the build."""
+    try:
+        sla_track_plan.apply_async(args=[incident_id, plan], serializer="json")
+    except Exception as e:
+        logger.warning("SLA tracking dispatch failed", incident_id=incident_id, error=str(e))
@@ -0,0 +1,52 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+import structlog
+
+from app.core.config import settings
+from app.core.profiling import dump_collapsed, recent_task_profiles, start_profiling, stop_profiling
+
+logger = structlog.get_logger()
+
+@celery_app.task(bind=True)
+def profiling_control(
+    self,
+    action: str,
+    queue: str = "*",
+    sample_rate: float = 1.0,
+    memory: bool = False,
+    interval_ms: Optional[float] = None,
+    reset: bool = False,
+) -> Dict[str, Any]:
+    """Start/stop task profiling on a queue, or dump its collapsed stacks.
+
+    ``celery -A celery_app call app.tasks.profiling.profiling_control --args='["start", "interactive"]'``
+    """
+    if action == "start":
+        options = start_profiling(queue, sample_rate=sample_rate, memory=memory, interval_ms=interval_ms)
+        logger.info("Profiling started", queue=queue, **options)
+        return {"queue": queue, "profiling": True, **options}
+
+    if action == "stop":
+        stopped = stop_profiling(queue)
+        logger.info("Profiling stopped", queue=queue, was_running=stopped)
+        return {"queue": queue, "profiling": False, "was_running": stopped}
+
+    if action == "dump":
+        collapsed = dump_collapsed(queue, reset=reset)
+        output_dir = Path(settings.PROFILING_OUTPUT_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"{queue.replace('*', 'all')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+        path.write_text(collapsed)
+        logger.info("Profile dumped", queue=queue, path=str(path), stacks=collapsed.count("\n"))
+        return {
+            "queue": queue,
+            "path": str(path),
+            "stacks": collapsed.count("\n"),
+            "collapsed": collapsed,
+            "tasks": recent_task_profiles(queue),
+        }
+
+    raise ValueError(f"Unknown profiling action: {action}")
@@ -0,0 +1,68 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from typing import Dict, Any
+from datetime import datetime, timedelta
+import structlog
+
+from app.core.config import settings
+from app.core.events import get_redis, publish_event
+from app.services.sla import RedisSLAEngine, SLAEngine
+
+logger = structlog.get_logger()
+
+# Deadlines live in Redis, so they survive worker restarts and child recycling
+# and any process may track or tick. The memory backend keeps them in this
+# process's heap: single process only, and lost on restart.
+if settings.SLA_BACKEND == "memory":
+    engine = SLAEngine(warning_lead=timedelta(minutes=settings.SLA_WARNING_LEAD_MINUTES))
+else:
+    engine = RedisSLAEngine(get_redis(), warning_lead=timedelta(minutes=settings.SLA_WARNING_LEAD_MINUTES))
+
+def _parse_dt(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+@celery_app.task(bind=True)
+def sla_track_plan(self, incident_id: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Register the tasks and milestones of a built plan with the SLA engine."""
+    now = datetime.utcnow()
+    tracked = 0
+
+    # Titles repeat across tasks; key by id, or by position in the plan
+    for index, task in enumerate(plan.get("tasks", [])):
+        engine.track(incident_id, f"task:{task.get('id') or index}", "task", task["title"], _parse_dt(task["due_at"]))
+        tracked += 1
+
+    for item in plan.get("timeline", []):
+        at = _parse_dt(item["at"])
+        # Milestones already behind us (e.g. T0) are markers, not deadlines
+        if at.replace(tzinfo=None) <= now:
+            continue
+        engine.track(incident_id, f"milestone:{item.get('id') or item['label']}", "milestone", item["description"], at)
+        tracked += 1
+
+    logger.info("SLA deadlines tracked", incident_id=incident_id, tracked=tracked, open=len(engine))
+    return {"incident_id": incident_id, "tracked": tracked}
+
+@celery_app.task(bind=True)
+def sla_complete_item(self, incident_id: str, item_id: str) -> Dict[str, Any]:
+    """Close a deadline once its task is done or its milestone is met."""
+    completed = engine.complete(incident_id, item_id)
+    return {"incident_id": incident_id, "item_id": item_id, "completed": completed}
+
+@celery_app.task(bind=True)
+def sla_cancel_incident(self, incident_id: str) -> Dict[str, Any]:
+    """Drop all open deadlines of a resolved or archived incident."""
+    return {"incident_id": incident_id, "cancelled": engine.cancel_incident(incident_id)}
+
+@celery_app.task(bind=True)
+def sla_tick(self) -> Dict[str, Any]:
+    """Fire due SLA warnings/breaches and publish them on ``incident:{id}:plan``."""
+    events = engine.advance()
+    for event in events:
+        publish_event(f"incident:{event.incident_id}:plan", event.dict())
+
+    if events:
+        logger.info("SLA events fired", count=len(events), open=len(engine))
+    return {"fired": len(events), "open": len(engine)}
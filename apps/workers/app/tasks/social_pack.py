@@ -0,0 +1,107 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
+import structlog
+
+from app.core.config import settings
+from app.services.social import ReplyMatch, compose_post, get_platform, get_reply_index, posting_cadence
+
+logger = structlog.get_logger()
+
+class RumorInput(BaseModel):
+    id: str
+    text: str
+
+class SocialPackRequest(BaseModel):
+    incident_id: str
+    incident_facts: Dict[str, Any] = Field(default_factory=dict)
+    severity: str = "medium"
+    platforms: List[str] = Field(default_factory=lambda: ["twitter", "linkedin"])
+    status_url: Optional[str] = None
+    hashtags: List[str] = Field(default_factory=lambda: ["ServiceUpdate"])
+    message: Optional[str] = Field(default=None, description="Approved holding line; generated from the facts when unset")
+    rumors: List[RumorInput] = Field(default_factory=list)
+    start_at: Optional[datetime] = None
+
+class PlatformPost(BaseModel):
+    platform: str
+    content: str
+    hashtags: List[str]
+    length: int
+    limit: int
+    truncated: bool
+
+class ScheduledPost(BaseModel):
+    platform: str
+    at: datetime
+    kind: str  # initial | update
+
+class RumorReplies(BaseModel):
+    rumor_id: str
+    rumor_text: str
+    suggestions: List[ReplyMatch]
+
+class SocialPackResponse(BaseModel):
+    incident_id: str
+    posts: List[PlatformPost]
+    cadence: List[ScheduledPost]
+    replies: List[RumorReplies]
+    generated_at: datetime
+
+def holding_line(facts: Dict[str, Any], severity: str) -> str:
+    incident_type = facts.get("incident_type", "service issue")
+    user_impact = facts.get("user_impact", "some customers")
+    urgency = "urgently" if severity in ("high", "critical") else "actively"
+    return (f"We're aware of a {incident_type} affecting {user_impact}. Our team is {urgency} investigating "
+            f"and working to resolve it. We'll share verified updates as soon as we have them.")
+
+def build_posts(message: str, platforms: List[str], status_url: Optional[str], hashtags: List[str]) -> List[PlatformPost]:
+    posts = []
+    for name in platforms:
+        spec = get_platform(name)
+        content, tags, length, truncated = compose_post(message, spec, url=status_url, hashtags=hashtags)
+        posts.append(PlatformPost(
+            platform=spec.name,
+            content=content,
+            hashtags=tags,
+            length=length,
+            limit=spec.limit,
+            truncated=truncated,
+        ))
+    return posts
+
+@celery_app.task(bind=True)
+def generate_social_pack(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-platform posts, a posting cadence and suggested replies to live rumors."""
+    request = SocialPackRequest(**request_data)
+    logger.info("Generating social pack", incident_id=request.incident_id, platforms=request.platforms, rumors=len(request.rumors))
+
+    message = request.message or holding_line(request.incident_facts, request.severity)
+    posts = build_posts(message, request.platforms, request.status_url, request.hashtags)
+    start = request.start_at or datetime.utcnow()
+    cadence = [
+        ScheduledPost(platform=platform, at=at, kind=kind)
+        for platform, at, kind in posting_cadence(request.severity, request.platforms, start, settings.SOCIAL_CADENCE_UPDATES)
+    ]
+    index = get_reply_index()
+    replies = [
+        RumorReplies(
+            rumor_id=rumor.id,
+            rumor_text=rumor.text,
+            suggestions=index.search(rumor.text, k=settings.SOCIAL_REPLIES_PER_RUMOR, min_score=settings.SOCIAL_REPLY_MIN_SCORE),
+        )
+        for rumor in request.rumors
+    ]
+
+    response = SocialPackResponse(
+        incident_id=request.incident_id,
+        posts=posts,
+        cadence=cadence,
+        replies=replies,
+        generated_at=datetime.utcnow(),
+    )
+    logger.info("Social pack generated", incident_id=request.incident_id, posts=len(posts),
+                truncated=sum(p.truncated for p in posts), replies=sum(len(r.suggestions) for r in replies))
+    return response.dict()
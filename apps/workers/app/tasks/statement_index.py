@@ -0,0 +1,50 @@
+# Created automatically by Cursor AI (2024-12-19)
+from celery_app import celery_app
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+import redis
+import structlog
+
+from app.core.config import settings
+from app.core.events import get_redis
+from app.services.similarity import ApprovedMatch, ApprovedStatementStore
+
+logger = structlog.get_logger()
+
+@lru_cache(maxsize=1)
+def get_approved_store() -> ApprovedStatementStore:
+    """Process-wide index of approved artifact texts, shared through Redis."""
+    return ApprovedStatementStore(redis_client=get_redis(), mode=settings.APPROVED_INDEX_MODE)
+
+def synced_store() -> ApprovedStatementStore:
+    """The approved store caught up with other processes; local-only if Redis is down."""
+    store = get_approved_store()
+    try:
+        store.sync()
+    except redis.RedisError as e:
+        logger.warning("Approved statement sync failed", error=str(e))
+    return store
+
+def closest_approved(kind: str, text: str) -> Optional[ApprovedMatch]:
+    """Closest approved statement of the same kind, if similar enough to reuse."""
+    store = synced_store()
+    if not len(store):
+        return None
+    matches = store.nearest(text, kind=kind, k=1)
+    if matches and matches[0].similarity >= settings.CONTENT_REUSE_THRESHOLD:
+        return matches[0]
+    return None
+
+@celery_app.task(bind=True)
+def index_approved_artifact(self, artifact_id: str, kind: str, content: str) -> Dict[str, Any]:
+    """Add a fully approved artifact to the approved statement index."""
+    store = synced_store()
+    store.add(artifact_id, kind, content)
+    logger.info("Approved artifact indexed", artifact_id=artifact_id, kind=kind, size=len(store))
+    return {"artifact_id": artifact_id, "indexed": len(store)}
+
+@celery_app.task(bind=True)
+def find_similar_statements(self, content: str, kind: Optional[str] = None, k: int = 5) -> Dict[str, Any]:
+    """Nearest approved statements to a draft."""
+    matches: List[ApprovedMatch] = synced_store().nearest(content, kind=kind, k=k)
+    return {"matches": [m.dict() for m in matches]}
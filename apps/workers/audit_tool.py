@@ -0,0 +1,40 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Audit log tools.
+
+    python audit_tool.py verify [--after-seq N --after-hash H]    # streaming tamper check
+    python audit_tool.py query INCIDENT_ID [--since ISO] [--until ISO] [--limit N]
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from app.core.audit import GENESIS, AuditLog, make_backend
+from app.core.logging import setup_logging
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["verify", "query"])
+    parser.add_argument("incident_id", nargs="?")
+    parser.add_argument("--after-seq", type=int, default=0, help="last verified sequence number")
+    parser.add_argument("--after-hash", default=GENESIS, help="hash of the last verified record")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_logging()
+    log = AuditLog(make_backend())
+    if args.command == "verify":
+        result = log.verify(args.after_seq, args.after_hash)
+        print(json.dumps(result.dict()))
+        sys.exit(0 if result.ok else 1)
+    if not args.incident_id:
+        parser.error("query needs an incident id")
+    for record in log.query(args.incident_id, args.since, args.until, args.limit):
+        print(json.dumps(record.to_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Simulated mention streams for the anomaly detector.
+
+    python -m benchmarks.anomaly_bench --incidents 5000 --minutes 30
+
+Every incident gets Poisson background traffic; a subset gets a volume spike
+or a sentiment drop partway through. Reports per-mention cost, detection
+delay (simulated seconds from onset to alert) and false alerts.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.anomaly import SENTIMENT_DROP, VOLUME_SPIKE, AnomalyDetector
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--incidents", type=int, default=5000)
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--rate", type=float, default=0.5, help="background mentions/second per incident")
+    parser.add_argument("--spike-factor", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    detector = AnomalyDetector()
+    duration = args.minutes * 60
+    onset = duration * 2 / 3
+    spiking = set(range(0, args.incidents, 10))
+    souring = set(range(5, args.incidents, 10))
+
+    # Build a time-ordered stream of (ts, incident, sentiment), one second per tick
+    rates = np.full(args.incidents, args.rate)
+    stream = []
+    for second in range(duration):
+        current = rates.copy()
+        if second >= onset:
+            current[list(spiking)] *= args.spike_factor
+        counts = rng.poisson(current)
+        for incident in np.repeat(np.arange(args.incidents), counts):
+            sentiment = rng.normal(-0.6 if second >= onset and incident in souring else 0.2, 0.25)
+            stream.append((second + rng.random(), int(incident), float(np.clip(sentiment, -1, 1))))
+
+    first_alert = {}
+    false_alerts = {VOLUME_SPIKE: 0, SENTIMENT_DROP: 0}
+    started = time.perf_counter()
+    for ts, incident, sentiment in stream:
+        for alert in detector.observe(str(incident), ts, sentiment):
+            expected = (alert.kind == VOLUME_SPIKE and incident in spiking) or (alert.kind == SENTIMENT_DROP and incident in souring)
+            if expected and ts >= onset:
+                first_alert.setdefault((incident, alert.kind), ts - onset)
+            else:
+                false_alerts[alert.kind] += 1
+    elapsed = time.perf_counter() - started
+
+    spike_delays = [d for (i, kind), d in first_alert.items() if kind == VOLUME_SPIKE]
+    drop_delays = [d for (i, kind), d in first_alert.items() if kind == SENTIMENT_DROP]
+    print(f"mentions={len(stream)} incidents={args.incidents} tracked={len(detector)}")
+    print(f"per mention: {elapsed / len(stream) * 1e6:.2f}us ({len(stream) / elapsed:,.0f} mentions/s)")
+    for label, delays, expected in (("volume spikes", spike_delays, len(spiking)), ("sentiment drops", drop_delays, len(souring))):
+        if delays:
+            print(f"{label}: detected {len(delays)}/{expected}, delay p50={np.percentile(delays, 50):.1f}s p95={np.percentile(delays, 95):.1f}s")
+        else:
+            print(f"{label}: detected 0/{expected}")
+    print(f"false alerts: {false_alerts}")
+
+
+if __name__ == "__main__":
+    main()
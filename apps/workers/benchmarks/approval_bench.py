@@ -0,0 +1,84 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Approval routing and transition cost against the number of pending approvals.
+
+    python -m benchmarks.approval_bench --pending 1000,10000,100000
+
+Compiles the bundled policy (or ``--policy``), then for each backlog size
+routes that many artifacts across incidents of mixed kinds, severities and
+jurisdictions, and times on top of it: routing one more artifact, a decision
+advancing its chain, "what is waiting on legal", and the incident readiness
+check. Every one of these should stay flat as the backlog grows; the last
+column times the same readiness answer found by scanning every route, which
+is what polling approvals costs. Engine-level, without Redis or the audit log.
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from app.services.approvals import DEFAULT_POLICY_PATH, ApprovalEngine, ApprovalPolicy, compile_policy
+
+KINDS = ("holding_statement", "press_release", "internal_memo", "faq", "social_media")
+SEVERITIES = ("low", "medium", "high", "critical")
+JURISDICTIONS = ("EU", "UK", "US", "US-CA", "CA", "AU", "SG", "DE")
+
+
+def _us(fn: Callable[[], object], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pending", default="1000,10000,100000")
+    parser.add_argument("--artifacts-per-incident", type=int, default=6)
+    parser.add_argument("--policy", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    policy = compile_policy(ApprovalPolicy.load(args.policy))
+    print(f"policy compiled in {(time.perf_counter() - started) * 1000:.1f}ms ({len(policy)} table entries)")
+
+    rng = random.Random(args.seed)
+    artifacts = [(rng.choice(KINDS), rng.choice(SEVERITIES), rng.sample(JURISDICTIONS, rng.randrange(0, 3)))
+                 for _ in range(args.runs)]
+    print(f"{'pending':>8} {'route':>9} {'+route':>9} {'decide':>9} {'waiting':>9} {'ready':>9} {'ready/scan':>11}")
+
+    for pending in (int(p) for p in args.pending.split(",")):
+        engine = ApprovalEngine()
+        for i in range(pending):
+            kind, severity, jurisdictions = artifacts[i % len(artifacts)]
+            rule, chain = policy.route(kind, severity, jurisdictions)
+            engine.route(f"inc-{i // args.artifacts_per_incident}", f"art-{i}", kind, rule, chain)
+        incident = f"inc-{pending // args.artifacts_per_incident // 2}"
+
+        items = iter(artifacts * 2)
+        route_us = _us(lambda: policy.route(*next(items)), args.runs)
+
+        ids: List[str] = []
+
+        def route_one() -> None:
+            ids.append(f"bench-{len(ids)}")
+            engine.route(incident, ids[-1], "press_release", "default", ("pr", "legal", "exec"))
+
+        add_us = _us(route_one, args.runs)
+        decisions = iter(ids)
+        decide_us = _us(lambda: engine.decide(incident, next(decisions), 1, "pr", "approved", user_id="u"), args.runs)
+        waiting_us = _us(lambda: engine.waiting_on("legal", 50), args.runs)
+        ready_us = _us(lambda: engine.ready(incident), args.runs)
+        routes = list(engine._routes.values())
+        scan_us = _us(lambda: all(r.settled for r in routes if r.incident_id == incident), 20)
+        print(f"{pending:8,d} {route_us:8.2f}us {add_us:8.2f}us {decide_us:8.2f}us {waiting_us:8.1f}us "
+              f"{ready_us:8.2f}us {scan_us:10.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Bulk intake throughput against worker pool size.
+
+    python -m benchmarks.bulk_intake_bench --records 20000 --processes 1,2,4
+
+Generates historical incident records (short reports, long ones with log
+excerpts, vendor notices listing subsidiaries), splits them into chunks as
+``POST /incidents/bulk-intake`` does and runs ``normalize_incident_batch``
+on every chunk over a process pool of each size, the way a ``bulk`` worker's
+prefork pool spreads them. Persistence is off (no Postgres), so this is
+normalization throughput; reports records/s and the speedup over one
+process. Speedup is bounded by the machine's cores.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+REPORT = ("On March 3rd, 2024 we detected that approximately {n} customer records, including email addresses "
+          "and hashed passwords, were exposed from a misconfigured S3 bucket. The ICO was notified. ")
+LOG_LINE = "2024-03-01 12:00:01 INFO request handled in 12ms user=abc path=/api/v1/things status=200\n"
+NOTICE = "Our vendor notified {name} Ltd, a subsidiary in {country}, that payroll data for {n} employees was accessed. "
+
+
+def records(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.7:
+            description = REPORT.format(n=f"{rng.randrange(1, 500) * 100:,}")
+        elif kind < 0.9:
+            description = REPORT.format(n="12,000") + LOG_LINE * rng.randrange(10, 200)
+        else:
+            description = "".join(NOTICE.format(name=f"Sub{j}", country=rng.choice(["Germany", "France", "the UK"]),
+                                                n=rng.randrange(10, 5000)) for j in range(rng.randrange(2, 20)))
+        out.append({"line": i + 1, "incident": {
+            "id": f"bulk-{i}", "title": f"Historical incident {i}", "description": description, "severity": "high",
+            "detected_at": "2024-03-03T00:00:00", "affected_users": 0, "data_types": [], "jurisdictions": ["gb"],
+        }})
+    return out
+
+
+def _init() -> None:
+    from benchmarks.suite import configure_offline
+
+    configure_offline()
+
+
+def _run_chunk(chunk: List[Dict[str, Any]]) -> int:
+    from app.tasks.bulk_intake import normalize_incident_batch
+
+    return normalize_incident_batch.apply(args=["bench", "default", chunk]).get()["normalized"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--processes", default="1,2,4")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = records(args.records, args.seed)
+    chunks = [data[i:i + args.chunk_size] for i in range(0, len(data), args.chunk_size)]
+    print(f"{len(data):,} records in {len(chunks)} chunks, {os.cpu_count()} cores")
+    single = None
+    for processes in (int(p) for p in args.processes.split(",")):
+        with ProcessPoolExecutor(processes, initializer=_init) as pool:
+            list(pool.map(_run_chunk, chunks[:processes]))  # warm every process
+            started = time.perf_counter()
+            normalized = sum(pool.map(_run_chunk, chunks))
+            elapsed = time.perf_counter() - started
+        rate = normalized / elapsed
+        single = single or rate
+        print(f"processes={processes:2d} {rate:9,.0f} records/s  speedup={rate / single:4.2f}x  ({normalized:,} normalized)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Accuracy and cost of the mention dedup stage.
+
+    python -m benchmarks.dedup_bench --unique 200000 --dup-ratio 0.4
+
+Streams unique synthetic posts mixed with reposts (retweet prefixes, link
+and punctuation variants, source aliases, re-polled ids) into a single
+incident and reports duplicate recall, false-positive rate on unique posts,
+per-item cost and filter memory.
+"""
+import argparse
+import random
+import time
+
+from app.services.dedup import MentionDeduplicator
+
+WORDS = ("customer data leak outage breach statement support refund password "
+         "account service update hackers exposed investigation regulator fine").split()
+SOURCES = ["twitter", "x", "twitter.com", "reddit", "reddit.com", "news", "rss"]
+
+
+def variant(item, rng):
+    kind = rng.randrange(4)
+    copy = {k: v for k, v in item.items() if k != "seq"}
+    if kind == 0:
+        copy["text"] = f"RT @user{rng.randrange(1000)}: {item['text']}"
+        copy.pop("source_id")
+    elif kind == 1:
+        copy["text"] = item["text"].upper() + f" https://t.co/{rng.randrange(10**6)}"
+        copy.pop("source_id")
+    elif kind == 2:
+        copy["text"] = item["text"] + "!!! via @newsdesk"
+        copy["source"] = rng.choice(SOURCES)
+        copy.pop("source_id")
+    # kind 3: the same post polled again
+    return copy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--unique", type=int, default=200_000)
+    parser.add_argument("--dup-ratio", type=float, default=0.4)
+    parser.add_argument("--rate", type=float, default=50.0, help="simulated items per second")
+    parser.add_argument("--window", type=float, default=3600.0)
+    parser.add_argument("--capacity", type=int, default=100_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    parser.add_argument("--batch", type=int, default=50, help="items per filter call, as in ingest micro-batches")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    dedup = MentionDeduplicator(window_seconds=args.window, capacity=args.capacity, error_rate=args.error_rate)
+    recent = []
+    stream = []
+    for i in range(args.unique):
+        item = {"source_id": f"p{i}", "source": rng.choice(SOURCES), "text": " ".join(rng.choice(WORDS) for _ in range(14)) + f" #{i}"}
+        stream.append((item, False))
+        recent.append(item)
+        if rng.random() < args.dup_ratio:
+            # Repost of something from the last few minutes
+            stream.append((variant(rng.choice(recent[-2000:]), rng), True))
+
+    for seq, (item, _) in enumerate(stream):
+        stream[seq][0]["seq"] = seq
+
+    false_positives = caught = dups = 0
+    started = time.perf_counter()
+    for start in range(0, len(stream), args.batch):
+        chunk = stream[start:start + args.batch]
+        unique, _ = dedup.filter("inc", [item for item, _ in chunk], start / args.rate)
+        kept = {item["seq"] for item in unique}
+        for item, is_dup in chunk:
+            dropped = item["seq"] not in kept
+            dups += is_dup
+            caught += is_dup and dropped
+            false_positives += (not is_dup) and dropped
+    elapsed = time.perf_counter() - started
+
+    bloom = dedup._filters["inc"]
+    print(f"items={len(stream)} unique={args.unique} duplicates={dups}")
+    print(f"duplicate recall={caught / dups:.4f} false-positive rate={false_positives / args.unique:.5f} (target {args.error_rate})")
+    print(f"per item: {elapsed / len(stream) * 1e6:.2f}us ({len(stream) / elapsed:,.0f} items/s)")
+    print(f"filter memory per incident: {bloom.nbytes / 1024:.0f}KB ({len(bloom.filters)} partitions)")
+
+
+if __name__ == "__main__":
+    main()
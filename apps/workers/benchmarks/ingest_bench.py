@@ -0,0 +1,101 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Sustained throughput of the ingest service pipeline.
+
+    python -m benchmarks.ingest_bench --mentions 200000 --incidents 1000
+    python -m benchmarks.ingest_bench --source file
+
+Feeds synthetic mentions through FeedIngestor + process_batch (the same path
+as ingest_service.py) with publishing disabled and chart bins kept in
+process, and reports mentions/s, batch count and the peak backlog the
+bounded queue allowed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.core.logging import setup_logging
+from app.services.feed_ingest import FeedIngestor, FileSource, MemorySource
+from app.tasks.monitor_series import get_series_store
+from ingest_service import process_batch
+
+WORDS = ["customer", "data", "leak", "update", "service", "outage", "breach", "team", "statement", "support"]
+
+
+def synthetic(n: int, incidents: int, seed: int = 3):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            "id": f"m{i}",
+            "incident_id": f"inc-{rng.randrange(incidents)}",
+            "source": rng.choice(["twitter", "reddit", "news"]),
+            "text": " ".join(rng.choice(WORDS) for _ in range(12)),
+        }
+
+
+async def run(args) -> None:
+    if args.source == "file":
+        fd, path = tempfile.mkstemp(suffix=".ndjson")
+        with os.fdopen(fd, "w") as f:
+            for item in synthetic(args.mentions, args.incidents):
+                f.write(json.dumps(item) + "\n")
+        source = FileSource(path)
+    else:
+        source = MemorySource(maxsize=args.queue_size)
+        path = None
+
+    ingestor = FeedIngestor(
+        source,
+        lambda batch: process_batch(batch, publish=lambda events: True),
+        batch_size=args.batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        queue_size=args.queue_size,
+    )
+    peak = 0
+
+    async def produce():
+        for item in synthetic(args.mentions, args.incidents):
+            await source.push(item)
+        await source.close()
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, ingestor._queue.qsize())
+            await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(watch())]
+    if args.source == "memory":
+        tasks.append(asyncio.create_task(produce()))
+    await ingestor.run()
+    elapsed = time.perf_counter() - started
+    for task in tasks:
+        task.cancel()
+    if path:
+        os.unlink(path)
+
+    print(f"source={args.source} mentions={ingestor.processed} incidents={args.incidents} batches={ingestor.batches}")
+    print(f"elapsed={elapsed:.2f}s throughput={ingestor.processed / elapsed:,.0f} mentions/s")
+    print(f"peak backlog={peak} (bound {args.queue_size})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="memory", choices=["memory", "file"])
+    parser.add_argument("--mentions", type=int, default=200_000)
+    parser.add_argument("--incidents", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-wait-ms", type=float, default=200)
+    parser.add_argument("--queue-size", type=int, default=20000)
+    args = parser.parse_args()
+    setup_logging(level="WARNING")
+    get_series_store().redis = None
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
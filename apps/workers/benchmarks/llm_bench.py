@@ -0,0 +1,118 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""LLM client layer against the local provider stub.
+
+    python -m benchmarks.llm_bench --requests 400 --concurrency 16 --repeat-share 0.3
+
+Runs the same prompt mix (a ``--repeat-share`` of prompts seen before)
+through a naive client (new HTTP client per call, no cache) and through
+``LLMClient`` with pooling only, with hedging, and with hedging and the
+prompt cache. Reports latency percentiles, throughput, provider requests
+and TCP connections opened. Ends with a streaming request against each wire
+format.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from app.core.config import settings
+from app.core.memo import ResultCache
+from app.services.llm import LLMClient, LLMRequest, OpenAIAdapter
+from benchmarks.llm_stub import start_stub
+
+
+def prompts(n: int, repeat_share: float) -> List[str]:
+    rng = random.Random(5)
+    seen: List[str] = []
+    out = []
+    for i in range(n):
+        if seen and rng.random() < repeat_share:
+            out.append(rng.choice(seen))
+        else:
+            prompt = f"Draft a holding statement for incident {i} about unauthorized access to customer records."
+            seen.append(prompt)
+            out.append(prompt)
+    return out
+
+
+async def naive_call(base_url: str, prompt: str) -> None:
+    adapter = OpenAIAdapter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        response = await client.post(adapter.path, json=adapter.body(LLMRequest(prompt=prompt), "stub", stream=False))
+        response.raise_for_status()
+
+
+async def drive(call: Callable[[str], Awaitable[None]], items: List[str], concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker() -> None:
+        while not queue.empty():
+            prompt = queue.get_nowait()
+            t0 = time.perf_counter()
+            await call(prompt)
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = np.asarray(latencies) * 1000
+    return {"p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99)), "per_s": len(items) / elapsed}
+
+
+async def run(args: argparse.Namespace) -> None:
+    server, state = start_stub(latency_ms=args.latency_ms, slow_share=args.slow_share, slow_factor=args.slow_factor)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    settings.OPENAI_BASE_URL = settings.ANTHROPIC_BASE_URL = base_url
+    # Headroom above the offered load: hedges only go out with a free slot
+    settings.LLM_MAX_CONCURRENCY = 2 * args.concurrency
+    items = prompts(args.requests, args.repeat_share)
+
+    async def measure(name: str, call: Callable[[str], Awaitable[None]]) -> None:
+        requests, connections = state.requests, state.connections
+        stats = await drive(call, items, args.concurrency)
+        print(f"{name:18s} p50={stats['p50']:7.1f}ms p99={stats['p99']:7.1f}ms {stats['per_s']:7.1f}/s "
+              f"provider requests={state.requests - requests:4d} connections={state.connections - connections:4d}")
+
+    await measure("naive", lambda p: naive_call(base_url, p))
+    for name, hedge_ms, cached in (("pooled", -1, False), ("pooled+hedge", 0, False), ("pooled+hedge+cache", 0, True)):
+        settings.LLM_HEDGE_AFTER_MS = hedge_ms
+        client = LLMClient(ResultCache("llm-bench", maxsize=4096) if cached else None)
+        # Prime the latency window the p95 hedge delay is computed from
+        await drive(lambda p: client.complete(LLMRequest(prompt=p, cache=False)), [f"warm {i}" for i in range(40)], args.concurrency)
+        await measure(name, lambda p, c=client: c.complete(LLMRequest(prompt=p)))
+        await client.aclose()
+
+    client = LLMClient()
+    for provider in ("openai", "anthropic"):
+        t0 = time.perf_counter()
+        first = None
+        parts = []
+        async for delta in client.stream(LLMRequest(prompt="Summarize the incident.", provider=provider)):
+            first = first or time.perf_counter() - t0
+            parts.append(delta)
+        print(f"stream {provider:9s} first delta {first * 1000:.0f}ms, {len(parts)} deltas, {len(''.join(parts))} chars")
+    await client.aclose()
+    server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat-share", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--slow-share", type=float, default=0.02)
+    parser.add_argument("--slow-factor", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Local stand-in for the LLM providers.
+
+    python -m benchmarks.llm_stub --port 8099 --latency-ms 200 --slow-share 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 ANTHROPIC_BASE_URL=http://127.0.0.1:8099/v1 ...
+
+Serves ``/v1/chat/completions`` (OpenAI) and ``/v1/messages`` (Anthropic),
+including server-sent-event streaming. Latency is log-normal around
+``--latency-ms`` with a ``--slow-share`` of requests ``--slow-factor`` times
+slower, to give hedging a tail to cut. Answers are deterministic in the
+prompt; the server counts requests and TCP connections for the benchmarks.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+WORDS = ("we are investigating the incident and will share an update as soon as we have verified "
+         "the facts customers can contact support at any time").split()
+
+
+class StubState:
+    def __init__(self, latency_ms: float, slow_share: float, slow_factor: float, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.slow_share = slow_share
+        self.slow_factor = slow_factor
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            seconds = self.rng.lognormvariate(0, 0.25) * self.latency_ms / 1000
+            if self.rng.random() < self.slow_share:
+                seconds *= self.slow_factor
+        return seconds
+
+
+def answer(prompt: str, max_tokens: int) -> List[str]:
+    seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:4], "big")
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) + " " for _ in range(min(max_tokens, 40))]
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _json(self, status: int, body: Dict[str, Any]) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _events(self, events: List[Tuple[str, Dict[str, Any]]], done: bool) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            lines = [(f"event: {name}\n" if name else "") + f"data: {json.dumps(data)}\n\n" for name, data in events]
+            if done:
+                lines.append("data: [DONE]\n\n")
+            for line in lines:
+                chunk = line.encode("utf-8")
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self) -> None:
+            try:
+                self._respond()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client gave up, e.g. the losing half of a hedged pair
+                self.close_connection = True
+
+        def _respond(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            tokens = answer(prompt, body.get("max_tokens", 64))
+            time.sleep(state.delay())
+            input_tokens = len(prompt) // 4
+            if self.path.endswith("/chat/completions"):
+                if body.get("stream"):
+                    self._events([("", {"choices": [{"delta": {"content": t}}]}) for t in tokens], done=True)
+                else:
+                    self._json(200, {
+                        "choices": [{"message": {"role": "assistant", "content": "".join(tokens)}}],
+                        "usage": {"prompt_tokens": input_tokens, "completion_tokens": len(tokens)},
+                    })
+            elif self.path.endswith("/messages"):
+                if body.get("stream"):
+                    events = [("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": t}}) for t in tokens]
+                    self._events(events + [("message_stop", {"type": "message_stop"})], done=False)
+                else:
+                    self._json(200, {
+                        "content": [{"type": "text", "text": "".join(tokens)}],
+                        "usage": {"input_tokens": input_tokens, "output_tokens": len(tokens)},
+                    })
+            else:
+                self._json(404, {"error": "not found"})
+
+    return Handler
+
+
+def start_stub(port: int = 0, latency_ms: float = 200, slow_share: float = 0.05, slow_factor: float = 10) -> Tuple[ThreadingHTTPServer, StubState]:
+    """Serve in a background thread; ``port=0`` picks a free port (``server.server_port``)."""
+    state = StubState(latency_ms, slow_share, slow_factor)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    parser.add_argument("--slow-factor", type=float, default=10)
+    args = parser.parse_args()
+
+    server, _ = start_stub(args.port, args.latency_ms, args.slow_share, args.slow_factor)
+    print(f"LLM stub on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
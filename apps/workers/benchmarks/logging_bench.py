@@ -0,0 +1,116 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Log call throughput and monitor_ingest_mentions latency overhead.
+
+    python -m benchmarks.logging_bench --calls 200000 --batches 200
+
+Compares the previous synchronous stdlib JSON pipeline with the queue-backed
+orjson pipeline, writing to /dev/null so only logging cost is measured.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import structlog
+
+from app.core.logging import get_sink, setup_logging
+
+
+def configure_sync(stream) -> None:
+    """The original app.core.logging configuration (stdlib + json.dumps)."""
+    handler = logging.StreamHandler(stream)
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.DEBUG)
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=False,
+    )
+
+
+def calls_per_second(calls: int) -> float:
+    logger = structlog.get_logger("bench")
+    start = time.perf_counter()
+    for i in range(calls):
+        logger.info("mention_ingested", incident_id="inc-1", source="twitter", sentiment=0.25, seq=i)
+    elapsed = time.perf_counter() - start
+    sink = get_sink()
+    if sink is not None:
+        sink.flush()
+    return calls / elapsed
+
+
+def ingest_latencies(batches: int, batch_size: int):
+    from app.tasks import monitor_ingest
+
+    # Loggers cache their configuration on first use; rebind after reconfiguring
+    monitor_ingest.logger = structlog.get_logger()
+    feed = [{"text": f"post {i} about the outage", "source": "twitter"} for i in range(batch_size)]
+    monitor_ingest.monitor_ingest_mentions.run("inc-1", feed)
+    samples = []
+    for _ in range(batches):
+        start = time.perf_counter()
+        monitor_ingest.monitor_ingest_mentions.run("inc-1", feed)
+        samples.append(time.perf_counter() - start)
+    sink = get_sink()
+    if sink is not None:
+        sink.flush()
+    return np.asarray(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    devnull_text = open(os.devnull, "w")
+    devnull_bytes = open(os.devnull, "wb")
+    results = {}
+
+    configure_sync(devnull_text)
+    results["sync_calls_per_s"] = calls_per_second(args.calls)
+
+    setup_logging(level="DEBUG", stream=devnull_bytes, sample_rates={})
+    results["queued_calls_per_s"] = calls_per_second(args.calls)
+
+    # Per-mention debug logging on the ingest path
+    setup_logging(level="INFO", stream=devnull_bytes, sample_rates={})
+    baseline = ingest_latencies(args.batches, args.batch_size)
+    configure_sync(devnull_text)
+    sync = ingest_latencies(args.batches, args.batch_size)
+    setup_logging(level="DEBUG", stream=devnull_bytes, sample_rates={})
+    queued = ingest_latencies(args.batches, args.batch_size)
+    setup_logging(level="DEBUG", stream=devnull_bytes, sample_rates={"mention_ingested": 0.01})
+    sampled = ingest_latencies(args.batches, args.batch_size)
+
+    p99 = lambda a: float(np.percentile(a, 99))
+    results["ingest_p99_ms"] = {
+        "debug_off": p99(baseline),
+        "sync_debug": p99(sync),
+        "queued_debug": p99(queued),
+        "queued_debug_sampled_1pct": p99(sampled),
+    }
+    results["ingest_p99_added_ms"] = {k: v - p99(baseline) for k, v in results["ingest_p99_ms"].items() if k != "debug_off"}
+    results["dropped_lines"] = get_sink().dropped
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
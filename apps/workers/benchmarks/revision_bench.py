@@ -0,0 +1,146 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Artifact revision storage: full copies vs. deltas over snapshots.
+
+    python -m benchmarks.revision_bench --artifacts 50 --edits 60 --size 6000
+
+Each artifact starts as a ``--size`` character draft and takes ``--edits``
+editor saves (a few words changed somewhere) with a legal lint and a batch of
+accepted redlines every tenth save. Compares stored bytes with one full copy
+per revision, the time to materialize the latest and random older versions,
+and accepting redlines in one pass vs. splicing them one by one.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.revisions import RevisionStore, redline_ops
+from app.tasks.legal_linter import RISKY_TERMS
+
+WORDS = ("we are investigating a security breach affecting customer accounts and guarantee that "
+         "our team will never stop working to resolve the issue promptly and share updates").split()
+
+
+def draft(size: int, rng: random.Random) -> str:
+    words, length = [], 0
+    while length < size:
+        words.append(rng.choice(WORDS))
+        length += len(words[-1]) + 1
+    return " ".join(words)
+
+
+def edit(text: str, rng: random.Random) -> str:
+    start = rng.randrange(len(text))
+    end = min(len(text), start + rng.randrange(0, 40))
+    return text[:start] + " ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 6))) + text[end:]
+
+
+def redlines(text: str) -> List[Dict]:
+    lowered = text.lower()
+    found = []
+    for risky, safe in RISKY_TERMS.items():
+        start = lowered.find(risky)
+        while start != -1:
+            found.append({"start": start, "end": start + len(risky), "original": text[start:start + len(risky)], "suggestion": safe})
+            start = lowered.find(risky, start + len(risky))
+    return found
+
+
+def splice_one_by_one(text: str, lines: List[Dict]) -> str:
+    """Baseline: apply each redline to the full string, shifting later offsets."""
+    shift = 0
+    for r in sorted(lines, key=lambda r: r["start"]):
+        start, end = r["start"] + shift, r["end"] + shift
+        text = text[:start] + r["suggestion"] + text[end:]
+        shift += len(r["suggestion"]) - (r["end"] - r["start"])
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artifacts", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=60)
+    parser.add_argument("--size", type=int, default=6000)
+    parser.add_argument("--snapshot-interval", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    store = RevisionStore(snapshot_interval=args.snapshot_interval)
+    full_bytes = 0
+    texts: Dict[str, List[str]] = {}
+    one_pass, spliced, per_pass = [], [], []
+    for a in range(args.artifacts):
+        artifact = f"art-{a}"
+        text = draft(args.size, rng)
+        history = [text]
+        store.commit(artifact, 0, text=text)
+        for i in range(1, args.edits + 1):
+            if i % 10 == 0:
+                lines = redlines(text)
+                per_pass.append(len(lines))
+                t0 = time.perf_counter()
+                spliced_text = splice_one_by_one(text, lines)
+                spliced.append(time.perf_counter() - t0)
+                _, table = store.table(artifact, len(history))
+                t0 = time.perf_counter()
+                ops, _, _ = redline_ops(table, lines)
+                table.apply(ops)
+                assert table.text() == spliced_text
+                one_pass.append(time.perf_counter() - t0)
+                result = store.apply_redlines(artifact, len(history), lines)
+                if result["version"] == len(history):
+                    continue
+                text = spliced_text
+            else:
+                text = edit(text, rng)
+                store.commit(artifact, len(history), text=text)
+            history.append(text)
+        texts[artifact] = history
+        full_bytes += sum(len(json.dumps({"content": t})) for t in history)
+
+    delta_bytes = sum(store.stats(a)["stored_bytes"] for a in texts)
+    revisions = sum(len(h) for h in texts.values())
+    print(f"{args.artifacts} artifacts, {revisions} revisions, ~{args.size} chars each, snapshot every {args.snapshot_interval}")
+    print(f"stored: full copies {full_bytes / 1e6:.2f}MB, deltas+snapshots {delta_bytes / 1e6:.2f}MB "
+          f"({full_bytes / delta_bytes:.1f}x smaller)")
+
+    cold = RevisionStore(snapshot_interval=args.snapshot_interval)
+    cold._local = store._local  # same log, empty head cache: every read replays deltas
+    latest, older = [], []
+    for artifact, history in texts.items():
+        t0 = time.perf_counter()
+        assert cold.materialize(artifact) == history[-1]
+        latest.append(time.perf_counter() - t0)
+        for _ in range(10):
+            v = rng.randrange(1, len(history) + 1)
+            t0 = time.perf_counter()
+            assert cold.materialize(artifact, v) == history[v - 1]
+            older.append(time.perf_counter() - t0)
+    us = lambda xs: f"p50={np.percentile(np.asarray(xs) * 1e6, 50):.0f}us p99={np.percentile(np.asarray(xs) * 1e6, 99):.0f}us"
+    print(f"materialize latest (uncached): {us(latest)}")
+    print(f"materialize random version:    {us(older)}")
+    print(f"accept redlines (~{np.mean(per_pass):.0f} per pass): one pass {us(one_pass)}; "
+          f"splice one by one {us(spliced)}")
+
+    # One pass is linear in text + redlines; splicing copies the text once per redline
+    for size in (6_000, 60_000, 600_000):
+        text = draft(size, rng)
+        lines = redlines(text)
+        t0 = time.perf_counter()
+        expected = splice_one_by_one(text, lines)
+        splice_s = time.perf_counter() - t0
+        store.commit(f"big-{size}", 0, text=text)
+        t0 = time.perf_counter()
+        _, table = store.table(f"big-{size}")
+        ops, _, _ = redline_ops(table, lines)
+        table.apply(ops)
+        assert table.text() == expected
+        print(f"accept all {len(lines):5d} redlines in {size:7,d} chars: one pass {(time.perf_counter() - t0) * 1000:7.1f}ms, "
+              f"splice one by one {splice_s * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Downsampling cost and fidelity for mention charts.
+
+    python -m benchmarks.series_bench --days 28 --budget 500
+
+Builds a minute-level mention series for a long-running incident (diurnal
+volume, bursts, a slow sentiment slide), then times LTTB and min/max
+downsampling to the point budget and reports how well each keeps the chart:
+the extremes (highest volume, lowest sentiment) and the share of injected
+bursts whose drawn line still reaches half their height, against naive
+every-n-th decimation. Ends with ``query_mention_series`` end to end on
+an in-process store, cold and cached, and the payload size saved.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.services.series import LTTB, MINMAX, downsample
+
+
+def build(days: int, seed: int) -> tuple:
+    rng = np.random.default_rng(seed)
+    minutes = days * 24 * 60
+    t = np.arange(minutes, dtype=np.int64) * 60 + 1_700_000_000 // 60 * 60
+    hour = (t // 3600) % 24
+    rate = 20 + 15 * np.sin((hour - 6) / 24 * 2 * np.pi)
+    bursts = []
+    for start in rng.integers(0, minutes - 90, size=days):
+        end = start + int(rng.integers(3, 30))
+        rate[start:end] *= rng.uniform(3, 20)
+        bursts.append((start, end))
+    volume = rng.poisson(rate).astype(np.float64)
+    sentiment = np.clip(0.3 - np.linspace(0, 0.8, minutes) + rng.normal(0, 0.15, minutes), -1, 1)
+    return t, volume, sentiment, bursts
+
+
+def fidelity(t: np.ndarray, y: np.ndarray, tx: np.ndarray, ty: np.ndarray, bursts: list) -> tuple:
+    """Share of the extreme kept and of bursts still visible on the drawn line."""
+    extreme = ty.max() / y.max()
+    drawn = np.interp(t, tx, ty)
+    baseline = np.median(y)
+    visible = [drawn[a:b].max() - baseline >= (y[a:b].max() - baseline) / 2 for a, b in bursts]
+    return extreme, float(np.mean(visible)) if visible else None
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--budget", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    t, volume, sentiment, bursts = build(args.days, args.seed)
+    print(f"{len(t):,} minute points, budget {args.budget}")
+    step = -(-len(t) // args.budget)
+    # Sentiment is negated so its extreme is the lowest point, the one a chart must not lose
+    for metric, y in (("volume", volume), ("sentiment", -sentiment)):
+        for method in (LTTB, MINMAX, "every"):
+            if method == "every":
+                # Naive decimation for reference: every n-th point
+                ms, (tx, ty) = 0.0, (t[::step], y[::step])
+            else:
+                ms = timed(lambda: downsample(t, y, args.budget, method), args.repeat)
+                tx, ty = downsample(t, y, args.budget, method)
+            extreme, visible = fidelity(t, y, tx, ty, bursts if metric == "volume" else [])
+            bursts_column = f" bursts visible={visible * 100:5.1f}%" if visible is not None else ""
+            print(f"{metric:9s} {method:6s} {ms:6.2f}ms points={len(tx):5d} extreme kept={extreme * 100:5.1f}%{bursts_column}")
+
+    from benchmarks.suite import configure_offline
+    from app.core.config import settings
+    from app.core.memo import get_cache
+    from app.tasks.monitor_series import get_series_store, query_mention_series
+
+    configure_offline()
+    settings.MEMO_ENABLED = True
+    store = get_series_store()
+    rng = np.random.default_rng(args.seed)
+    stamps = np.repeat(t, volume.astype(np.int64)) + rng.integers(0, 60, size=int(volume.sum()))
+    store.add("bench", zip(stamps.tolist(), np.repeat(sentiment, volume.astype(np.int64)).tolist()))
+    query = {"max_points": args.budget}
+    cache = get_cache("query_mention_series")
+    cold = timed(lambda: (cache.clear(), query_mention_series.apply(args=["bench"], kwargs=query).get()), args.repeat)
+    cached = timed(lambda: query_mention_series.apply(args=["bench"], kwargs=query).get(), args.repeat)
+    result = query_mention_series.apply(args=["bench"], kwargs=query).get()
+    raw = len(json.dumps([{"t": str(s), "value": v} for s, v in zip(t.tolist(), volume.tolist())]))
+    print(f"query_mention_series: cold {cold:.2f}ms, cached {cached:.2f}ms, "
+          f"payload {len(json.dumps(result['series'])) / 1024:.0f}KB vs {raw / 1024:.0f}KB raw")
+
+
+if __name__ == "__main__":
+    main()
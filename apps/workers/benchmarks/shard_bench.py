@@ -0,0 +1,120 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Throughput and state locality of consistent-hash monitor shards.
+
+    python -m benchmarks.shard_bench --shards 1 2 4 --incidents 400 --mentions 200000
+
+For each shard count, one producer routes mention batches onto per-shard
+queues with the same ``HashRing`` the Celery router uses, and one process per
+shard runs the monitor pipeline (dedup, scoring, anomaly windows, rumor
+matching) with publishing disabled. Reports mentions/s, incidents and state
+bytes held per shard, and how many incidents move when a shard is added.
+Scaling tracks the number of free cores: on a single-CPU host the shards
+share one core and only the per-process state split is visible.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from app.core.sharding import HashRing
+
+WORDS = ("customer data leak outage breach statement support refund password "
+         "account service update hackers exposed investigation regulator fine").split()
+
+
+def shard_worker(queue: "mp.Queue", results: "mp.Queue") -> None:
+    from app.core.logging import setup_logging
+    from ingest_service import process_batch
+    from app.tasks.monitor_ingest import deduplicator, detector
+
+    setup_logging(level="WARNING")
+    mentions = 0
+    started = None
+    while True:
+        batch = queue.get()
+        if batch is None:
+            break
+        if started is None:
+            started = time.perf_counter()
+        mentions += process_batch(batch, publish=lambda events: True)["mentions"]
+    incidents = set(detector.incidents()) | set(deduplicator.incidents())
+    state = sum(len(json.dumps(deduplicator.export(i) or {})) + len(json.dumps(detector.export(i) or {})) for i in incidents)
+    results.put({
+        "pid": os.getpid(),
+        "mentions": mentions,
+        "busy_s": time.perf_counter() - (started or time.perf_counter()),
+        "incidents": len(incidents),
+        "state_bytes": state,
+    })
+
+
+def make_batches(incidents: int, mentions: int, batch_size: int) -> List[List[Dict[str, Any]]]:
+    rng = random.Random(7)
+    ids = [f"inc-{i:05d}" for i in range(incidents)]
+    items = [
+        {"incident_id": rng.choice(ids), "source_id": f"p{n}", "source": "twitter",
+         "text": " ".join(rng.choice(WORDS) for _ in range(12)) + f" #{n}"}
+        for n in range(mentions)
+    ]
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def run(shards: int, batches: List[List[Dict[str, Any]]], vnodes: int) -> Dict[str, Any]:
+    ring = HashRing(shards, vnodes)
+    queues = [mp.Queue(maxsize=64) for _ in range(shards)]
+    results: "mp.Queue" = mp.Queue()
+    procs = [mp.Process(target=shard_worker, args=(q, results)) for q in queues]
+    for p in procs:
+        p.start()
+
+    started = time.perf_counter()
+    for batch in batches:
+        # Split each feed batch by owning shard, as the router does per task
+        routed: Dict[int, List[Dict[str, Any]]] = {}
+        for item in batch:
+            routed.setdefault(ring.shard_for(item["incident_id"]), []).append(item)
+        for shard, items in routed.items():
+            queues[shard].put(items)
+    for q in queues:
+        q.put(None)
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(s["mentions"] for s in stats)
+    return {
+        "shards": shards,
+        "mentions_per_s": total / elapsed,
+        "incidents_per_shard": sorted(s["incidents"] for s in stats),
+        "state_kb_per_shard": sorted(round(s["state_bytes"] / 1024) for s in stats),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--incidents", type=int, default=400)
+    parser.add_argument("--mentions", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--vnodes", type=int, default=128)
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} incidents={args.incidents} mentions={args.mentions}")
+    batches = make_batches(args.incidents, args.mentions, args.batch)
+    ids = [f"inc-{i:05d}" for i in range(args.incidents)]
+    baseline = None
+    for shards in args.shards:
+        result = run(shards, batches, args.vnodes)
+        baseline = baseline or result["mentions_per_s"]
+        moved = len(HashRing(shards, args.vnodes).moved(HashRing(shards + 1, args.vnodes), ids))
+        print(f"shards={shards} {result['mentions_per_s']:,.0f} mentions/s ({result['mentions_per_s'] / baseline:.2f}x) "
+              f"incidents/shard={result['incidents_per_shard']} state KB/shard={result['state_kb_per_shard']} "
+              f"moved on +1 shard={moved}/{args.incidents} ({moved / args.incidents:.0%}, ideal {1 / (shards + 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
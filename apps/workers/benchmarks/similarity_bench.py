@@ -0,0 +1,98 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Recall/latency benchmark for the approved statement vector index.
+
+    python -m benchmarks.similarity_bench --n 1000000 --dim 256
+
+Vectors are synthetic clustered unit vectors (real statements cluster by
+incident type); queries are noisy copies of stored vectors. IVF recall@k is
+measured against exact flat search.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.services.similarity import HashingEmbedder, VectorIndex
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for offset in range(0, n, 100_000):
+        size = min(100_000, n - offset)
+        labels = rng.integers(0, clusters, size=size)
+        vectors[offset:offset + size] = centers[labels] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean())}
+
+
+def run(n: int, dim: int, queries: int, k: int, nlist: int, nprobe: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    vectors = clustered_vectors(n, dim, clusters=max(16, n // 2000), rng=rng)
+    ids = [str(i) for i in range(n)]
+    picks = rng.choice(n, size=queries, replace=False)
+    noisy = vectors[picks] + 0.05 * rng.standard_normal((queries, dim)).astype(np.float32)
+    noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+
+    flat = VectorIndex(dim, mode="flat")
+    flat.add(ids, vectors)
+    flat_times, truth = [], []
+    for q in noisy:
+        start = time.perf_counter()
+        truth.append({i for i, _ in flat.search(q, k)})
+        flat_times.append(time.perf_counter() - start)
+    del flat
+
+    ivf = VectorIndex(dim, mode="ivf", nlist=nlist, nprobe=nprobe)
+    ivf.add(ids, vectors)
+    start = time.perf_counter()
+    ivf.train()
+    train_s = time.perf_counter() - start
+
+    ivf_times, hits = [], 0
+    for q, expected in zip(noisy, truth):
+        start = time.perf_counter()
+        found = {i for i, _ in ivf.search(q, k)}
+        ivf_times.append(time.perf_counter() - start)
+        hits += len(found & expected)
+
+    embedder = HashingEmbedder(dim=dim)
+    text = "We are aware of a security incident affecting some customer accounts. " * 8
+    start = time.perf_counter()
+    for _ in range(200):
+        embedder.embed(text)
+    embed_ms = (time.perf_counter() - start) / 200 * 1000
+
+    return {
+        "n": n,
+        "dim": dim,
+        "k": k,
+        "queries": queries,
+        "flat": percentiles(flat_times),
+        "ivf": {**percentiles(ivf_times), "nlist": nlist, "nprobe": nprobe, "train_s": train_s,
+                "recall_at_k": hits / (queries * k)},
+        "embed_ms": embed_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.n, args.dim, args.queries, args.k, args.nlist, args.nprobe, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Canned-reply retrieval and grapheme counting for social_pack.
+
+    python -m benchmarks.social_bench --replies 100000 --queries 2000
+
+Builds a ``ReplyIndex`` over a synthetic approved-reply library (Zipfian
+vocabulary headed by stopwords, 20-40 words per reply) and times rumors drawn
+from the same distribution, then a head-heavy worst case of 6-16 of the most
+common content words, checking both against a brute-force BM25 scan over
+every reply. Ends with grapheme segmentation throughput on ASCII and
+emoji-heavy posts.
+"""
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from app.services.social import STOPWORDS, Reply, ReplyIndex, grapheme_len, tokenize
+
+BASE = ("breach leak hack password outage down status refund payment card data customer account security "
+        "ransomware lawsuit regulator phishing support delay restore investigate vendor employee safe").split()
+
+
+def vocabulary(size: int) -> List[str]:
+    rng = random.Random(11)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = sorted(STOPWORDS) + BASE
+    while len(words) < size:
+        words.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return words
+
+
+def zipf_words(rng: np.random.Generator, vocab: List[str], size: int) -> List[str]:
+    return [vocab[r] for r in np.minimum(rng.zipf(1.3, size=size) - 1, len(vocab) - 1)]
+
+
+def library(n: int, vocab: List[str]) -> List[Reply]:
+    rng = np.random.default_rng(7)
+    words = zipf_words(rng, vocab, n * 40)
+    replies, pos = [], 0
+    for i in range(n):
+        length = 20 + i % 21
+        replies.append(Reply(id=f"r{i}", text=" ".join(words[pos:pos + length]), tags=[BASE[i % len(BASE)]]))
+        pos += length
+    return replies
+
+
+def brute_force(replies: List[Reply], docs: List[Counter], query: str, k: int = 3, k1: float = 1.2, b: float = 0.75) -> List[str]:
+    n, avg = len(docs), sum(sum(d.values()) for d in docs) / len(docs)
+    terms = set(tokenize(query))
+    df = {t: sum(1 for d in docs if t in d) for t in terms}
+    scores = []
+    for i, d in enumerate(docs):
+        length = sum(d.values())
+        score = sum(math.log1p((n - df[t] + 0.5) / (df[t] + 0.5)) * d[t] * (k1 + 1) / (d[t] + k1 * (1 - b + b * length / avg))
+                    for t in terms if t in d)
+        scores.append((score, i))
+    return [replies[i].id for _, i in sorted(scores, key=lambda s: (-s[0], s[1]))[:k]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replies", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=30_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--checks", type=int, default=20, help="queries compared against the brute-force scan")
+    args = parser.parse_args()
+
+    vocab = vocabulary(args.vocab)
+    replies = library(args.replies, vocab)
+    t0 = time.perf_counter()
+    index = ReplyIndex(replies)
+    build_s = time.perf_counter() - t0
+    tracemalloc.start()
+    ReplyIndex(replies)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    postings = len(index._docs)
+    print(f"index: {len(index)} replies, {len(index.vocab)} terms, {postings:,} postings, "
+          f"built in {build_s:.2f}s, {(index._docs.nbytes + index._weights.nbytes) / 1e6:.1f}MB postings, peak {peak / 1e6:.0f}MB while building")
+
+    rng = random.Random(5)
+    zrng = np.random.default_rng(5)
+    head = vocab[len(STOPWORDS):len(STOPWORDS) + 2000]
+    workloads = {
+        "rumors": [" ".join(zipf_words(zrng, vocab, rng.randint(8, 24))) for _ in range(args.queries)],
+        "head-heavy": [" ".join(rng.choice(BASE if rng.random() < 0.4 else head) for _ in range(rng.randint(6, 16)))
+                       for _ in range(args.queries)],
+    }
+    docs = [Counter(tokenize(r.text + " " + " ".join(r.tags))) for r in replies]
+    for name, queries in workloads.items():
+        for q in queries[:50]:
+            index.search(q)
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            index.search(q, k=3)
+            latencies.append(time.perf_counter() - t0)
+        us = np.asarray(latencies) * 1e6
+        terms = np.mean([len(set(tokenize(q))) for q in queries])
+        print(f"search {name:10s} (~{terms:.0f} terms) k=3: p50={np.percentile(us, 50):.0f}us "
+              f"p99={np.percentile(us, 99):.0f}us max={us.max():.0f}us")
+
+        sample = queries[:args.checks]
+        t0 = time.perf_counter()
+        expected = [brute_force(replies, docs, q) for q in sample]
+        brute_ms = (time.perf_counter() - t0) / len(sample) * 1000
+        agree = sum([m.id for m in index.search(q, k=3)] == e for q, e in zip(sample, expected))
+        print(f"  brute-force scan {brute_ms:.0f}ms per query; same top-3 as the index on {agree}/{len(sample)} queries")
+
+    posts = {"ascii": "We are investigating reports of an outage affecting some customers. Updates to follow. " * 3,
+             "emoji": "We're on it 👩🏽‍💻🔧 — status 🇺🇸🇬🇧 updates soon ❤️ café résumé 👨‍👩‍👧 " * 4}
+    for name, text in posts.items():
+        t0 = time.perf_counter()
+        for _ in range(2000):
+            length = grapheme_len(text)
+        per = (time.perf_counter() - t0) / 2000
+        print(f"grapheme_len {name:5s}: {len(text)} code points -> {length} graphemes in {per * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Worker stand-in for the incident-storm load generator.
+
+    python -m benchmarks.storm_worker --queue interactive --storage-dir /tmp/storm
+
+Started by apps/orchestrator/benchmarks/storm_bench.py, one process per
+pool slot. Reads one task message per line on stdin
+(``{"id", "task", "args", "kwargs"}``), runs the task offline as the suite
+does (eager Celery, process-local Redis features, segment audit log) and
+answers on stdout with ``{"id", "ok", "started", "finished", "result"}`` or
+``"error"``. Timestamps are wall-clock so the generator can line them up
+with its own. Exports are written to ``--storage-dir`` instead of S3 and
+answered with their size, not their bytes.
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queue", required=True, help="imports and warms only this queue's task modules")
+    parser.add_argument("--storage-dir", type=Path, required=True)
+    args = parser.parse_args()
+
+    # Replies get their own copy of stdout; anything else printed goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    os.environ["WORKER_QUEUES"] = args.queue
+    from benchmarks.suite import configure_offline
+    from celery_app import celery_app
+    from app.core.warmup import run_warmup
+
+    configure_offline()
+    celery_app.loader.import_default_modules()
+    run_warmup()
+    args.storage_dir.mkdir(parents=True, exist_ok=True)
+    replies.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+
+    for line in sys.stdin:
+        message: Dict[str, Any] = json.loads(line)
+        reply: Dict[str, Any] = {"id": message["id"], "started": time.time()}
+        try:
+            result = celery_app.tasks[message["task"]].apply(args=message["args"], kwargs=message["kwargs"]).get()
+            if message["task"] == "export_generate":
+                data = base64.b64decode(result.pop("content_base64"))
+                (args.storage_dir / f"{message['id']}-{result['filename']}").write_bytes(data)
+                result["bytes"] = len(data)
+            reply.update(ok=True, result=result)
+        except Exception as e:
+            reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+        reply["finished"] = time.time()
+        replies.write(json.dumps(reply, default=str) + "\n")
+
+
+if __name__ == "__main__":
+    main()
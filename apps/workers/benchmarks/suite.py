@@ -0,0 +1,275 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Offline benchmark suite for every worker task.
+
+    python -m benchmarks.suite                      # run and compare to baseline
+    python -m benchmarks.suite --filter legal_lint  # subset of cases
+    python -m benchmarks.suite --save-baseline      # refresh benchmarks/baseline.json
+
+Tasks run through Celery in eager mode with an in-memory broker and result
+backend, and Redis-backed features run process-local, so no services are
+needed. Each case reports latency percentiles, throughput and peak traced
+memory; a case regresses when its p50 exceeds the baseline by more than
+``--tolerance``. Baselines are machine-specific: refresh them on the
+hardware that runs the comparison.
+"""
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from celery_app import celery_app
+from app.core.config import settings
+from app.core.logging import setup_logging
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+def configure_offline() -> None:
+    """Eager Celery, in-memory transport, no Redis round trips, quiet logs."""
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        task_always_eager=True,
+        task_store_eager_result=False,
+    )
+    # Cases repeat identical inputs: measure the cold path, not cache/dedup hits
+    settings.MEMO_ENABLED = False
+    settings.DEDUP_ENABLED = False
+    # Bulk intake chunks are normalized but not written to Postgres
+    settings.BULK_INTAKE_PERSIST = False
+    # Approval routes stay in the engine, not written through to Redis
+    settings.APPROVAL_PERSIST = False
+    # Audit events go to a throwaway segment log instead of Postgres
+    settings.AUDIT_BACKEND = "segment"
+    settings.AUDIT_DIR = tempfile.mkdtemp(prefix="audit-")
+    setup_logging(level="WARNING")
+    logging.getLogger("celery").setLevel(logging.WARNING)
+
+    from app.core import events, profiling
+    from app.tasks import approvals, bulk_intake, monitor_ingest, sla_timer
+    from app.tasks.monitor_series import get_series_store
+    from app.tasks.statement_index import get_approved_store
+
+    get_approved_store().redis = None
+    get_series_store().redis = None
+    # Realtime events and shard handoff lookups would each try Redis: no-ops
+    # here, including in the task modules that imported publish_event by name
+    events.publish_event = _publish_event
+    events.publish_events = _publish_events
+    for module in (approvals, bulk_intake, monitor_ingest, sla_timer):
+        module.publish_event = _publish_event
+    monitor_ingest.adopt_incident = _adopt_incident
+    # Task profiling stays off without polling its Redis config
+    profiling.config.active = lambda: False
+
+
+def _publish_event(channel: str, event: Dict[str, Any]) -> bool:
+    return True
+
+
+def _publish_events(events: List[Tuple[str, Dict[str, Any]]]) -> bool:
+    return True
+
+
+def _adopt_incident(incident_id: str) -> bool:
+    return False
+
+
+def _words(n: int, rng: random.Random) -> str:
+    vocab = ["customer", "service", "update", "team", "systems", "investigating", "access",
+             "resolve", "status", "support", "security", "incident", "data", "account"]
+    return " ".join(rng.choice(vocab) for _ in range(n))
+
+
+def _document(size: int, risky_terms: int, rng: random.Random) -> str:
+    words = _words(max(1, size // 8), rng).split()
+    risky = ["breach", "hack", "stolen", "guarantee", "promise", "never"]
+    for _ in range(risky_terms):
+        words.insert(rng.randrange(len(words)), rng.choice(risky))
+    return " ".join(words)
+
+
+def build_cases() -> List[Case]:
+    from app.tasks.content_writer import (
+        generate_faq,
+        generate_holding_statement,
+        generate_internal_memo,
+        generate_press_release,
+        generate_social_media,
+    )
+    from app.tasks.approvals import engine, record_approval_decision, route_artifact_approval
+    from app.tasks.bulk_intake import normalize_incident_batch
+    from app.tasks.exporter import export_generate
+    from app.tasks.intake_normalizer import normalize_incident
+    from app.tasks.legal_linter import legal_lint_content
+    from app.tasks.monitor_ingest import detect_rumors, monitor_ingest_mentions
+    from app.tasks.plan_builder import build_plan
+
+    rng = random.Random(42)
+    cases: List[Case] = []
+
+    report = (
+        "On March 3rd, 2024 we detected that approximately 12,000 customer records, including email "
+        "addresses and hashed passwords, were exposed from a misconfigured S3 bucket. The ICO was notified. "
+    )
+    log_line = "2024-03-01 12:00:01 INFO request handled in 12ms user=abc path=/api/v1/things status=200\n"
+    for label, description in (("1kb", report * 4), ("100kb", report + log_line * 1100)):
+        incident = {"id": "bench", "title": "Data exposure", "description": description,
+                    "detected_at": "2024-03-03", "affected_users": 0, "data_types": [], "jurisdictions": ["gb"]}
+        cases.append((f"normalize_incident[{label}]", lambda i=incident: normalize_incident.apply(args=[i]).get()))
+
+    records = [{"line": i + 1, "incident": {**incident, "id": f"bench-{i}", "description": report}} for i in range(200)]
+    cases.append(("normalize_incident_batch[200]", lambda r=records: normalize_incident_batch.apply(args=["bench", "default", r]).get()))
+
+    for severity in ("critical", "medium"):
+        incident = {"severity": severity, "jurisdictions": ["UK", "US"]}
+        cases.append((f"build_plan[{severity}]", lambda i=incident: build_plan.apply(args=[i]).get()))
+
+    content_request = {
+        "incident_id": "bench",
+        "content_type": "holding_statement",
+        "incident_facts": {"incident_type": "data breach", "affected_systems": ["crm", "s3"], "affected_users": "12,000 customers"},
+        "severity": "high",
+        "target_audience": ["customers"],
+    }
+    for task in (generate_holding_statement, generate_press_release, generate_internal_memo, generate_faq, generate_social_media):
+        cases.append((f"{task.name}", lambda t=task: t.apply(args=[content_request]).get()))
+
+    def memo_hit():
+        settings.MEMO_ENABLED = True
+        try:
+            return generate_holding_statement.apply(args=[content_request]).get()
+        finally:
+            settings.MEMO_ENABLED = False
+
+    cases.append(("generate_holding_statement[memo_hit]", memo_hit))
+
+    for size in (1_000, 10_000, 100_000):
+        for terms in (0, 10, 100):
+            doc = _document(size, terms, rng)
+            lint = {"incident_id": "bench", "artifact_id": "a", "content": doc, "jurisdiction": "UK"}
+            cases.append((f"legal_lint_content[{size // 1000}kb,{terms}terms]", lambda r=lint: legal_lint_content.apply(args=[r]).get()))
+
+    for size in (100, 1_000, 10_000):
+        feed = [{"text": f"{_words(12, rng)} {'leak' if i % 7 == 0 else ''}", "source": "twitter"} for i in range(size)]
+        cases.append((f"monitor_ingest_mentions[{size}]", lambda f=feed: monitor_ingest_mentions.apply(args=["bench", f]).get()))
+        mentions = [{"id": f"m{i}", "text": item["text"]} for i, item in enumerate(feed)]
+        cases.append((f"detect_rumors[{size}]", lambda m=mentions: detect_rumors.apply(args=["bench", m]).get()))
+
+    for i in range(10_000):
+        engine.route(f"bench-{i // 6}", f"artifact-{i}", "press_release", "default", ("pr", "legal", "exec"))
+
+    def approval_chain():
+        route_artifact_approval.apply(args=["bench", "a", "press_release", "critical", ["UK", "US"]]).get()
+        for order_idx, role in enumerate(("pr", "legal", "exec"), 1):
+            record_approval_decision.apply(args=["bench", "a", order_idx, role, "approved", "u"]).get()
+
+    cases.append(("approval_chain[10k pending]", approval_chain))
+
+    rows = [{"id": i, "title": f"Task {i}", "status": "todo", "owner": "pr"} for i in range(1_000)]
+    content = "# Crisis Packet\n\n" + _words(5_000, rng)
+    exports = {
+        "csv": {"incident_id": "bench", "export_type": "csv", "filename": "tasks", "rows": rows},
+        "mdx": {"incident_id": "bench", "export_type": "mdx", "filename": "packet", "content": content},
+        "pdf": {"incident_id": "bench", "export_type": "pdf", "filename": "packet", "content": content},
+        "zip": {"incident_id": "bench", "export_type": "zip", "filename": "packet", "content": content},
+    }
+    for fmt, req in exports.items():
+        cases.append((f"export_generate[{fmt}]", lambda r=req: export_generate.apply(args=[r]).get()))
+
+    return cases
+
+
+def measure(fn: Callable[[], Any], min_time: float, min_iterations: int, max_iterations: int) -> Dict[str, float]:
+    """Latency percentiles/throughput from timed runs, then peak memory from one traced run."""
+    fn()  # warm-up
+    samples = []
+    gc.collect()
+    started = time.perf_counter()
+    while len(samples) < max_iterations and (len(samples) < min_iterations or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.asarray(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "throughput_per_s": len(samples) / elapsed,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference["p50_ms"] * (1 + tolerance)
+        if stats["p50_ms"] > limit:
+            regressions.append(f"{name}: p50 {stats['p50_ms']:.3f}ms > {limit:.3f}ms (baseline {reference['p50_ms']:.3f}ms)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run cases containing this substring")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=2000)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown vs baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    configure_offline()
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.min_time, args.min_iterations, args.max_iterations)
+        print(f"{name:45s} p50={results[name]['p50_ms']:9.3f}ms p99={results[name]['p99_ms']:9.3f}ms "
+              f"{results[name]['throughput_per_s']:9.1f}/s peak={results[name]['peak_memory_kb']:9.1f}KB", file=sys.stderr)
+
+    report = {"results": results, "regressions": []}
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update({name: {"p50_ms": s["p50_ms"], "p99_ms": s["p99_ms"]} for name, s in results.items()})
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    elif args.baseline.exists():
+        report["regressions"] = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+    for line in report["regressions"]:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
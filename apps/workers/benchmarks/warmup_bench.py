@@ -0,0 +1,82 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""First-task latency after a worker (re)start, with and without warm-up.
+
+    python -m benchmarks.warmup_bench --statements 20000
+
+Each mode runs in a fresh interpreter, like a recycled prefork child: the
+first normalize/lint/rumor tasks are timed cold, after ``run_warmup`` and
+after ``run_warmup`` with the approved statements loaded from a snapshot
+rather than replayed and re-embedded from the shared log.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r"""
+import json, sys, time
+from benchmarks.suite import configure_offline
+configure_offline()
+from app.core.config import settings
+from app.tasks.statement_index import get_approved_store
+mode, statements, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+timings = {}
+started = time.perf_counter()
+store = get_approved_store()
+if mode == "snapshot":
+    settings.WARMUP_SNAPSHOT_PATH = path
+else:
+    # Stand-in for the first sync catching up on the shared Redis log: embed every entry
+    def replay():
+        for i in range(statements):
+            store._add_local(f"a{i}", "holding_statement", f"Approved statement {i}: we are investigating unauthorized access {i % 97}")
+        store.sync = lambda: 0
+        return statements
+    store.sync = replay
+if mode != "cold":
+    from app.core.warmup import run_warmup
+    run_warmup()
+timings["startup_ms"] = (time.perf_counter() - started) * 1000
+from app.tasks.intake_normalizer import normalize_incident
+from app.tasks.legal_linter import legal_lint_content
+from app.tasks.monitor_ingest import detect_rumors
+incident = {"id": "b", "title": "Exposure", "description": "12,000 customer records exposed in the UK", "detected_at": "2024-03-03",
+            "affected_users": 0, "data_types": [], "jurisdictions": ["gb"]}
+for name, call in (
+    ("normalize_incident", lambda: normalize_incident.apply(args=[incident]).get()),
+    ("legal_lint_content", lambda: legal_lint_content.apply(args=[{"incident_id": "b", "artifact_id": "a", "content": "We never had a breach.", "jurisdiction": "UK"}]).get()),
+    ("detect_rumors", lambda: detect_rumors.apply(args=["b", [{"id": "m", "text": "is the leak real?"}]]).get()),
+):
+    t0 = time.perf_counter()
+    call()
+    timings[name] = (time.perf_counter() - t0) * 1000
+print(json.dumps(timings))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--statements", type=int, default=20_000, help="approved statements in the shared index")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        from app.services.similarity import ApprovedStatementStore
+
+        store = ApprovedStatementStore()
+        t0 = time.perf_counter()
+        for i in range(args.statements):
+            store._add_local(f"a{i}", "holding_statement", f"Approved statement {i}: we are investigating unauthorized access {i % 97}")
+        store.save_snapshot(__import__("pathlib").Path(path))
+        print(f"snapshot of {args.statements} statements built in {time.perf_counter() - t0:.1f}s")
+
+        for mode in ("cold", "warm", "snapshot"):
+            out = subprocess.run([sys.executable, "-c", CHILD, mode, str(args.statements), path],
+                                 capture_output=True, text=True, check=True).stdout
+            timings = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:9s} " + " ".join(f"{k}={v:8.1f}ms" for k, v in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
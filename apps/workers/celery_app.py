@@ -1,24 +1,57 @@
 # Created automatically by Cursor AI (2024-12-19)
 from celery import Celery
+from typing import List, Optional
 from app.core.config import settings
+from app.core import telemetry  # noqa: F401  (registers task signal hooks)
+from app.core import profiling  # noqa: F401  (registers opt-in task profiling hooks)
+from app.core import warmup  # noqa: F401  (warms hot resources before consuming)
+from app.core.logging import setup_logging
+from app.core.sharding import route_monitor_task
 import structlog
 
+setup_logging()
 logger = structlog.get_logger()
 
-# Create Celery app
+# Task module -> queue. Drives the routes below, and which modules a worker imports
+TASK_QUEUES = {
+    "app.tasks.intake_normalizer": "interactive",
+    "app.tasks.plan_builder": "interactive",
+    "app.tasks.content_writer": "interactive",
+    "app.tasks.legal_linter": "interactive",
+    "app.tasks.social_pack": "interactive",
+    "app.tasks.monitor_ingest": "monitor",
+    "app.tasks.monitor_series": "interactive",
+    "app.tasks.exporter": "exports",
+    # Bulk imports: their own queue, so a large import never delays interactive tasks
+    "app.tasks.bulk_intake": "bulk",
+    "app.tasks.sla_timer": "sla",
+    "app.tasks.approvals": "approvals",
+    "app.tasks.statement_index": "interactive",
+    "app.tasks.artifact_revisions": "interactive",
+    "app.tasks.profiling": "interactive",
+}
+
+# Tasks registered under bare names, which the module routes below do not match
+NAMED_TASK_QUEUES = {
+    "analyze_sentiment_series": "interactive",
+    "query_mention_series": "interactive",
+}
+
+def task_modules(queues: Optional[str] = None) -> List[str]:
+    """Task modules a worker consuming ``queues`` (comma-separated, as given to -Q) can receive; all when unset."""
+    if not queues:
+        return list(TASK_QUEUES)
+    # monitor.0..N-1 are the monitor queue's shards
+    wanted = {queue.strip().split(".")[0] for queue in queues.split(",")}
+    return [module for module, queue in TASK_QUEUES.items() if queue in wanted]
+
+# Create Celery app. With WORKER_QUEUES set, start-up skips the task modules (and
+# their dependencies) this worker will never receive a task for.
 celery_app = Celery(
     "crisis_crew_workers",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=[
-        "app.tasks.intake_normalizer",
-        "app.tasks.plan_builder", 
-        "app.tasks.content_writer",
-        "app.tasks.legal_linter",
-        "app.tasks.social_pack",
-        "app.tasks.monitor_ingest",
-        "app.tasks.exporter",
-    ]
+    include=task_modules(settings.WORKER_QUEUES),
 )
 
 # Celery configuration
@@ -36,15 +69,20 @@ celery_app.conf.update(
     broker_connection_retry_on_startup=True,
 )
 
-# Task routing
-celery_app.conf.task_routes = {
-    "app.tasks.intake_normalizer.*": {"queue": "interactive"},
-    "app.tasks.plan_builder.*": {"queue": "interactive"},
-    "app.tasks.content_writer.*": {"queue": "interactive"},
-    "app.tasks.legal_linter.*": {"queue": "interactive"},
-    "app.tasks.social_pack.*": {"queue": "interactive"},
-    "app.tasks.monitor_ingest.*": {"queue": "monitor"},
-    "app.tasks.exporter.*": {"queue": "exports"},
+# Task routing: per-incident monitor tasks go to their shard's queue
+# (monitor.0..N-1, one single-process worker each) before the static routes apply
+celery_app.conf.task_routes = (
+    route_monitor_task,
+    {f"{module}.*": {"queue": queue} for module, queue in TASK_QUEUES.items()},
+    {name: {"queue": queue} for name, queue in NAMED_TASK_QUEUES.items()},
+)
+
+# Periodic tasks
+celery_app.conf.beat_schedule = {
+    "sla-tick": {
+        "task": "app.tasks.sla_timer.sla_tick",
+        "schedule": settings.SLA_TICK_SECONDS,
+    },
 }
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Long-running mention ingestion: feed source -> micro-batches -> dedup, scoring, anomaly and rumor detection.
+
+    python ingest_service.py                          # NATS (settings.NATS_URL)
+    python ingest_service.py --source file --path feed.ndjson [--follow]
+
+Runs outside Celery so mentions are never dispatched one task at a time.
+Incidents must stick to one ingest process for their anomaly windows, so
+scale out with NATS subjects per incident rather than a shared queue group
+when running more than one process.
+"""
+import argparse
+import asyncio
+import signal
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import structlog
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.core.events import publish_events
+from app.core.logging import setup_logging
+from app.services.feed_ingest import FeedIngestor, FeedSource, FileSource, MemorySource, NatsSource
+from app.tasks.monitor_ingest import Rumor, adopt_incident, build_mentions, dedupe_feed, is_rumor, record_series, watch_mentions
+
+logger = structlog.get_logger()
+
+
+def process_batch(
+    items: List[Dict[str, Any]],
+    publish: Callable[[List[Tuple[str, Dict[str, Any]]]], bool] = publish_events,
+) -> Dict[str, int]:
+    """Score one micro-batch, grouped by incident, add it to the chart series and publish rumors in a single round trip."""
+    now = datetime.utcnow()
+    by_incident: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for item in items:
+        by_incident[item["incident_id"]].append(item)
+
+    events: List[Tuple[str, Dict[str, Any]]] = []
+    anomalies = 0
+    duplicates = 0
+    for incident_id, feed in by_incident.items():
+        adopt_incident(incident_id)
+        feed, dropped = dedupe_feed(incident_id, feed)
+        duplicates += dropped
+        mentions = build_mentions(incident_id, feed, now)
+        anomalies += len(watch_mentions(incident_id, mentions))
+        record_series(incident_id, mentions)
+        for m in mentions:
+            if is_rumor(m.text):
+                rumor = Rumor(id=f"r-{m.id}", incident_id=incident_id, text=m.text, confidence=0.6, severity="medium", created_at=now)
+                events.append((f"incident:{incident_id}:monitor", {"type": "monitor.rumor", **rumor.dict()}))
+    publish(events)
+    return {
+        "mentions": len(items) - duplicates,
+        "duplicates": duplicates,
+        "incidents": len(by_incident),
+        "anomalies": anomalies,
+        "rumors": len(events),
+    }
+
+
+def make_source(kind: str, path: str = None, follow: bool = False) -> FeedSource:
+    if kind == "nats":
+        return NatsSource(settings.NATS_URL, settings.INGEST_SUBJECT, settings.INGEST_QUEUE_GROUP)
+    if kind == "file":
+        if not path:
+            raise ValueError("--path (or INGEST_FILE_PATH) is required for the file source")
+        return FileSource(path, follow=follow)
+    if kind == "memory":
+        return MemorySource()
+    raise ValueError(f"Unknown feed source: {kind}")
+
+
+async def serve(source: FeedSource) -> FeedIngestor:
+    ingestor = FeedIngestor(
+        source,
+        process_batch,
+        batch_size=settings.INGEST_BATCH_SIZE,
+        max_wait=settings.INGEST_BATCH_WAIT_MS / 1000,
+        queue_size=settings.INGEST_QUEUE_SIZE,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(ingestor.stop()))
+
+    logger.info("Ingest service started", source=source.name, batch_size=ingestor.batch_size)
+    await ingestor.run()
+    logger.info("Ingest service stopped", processed=ingestor.processed, batches=ingestor.batches)
+    return ingestor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=settings.INGEST_SOURCE, choices=["nats", "file", "memory"])
+    parser.add_argument("--path", default=settings.INGEST_FILE_PATH)
+    parser.add_argument("--follow", action="store_true", help="keep tailing the file source")
+    args = parser.parse_args()
+
+    setup_logging()
+    start_http_server(settings.INGEST_METRICS_PORT)
+    asyncio.run(serve(make_source(args.source, args.path, args.follow)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Created automatically by Cursor AI (2024-12-19)
+"""Worker warm-up tools.
+
+    python warmup_snapshot.py build [--path DIR]   # snapshot approved statements for mmap warm starts
+    python warmup_snapshot.py run                  # time each warm-up step in this process
+"""
+import argparse
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.core.warmup import build_snapshot, run_warmup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["build", "run"])
+    parser.add_argument("--path", default=settings.WARMUP_SNAPSHOT_PATH, help="snapshot directory")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == "build":
+        if not args.path:
+            parser.error("--path (or WARMUP_SNAPSHOT_PATH) is required")
+        print(f"snapshot: {build_snapshot(Path(args.path))} approved statements -> {args.path}")
+    else:
+        for name, seconds in run_warmup().items():
+            print(f"{name:24s} {seconds * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
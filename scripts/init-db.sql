@@ -169,18 +169,36 @@ CREATE TABLE IF NOT EXISTS comments (
     created_at TIMESTAMPTZ DEFAULT now()
 );
 
--- Create audit log table
+-- Create audit log table (append-only; id is the hash-chain sequence, assigned by the writer).
+-- incident_id has no foreign key: lint and approval events are audited for
+-- incidents the workers know before (or without) a row in incidents.
 CREATE TABLE IF NOT EXISTS audit_log (
     id BIGSERIAL PRIMARY KEY,
     org_id UUID REFERENCES orgs(id),
     user_id UUID REFERENCES users(id),
-    incident_id UUID REFERENCES incidents(id),
+    incident_id UUID,
     action TEXT NOT NULL,
     target TEXT NOT NULL,
     meta JSONB,
-    created_at TIMESTAMPTZ DEFAULT now()
+    created_at TIMESTAMPTZ DEFAULT now(),
+    prev_hash TEXT,
+    hash TEXT
 );
 
+-- Databases created before the hash chain
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS prev_hash TEXT, ADD COLUMN IF NOT EXISTS hash TEXT;
+ALTER TABLE audit_log DROP CONSTRAINT IF EXISTS audit_log_incident_id_fkey;
+
+CREATE OR REPLACE FUNCTION audit_log_immutable() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'audit_log is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS audit_log_no_update ON audit_log;
+CREATE TRIGGER audit_log_no_update BEFORE UPDATE OR DELETE ON audit_log
+    FOR EACH ROW EXECUTE FUNCTION audit_log_immutable();
+
 -- Create feeds table
 CREATE TABLE IF NOT EXISTS feeds (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -233,6 +251,7 @@ CREATE INDEX IF NOT EXISTS idx_artifacts_incident_id_kind_version ON artifacts(i
 CREATE INDEX IF NOT EXISTS idx_tasks_incident_id_status_due_at ON tasks(incident_id, status, due_at);
 CREATE INDEX IF NOT EXISTS idx_approvals_incident_id_artifact_kind ON approvals(incident_id, artifact_kind);
 CREATE INDEX IF NOT EXISTS idx_audit_log_org_id_created_at ON audit_log(org_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_incident_id_created_at ON audit_log(incident_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_rumors_embedding ON rumors USING ivfflat (embedding vector_cosine_ops);
 
 -- Create RLS policies (basic setup)